@@ -1,14 +1,37 @@
-# main.py
-from fastapi import FastAPI, HTTPException
+# blood-backend/api/routes/admin.py
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
-from typing import List, Literal
-from datetime import datetime, timedelta
-import random
+from typing import List, Literal, Optional
+from datetime import datetime
+from bson import ObjectId
+from utils.security import require_role
+from utils.versioning import versions, check_etag, query_fingerprint
+from services.admin_metrics import (
+    admin_metrics, api_response_time_ms, cpu_percent, memory_percent, storage_percent, uptime, format_minutes
+)
+from services.activity import activity_log, ACTIVITY_COLLECTION
+from services.notifications import (
+    MAX_DONOR_NOTIFICATIONS_PER_ALERT, CRITICAL_THRESHOLD_UNITS, AUTO_ESCALATION_MINUTES, BACKUP_HOSPITAL_RANGE_KM
+)
 
-# Initialize the FastAPI application
-app = FastAPI(title="Admin Dashboard API", description="API endpoints to power the admin dashboard.")
+# Every admin dashboard endpoint requires an admin token
+router = APIRouter(dependencies=[Depends(require_role("admin"))])
 
-# Pydantic models for data validation and response serialization
+# --- Conditional GETs ---
+def metrics_etag(request: Request, response: Response) -> str:
+    """
+    ETag over the materialized admin counters: it changes with each refresh,
+    so polls between refreshes are answered with 304 from memory. Live host
+    figures (CPU, memory, API latency) are sampled at that same cadence.
+    """
+    return check_etag(request, response, versions.etag("admin_metrics", admin_metrics.generation))
+
+def activity_etag(request: Request, response: Response) -> str:
+    return check_etag(request, response, versions.etag(
+        ACTIVITY_COLLECTION, versions.get(ACTIVITY_COLLECTION), query_fingerprint(request)
+    ))
+
+# --- Pydantic Models ---
 class SystemMetrics(BaseModel):
     """Model for system health metrics."""
     total_donors: int
@@ -62,93 +85,13 @@ class AlertManagement(BaseModel):
     alert_config: AlertConfiguration
     recent_performance: List[AlertPerformance]
 
-# Mock data to simulate a database. In a real application, you'd fetch this from a database.
-mock_system_metrics = SystemMetrics(
-    total_donors=12847,
-    active_hospitals=89,
-    alerts_today=34,
-    successful_matches=28,
-    average_response_time='8.5 min',
-    system_uptime='99.97%',
-    api_response_time_ms=127,
-    db_status="Normal",
-    notification_service_status="Online",
-    sms_gateway_status="Degraded",
-    cpu_usage_percent=23.0,
-    memory_usage_percent=67.0,
-    storage_usage_percent=45.0
-)
-
-mock_network_activity = [
-    NetworkActivity(
-        id='1',
-        type='alert',
-        description='Critical B- blood alert sent to 145 donors',
-        timestamp=datetime.now() - timedelta(minutes=10),
-        status='success',
-        location='City General Hospital'
-    ),
-    NetworkActivity(
-        id='2',
-        type='match',
-        description='Donor matched for emergency O+ request',
-        timestamp=datetime.now() - timedelta(minutes=15),
-        status='success',
-        location='Metro Medical Center'
-    ),
-    NetworkActivity(
-        id='3',
-        type='donation',
-        description='Blood donation completed successfully',
-        timestamp=datetime.now() - timedelta(minutes=25),
-        status='success',
-        location='Regional Blood Bank'
-    ),
-    NetworkActivity(
-        id='4',
-        type='registration',
-        description='New hospital registered in network',
-        timestamp=datetime.now() - timedelta(minutes=75),
-        status='pending',
-        location='Suburban Medical Center'
-    )
-]
+ALERT_STATUS_LABELS = {"fulfilled": "Resolved", "active": "In Progress"}
 
-mock_user_summary = UserSummary(
-    active_donors=12847,
-    new_donors_this_week=127,
-    hospital_partners=89,
-    pending_hospital_verification=3,
-    system_admins=12
-)
+# --- Endpoints ---
+# Counters come from the materialized snapshot in services.admin_metrics;
+# host and latency figures are read live since they are cheap.
 
-mock_alert_management = AlertManagement(
-    alert_config=AlertConfiguration(
-        critical_threshold="≤ 5 units",
-        auto_escalation_time="15 minutes",
-        max_donor_notifications="200 per alert",
-        backup_hospital_range="50 km radius"
-    ),
-    recent_performance=[
-        AlertPerformance(
-            alert_type="B- Critical Alert",
-            status="Resolved",
-            donors_notified=145,
-            responses=12,
-            avg_response_time="6.5 min"
-        ),
-        AlertPerformance(
-            alert_type="O+ High Priority",
-            status="In Progress",
-            donors_notified=89,
-            responses=18,
-            avg_response_time="4.2 min"
-        )
-    ]
-)
-
-# Endpoint to get the main system metrics for the dashboard
-@app.get("/api/dashboard/metrics", response_model=SystemMetrics)
+@router.get("/dashboard/metrics", response_model=SystemMetrics, dependencies=[Depends(metrics_etag)])
 async def get_system_metrics():
     """
     Fetches the real-time system metrics for the admin dashboard overview.
@@ -156,78 +99,109 @@ async def get_system_metrics():
     This endpoint provides key performance indicators like donor count, hospital status,
     and system health.
     """
-    # Simulate dynamic data changes
-    mock_system_metrics.alerts_today = random.randint(30, 40)
-    mock_system_metrics.successful_matches = random.randint(25, 35)
-    mock_system_metrics.api_response_time_ms = random.randint(100, 200)
-    mock_system_metrics.cpu_usage_percent = round(random.uniform(20.0, 30.0), 1)
-    
-    return mock_system_metrics
+    counters = admin_metrics.counters
+    return SystemMetrics(
+        total_donors=counters.get("total_donors", 0),
+        active_hospitals=counters.get("active_hospitals", 0),
+        alerts_today=counters.get("alerts_today", 0),
+        successful_matches=counters.get("successful_matches", 0),
+        average_response_time=format_minutes(counters.get("average_response_minutes")),
+        system_uptime=uptime(),
+        api_response_time_ms=round(api_response_time_ms()),
+        db_status=admin_metrics.db_status,
+        notification_service_status="Online",
+        # No SMS provider is wired up yet
+        sms_gateway_status="Offline",
+        cpu_usage_percent=round(cpu_percent(), 1),
+        memory_usage_percent=round(memory_percent(), 1),
+        storage_usage_percent=round(storage_percent(), 1),
+    )
 
 # Endpoint to get the real-time network activity feed
-@app.get("/api/dashboard/activity", response_model=List[NetworkActivity])
-async def get_network_activity():
+@router.get("/dashboard/activity", response_model=List[NetworkActivity], dependencies=[Depends(activity_etag)])
+async def get_network_activity(
+    after: Optional[str] = Query(None, description="Only return events newer than this activity id"),
+    limit: int = Query(50, ge=1, le=500)
+):
     """
-    Retrieves a list of recent network activities.
+    Retrieves recent network activity, newest first.
     
     This feed includes alerts, matches, donations, and new registrations.
-    It can be filtered or paginated in a more advanced implementation.
+    Pass the newest `id` already seen as `after` to fetch only new events.
     """
-    return mock_network_activity
+    if after is not None and not ObjectId.is_valid(after):
+        raise HTTPException(status_code=400, detail="Invalid activity cursor")
+    events = await activity_log.read(ObjectId(after) if after else None, limit)
+    return [{**event, "id": str(event["_id"])} for event in events]
 
 # Endpoint for analytics data. The frontend handles the visualization.
-@app.get("/api/dashboard/analytics/response-time")
+@router.get("/dashboard/analytics/response-time", dependencies=[Depends(metrics_etag)])
 async def get_response_time_analytics():
     """
     Provides data on average response times for different alert priorities.
     """
+    by_urgency = admin_metrics.counters.get("response_minutes_by_urgency", {})
     return {
-        "critical_alerts_avg_time": "6.2 min",
-        "high_priority_avg_time": "8.7 min",
-        "medium_priority_avg_time": "12.4 min"
+        "critical_alerts_avg_time": format_minutes(by_urgency.get("Critical")),
+        "high_priority_avg_time": format_minutes(by_urgency.get("High")),
+        "medium_priority_avg_time": format_minutes(by_urgency.get("Medium"))
     }
 
 # Endpoint for analytics data on success rates by blood type.
-@app.get("/api/dashboard/analytics/success-rate")
+@router.get("/dashboard/analytics/success-rate", dependencies=[Depends(metrics_etag)])
 async def get_success_rate_analytics():
     """
     Provides data on blood request fulfillment rates by blood type.
     """
-    return {
-        "data": [
-            {"blood_type": "O-", "success_rate": 85},
-            {"blood_type": "B-", "success_rate": 87},
-            {"blood_type": "AB-", "success_rate": 89},
-            {"blood_type": "A-", "success_rate": 91},
-            {"blood_type": "O+", "success_rate": 93},
-            {"blood_type": "B+", "success_rate": 95},
-            {"blood_type": "A+", "success_rate": 97},
-            {"blood_type": "AB+", "success_rate": 99},
-        ]
-    }
+    return {"data": admin_metrics.counters.get("success_rates", [])}
     
 # Endpoint to get alert management configuration and performance
-@app.get("/api/dashboard/alerts", response_model=AlertManagement)
+@router.get("/dashboard/alerts", response_model=AlertManagement, dependencies=[Depends(metrics_etag)])
 async def get_alert_management():
     """
     Retrieves alert management settings and performance data for recent alerts.
     """
-    return mock_alert_management
+    recent_performance = [
+        AlertPerformance(
+            alert_type=f"{alert.get('blood_group', 'Unknown')} Alert",
+            status=ALERT_STATUS_LABELS.get(alert.get("status"), "Failed"),
+            donors_notified=alert.get("donors_notified", 0),
+            responses=alert.get("responses", 0),
+            avg_response_time=format_minutes(alert.get("avg_response_minutes"))
+        )
+        for alert in admin_metrics.counters.get("recent_alerts", [])
+    ]
+    return AlertManagement(
+        alert_config=AlertConfiguration(
+            critical_threshold=f"≤ {CRITICAL_THRESHOLD_UNITS} units",
+            auto_escalation_time=f"{AUTO_ESCALATION_MINUTES} minutes",
+            max_donor_notifications=f"{MAX_DONOR_NOTIFICATIONS_PER_ALERT} per alert",
+            backup_hospital_range=f"{BACKUP_HOSPITAL_RANGE_KM:g} km radius"
+        ),
+        recent_performance=recent_performance
+    )
 
 # Endpoint to get user management summary statistics
-@app.get("/api/dashboard/users", response_model=UserSummary)
+@router.get("/dashboard/users", response_model=UserSummary, dependencies=[Depends(metrics_etag)])
 async def get_user_summary():
     """
     Provides a summary of user statistics, including donors, hospitals, and admins.
     """
-    return mock_user_summary
+    counters = admin_metrics.counters
+    return UserSummary(
+        active_donors=counters.get("total_donors", 0),
+        new_donors_this_week=counters.get("new_donors_this_week", 0),
+        hospital_partners=counters.get("hospital_partners", 0),
+        pending_hospital_verification=counters.get("pending_hospital_verification", 0),
+        system_admins=counters.get("system_admins", 0)
+    )
     
 # Endpoint to handle the "Test Emergency Alert" button
-@app.post("/api/dashboard/alerts/test")
+@router.post("/dashboard/alerts/test")
 async def test_emergency_alert():
     """
     Simulates sending a test emergency alert.
     
     This would trigger a real-world action in a production system.
     """
-    return {"message": "Test emergency alert triggered successfully."}
\ No newline at end of file
+    return {"message": "Test emergency alert triggered successfully."}
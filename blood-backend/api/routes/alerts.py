@@ -1,16 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, AfterValidator
+from pymongo import ReturnDocument
 from db.conn import db
 from bson import ObjectId
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional, Annotated
+from utils.blood import validate_blood_group
 from utils.security import require_role
+from utils.pagination import Page, fetch_page, stream_ndjson, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, EXPORT_CHUNK_SIZE
+from utils.serialization import FastJSONResponse, projection_for
+from utils.versioning import versions, check_etag, etag_headers, query_fingerprint
+from services.notifications import schedule_fan_out
+from services.ranking import ranker, rank_donors_for_alert
+from services.activity import activity_log, hospital_label
+from services.escalation import escalation_scheduler, escalation_fields
 
 router = APIRouter()
 
 # --- Pydantic Models ---
 class AlertCreate(BaseModel):
-    blood_group: str
+    blood_group: Annotated[str, AfterValidator(validate_blood_group)]
     units_required: int
     # The hospital's location will be fetched from their profile
     
@@ -24,13 +34,25 @@ class AlertResponse(BaseModel):
     created_at: datetime
     status: str # e.g., 'active', 'fulfilled'
 
+# `id` is derived from `_id`, which find() returns anyway
+ALERT_PROJECTION = {field: 1 for field in projection_for(AlertResponse) if field != "id"}
+
+class RankedDonor(BaseModel):
+    donor_id: str
+    name: str | None = None
+    blood_group: str | None = None
+    exact_match: bool
+    distance_km: float
+    score: float
+
 # --- Endpoints ---
 
 @router.post("/", response_model=AlertResponse, status_code=status.HTTP_201_CREATED, summary="[Hospital] Create a blood alert")
-def create_alert(alert_data: AlertCreate, current_user: dict = Depends(require_role("hospital"))):
+async def create_alert(alert_data: AlertCreate, current_user: dict = Depends(require_role("hospital"))):
     """
     Protected endpoint for hospitals to create a new blood alert.
     The hospital's ID, name, and location are automatically taken from their profile.
+    Nearby compatible donors are notified in the background.
     """
     hospital_id = current_user["id"]
     hospital_location = current_user.get("location")
@@ -48,27 +70,105 @@ def create_alert(alert_data: AlertCreate, current_user: dict = Depends(require_r
         "status": "active",
         "created_at": datetime.now(timezone.utc)
     }
+    # Unanswered alerts widen their search ring every AUTO_ESCALATION_MINUTES
+    new_alert.update(escalation_fields(new_alert["created_at"]))
 
-    result = db.alerts.insert_one(new_alert)
-    
-    # We need to fetch the inserted document to return it in the correct format
-    created_alert = db.alerts.find_one({"_id": result.inserted_id})
-    created_alert["id"] = str(created_alert["_id"])
-    
-    # Here you would add logic to notify nearby donors.
-    # For now, we just return the created alert.
+    # insert_one sets new_alert["_id"], so no read-back is needed
+    await db.alerts.insert_one(new_alert)
+    versions.bump("alerts")
+
+    activity_log.record(
+        "alert", f"{alert_data.blood_group} blood alert raised for {alert_data.units_required} units",
+        "pending", hospital_label(current_user)
+    )
+
+    # Notify nearby donors without holding up the response
+    schedule_fan_out(dict(new_alert))
+    if "escalate_at" in new_alert:
+        escalation_scheduler.schedule("alerts", new_alert["_id"], new_alert["escalate_at"])
+
+    new_alert["id"] = str(new_alert["_id"])
+    return new_alert
+
+
+@router.get("/", response_model=Page[AlertResponse], summary="[Admin] List all active alerts")
+async def list_all_alerts(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    admin_user: dict = Depends(require_role("admin"))
+):
+    """
+    Protected endpoint for admins to view all alerts in the system, newest first.
+    Returns one page; pass `next_cursor` back as `cursor` for the next page.
+    Unchanged pages are answered with 304 via If-None-Match.
+    """
+    etag = check_etag(request, response, versions.etag("alerts", versions.get("alerts"), query_fingerprint(request)))
+    alerts, next_cursor = await fetch_page(
+        db.alerts, {"status": "active"}, cursor, limit, sort_field="created_at", descending=True,
+        projection=ALERT_PROJECTION
+    )
+    for alert in alerts:
+        alert["id"] = str(alert.pop("_id"))
+    return FastJSONResponse({"items": alerts, "next_cursor": next_cursor}, headers=etag_headers(etag))
 
-    return created_alert
 
+@router.get("/export", summary="[Admin] Export active alerts as NDJSON")
+async def export_alerts(admin_user: dict = Depends(require_role("admin"))):
+    """
+    Protected endpoint for admins. Streams every active alert as NDJSON, newest first.
+    """
+    alerts_cursor = db.alerts.find({"status": "active"}).sort([("created_at", -1), ("_id", -1)]).batch_size(EXPORT_CHUNK_SIZE)
+    return StreamingResponse(stream_ndjson(alerts_cursor), media_type="application/x-ndjson")
+
+
+@router.post("/{alert_id}/fulfill", response_model=AlertResponse, summary="[Hospital] Mark an alert as fulfilled")
+async def fulfill_alert(alert_id: str, current_user: dict = Depends(require_role("hospital"))):
+    """
+    Closes one of the hospital's active alerts once the units are covered.
+    Fulfilled alerts stop escalating and drop out of the active lists.
+    """
+    if not ObjectId.is_valid(alert_id):
+        raise HTTPException(status_code=400, detail="Invalid alert ID")
 
-@router.get("/", response_model=List[AlertResponse], summary="[Admin] List all active alerts")
-def list_all_alerts(admin_user: dict = Depends(require_role("admin"))):
+    alert = await db.alerts.find_one_and_update(
+        {"_id": ObjectId(alert_id), "hospital_id": current_user["id"], "status": "active"},
+        {"$set": {"status": "fulfilled", "fulfilled_at": datetime.now(timezone.utc)}, "$unset": {"escalate_at": ""}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not alert:
+        raise HTTPException(status_code=404, detail="Active alert not found")
+
+    escalation_scheduler.cancel("alerts", alert["_id"])
+    versions.bump("alerts")
+    activity_log.record(
+        "alert", f"{alert['blood_group']} blood alert fulfilled", "success", hospital_label(current_user)
+    )
+
+    alert["id"] = str(alert["_id"])
+    return alert
+
+
+@router.get("/{alert_id}/ranked-donors", response_model=List[RankedDonor], summary="[Hospital] Rank likely responders for an alert")
+async def get_ranked_donors(
+    alert_id: str,
+    k: int = Query(20, ge=1, le=500),
+    current_user: dict = Depends(require_role("hospital"))
+):
     """
-    Protected endpoint for admins to view all alerts in the system.
+    Returns the `k` compatible donors most likely to respond to the alert,
+    scored by the responder model in one batched call.
     """
-    alerts_cursor = db.alerts.find({"status": "active"}).sort("created_at", -1)
-    alerts = []
-    for alert in alerts_cursor:
-        alert["id"] = str(alert["_id"])
-        alerts.append(alert)
-    return alerts
\ No newline at end of file
+    if not ranker.loaded:
+        raise HTTPException(status_code=503, detail="Responder ranking model is not loaded")
+    if not ObjectId.is_valid(alert_id):
+        raise HTTPException(status_code=400, detail="Invalid alert ID")
+
+    alert = await db.alerts.find_one({"_id": ObjectId(alert_id)})
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    if current_user.get("role") != "admin" and alert["hospital_id"] != current_user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to view this alert")
+
+    return await rank_donors_for_alert(alert, k)
@@ -1,9 +1,10 @@
 # api/routes/auth.py
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from datetime import timedelta
 from db.conn import db
-from utils.security import verify_password, create_access_token
+from utils.security import verify_password_async, create_access_token
 from bson import ObjectId
 
 router = APIRouter()
@@ -12,16 +13,20 @@ class LoginRequest(BaseModel):
     email: str
     password: str
 
-# 🎯 1. Change the function to be asynchronous
+# Only the fields login needs
+LOGIN_PROJECTION = {"email": 1, "password": 1, "full_name": 1, "name": 1}
+
 @router.post("/login")
 async def login(req: LoginRequest):
-    # Try each role's collection
-    for role, collection in [("donor", db.donors), ("hospital", db.hospitals), ("admin", db.admins)]:
-        # 🎯 2. Add 'await' to the database call
-        user = await collection.find_one({"email": req.email})
-        
-        # This line will now work correctly
-        if user and verify_password(req.password, user["password"]):
+    # Look the email up in every role's collection concurrently
+    role_collections = [("donor", db.donors), ("hospital", db.hospitals), ("admin", db.admins)]
+    users = await asyncio.gather(*(
+        collection.find_one({"email": req.email}, LOGIN_PROJECTION) for _, collection in role_collections
+    ))
+
+    for (role, _), user in zip(role_collections, users):
+        # bcrypt runs on its own executor so it doesn't stall other requests
+        if user and await verify_password_async(req.password, user["password"]):
             token_data = {
                 "user_id": str(user["_id"]),
                 "role": role
@@ -1,10 +1,16 @@
 # api/routes/donors.py
-from fastapi import APIRouter, HTTPException, Depends, status
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, AfterValidator
+from pymongo import ReturnDocument
 from db.conn import db
 from bson import ObjectId
-from typing import List
-from utils.security import require_role, get_current_user
+from typing import Optional, Annotated
+from utils.security import require_role, get_current_user, invalidate_cached_user
+from services.donor_store import record_donor_updated, record_donor_removed
+from utils.blood import validate_blood_group, compat_mask
+from utils.geo import to_geojson_point
+from utils.pagination import Page, fetch_page, stream_ndjson, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, EXPORT_CHUNK_SIZE
 
 router = APIRouter()
 
@@ -22,22 +28,33 @@ class DonorUpdate(BaseModel):
     name: str | None = None
     phone: str | None = None
     location: dict | None = None
+    blood_group: Annotated[str, AfterValidator(validate_blood_group)] | None = None
     # Add other fields a donor can update
 
 # --- Endpoints ---
 
 # This endpoint is now for ADMINS ONLY to get a list of all donors.
-@router.get("/", response_model=List[DonorProfile], dependencies=[Depends(require_role("admin"))])
-def list_all_donors():
+@router.get("/", response_model=Page[DonorProfile], dependencies=[Depends(require_role("admin"))])
+async def list_all_donors(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
     """
     Protected endpoint. Only users with the 'admin' role can access this.
+    Returns one page of donors; pass `next_cursor` back as `cursor` for the next page.
     """
-    donors_cursor = db.donors.find()
-    donors = []
-    for donor in donors_cursor:
+    donors, next_cursor = await fetch_page(db.donors, {}, cursor, limit, projection={"password": 0})
+    for donor in donors:
         donor['id'] = str(donor['_id'])
-        donors.append(donor)
-    return donors
+    return {"items": donors, "next_cursor": next_cursor}
+
+@router.get("/export", dependencies=[Depends(require_role("admin"))])
+async def export_donors():
+    """
+    Protected endpoint. Streams every donor as NDJSON without buffering the collection.
+    """
+    donors_cursor = db.donors.find({}, {"password": 0}).sort("_id", 1).batch_size(EXPORT_CHUNK_SIZE)
+    return StreamingResponse(stream_ndjson(donors_cursor), media_type="application/x-ndjson")
 
 # NEW: Endpoint for a logged-in donor to get their own profile data
 @router.get("/me", response_model=DonorProfile)
@@ -51,39 +68,54 @@ def get_donor_me(current_user: dict = Depends(require_role("donor"))):
 
 # Endpoint for a logged-in donor to update their own profile
 @router.put("/me", response_model=DonorProfile)
-def update_donor_me(updates: DonorUpdate, current_user: dict = Depends(require_role("donor"))):
+async def update_donor_me(updates: DonorUpdate, current_user: dict = Depends(require_role("donor"))):
     """
     Protected endpoint for donors to update their own info.
+    Locations are stored as GeoJSON points so they can be used for geo queries.
     """
     update_data = updates.dict(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=400, detail="No update data provided")
+    if update_data.get("blood_group"):
+        update_data["compat_mask"] = compat_mask(update_data["blood_group"])
 
-    result = db.donors.update_one(
+    # Fan-out, the donor store and the 2dsphere index all expect GeoJSON points
+    if "location" in update_data:
+        update_data["location"] = to_geojson_point(update_data["location"])
+        if update_data["location"] is None:
+            raise HTTPException(status_code=400, detail="Location must include latitude and longitude")
+
+    # Update and read back in a single round trip
+    updated_donor = await db.donors.find_one_and_update(
         {"_id": ObjectId(current_user["id"])},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"password": 0},
+        return_document=ReturnDocument.AFTER
     )
 
-    if result.matched_count == 0:
+    if updated_donor is None:
         raise HTTPException(status_code=404, detail="Donor not found")
 
-    # Retrieve the updated document to return it
-    updated_donor = db.donors.find_one({"_id": ObjectId(current_user["id"])})
+    invalidate_cached_user("donor", current_user["id"])
+    record_donor_updated(updated_donor)
     updated_donor['id'] = str(updated_donor['_id'])
     return updated_donor
 
 # Admin endpoint to delete a donor
 @router.delete("/{donor_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_role("admin"))])
-def delete_donor(donor_id: str):
+async def delete_donor(donor_id: str):
     """
     Protected endpoint. Only admins can delete donors.
     """
     if not ObjectId.is_valid(donor_id):
         raise HTTPException(status_code=400, detail="Invalid donor ID")
 
-    result = db.donors.delete_one({"_id": ObjectId(donor_id)})
+    result = await db.donors.delete_one({"_id": ObjectId(donor_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Donor not found")
 
+    invalidate_cached_user("donor", donor_id)
+    record_donor_removed(donor_id)
+
     return {"message": "Donor deleted successfully"}
 
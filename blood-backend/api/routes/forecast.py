@@ -0,0 +1,40 @@
+# api/routes/forecast.py
+from fastapi import APIRouter, HTTPException, Depends, Query
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+from utils.security import require_role
+from utils.blood import normalize_blood_group
+from services.forecasting import forecaster, FORECAST_MAX_HORIZON
+
+router = APIRouter()
+
+# --- Pydantic Models ---
+class ForecastPoint(BaseModel):
+    week: datetime
+    net: float
+    shortage: bool
+
+class ShortageForecast(BaseModel):
+    region: str
+    blood_type: str
+    method: str  # 'sarima' | 'moving_average'
+    generated_at: datetime
+    forecast: List[ForecastPoint]
+
+# --- Endpoints ---
+@router.get("/shortage", response_model=List[ShortageForecast])
+async def get_shortage_forecast(
+    region: Optional[str] = None,
+    blood_type: Optional[str] = None,
+    horizon: int = Query(4, ge=1, le=FORECAST_MAX_HORIZON),
+    current_user: dict = Depends(require_role("hospital"))
+):
+    """
+    Weekly net supply forecasts (donations minus requests) per region and blood type.
+    Served from the precomputed cache; a negative net marks a forecast shortage.
+    """
+    if forecaster.refreshed_at is None:
+        raise HTTPException(status_code=503, detail="Forecasts are still being computed")
+
+    return forecaster.query(region, normalize_blood_group(blood_type) if blood_type else None, horizon)
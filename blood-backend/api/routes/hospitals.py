@@ -1,15 +1,35 @@
+import os
 import asyncio
-from fastapi import APIRouter, HTTPException, Depends, status
-from pydantic import BaseModel, Field, BeforeValidator
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, AliasChoices, BeforeValidator, AfterValidator
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Any, Annotated
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
-from utils.security import require_role
+from pymongo import ReturnDocument
+from utils.security import require_role, invalidate_cached_user
+from utils.geo import to_geojson_point
+from utils.cache import TTLCache
+from utils.serialization import FastJSONResponse, projection_for
+from utils.versioning import versions, check_etag, etag_headers, query_fingerprint
 from db.conn import get_database
+from services.events import publish_local, sse_stream
+from services.rollups import record_request, record_donation
+from services.activity import activity_log, hospital_label
+from services.escalation import escalation_scheduler, escalation_fields
+from services.inventory import receive_lot, allocate_fefo, expiring_lots, inventory_summary, search_nearby_stock
+from utils.blood import validate_blood_group
 
 router = APIRouter()
 
+DASHBOARD_SNAPSHOT_TTL_SECONDS = float(os.getenv("DASHBOARD_SNAPSHOT_TTL_SECONDS", "5"))
+# Only recent requests count towards the average response time
+RESPONSE_TIME_WINDOW_DAYS = int(os.getenv("RESPONSE_TIME_WINDOW_DAYS", "30"))
+
+# Short-lived per-hospital dashboard snapshots, invalidated on the hospital's own writes
+snapshot_cache = TTLCache(maxsize=5000, ttl_seconds=DASHBOARD_SNAPSHOT_TTL_SECONDS)
+
 # --- Custom Pydantic Type for ObjectId ---
 # This is a key part of the fix. It tells Pydantic to convert ObjectId objects to strings.
 ObjectIdStr = Annotated[str, BeforeValidator(str)]
@@ -17,18 +37,21 @@ ObjectIdStr = Annotated[str, BeforeValidator(str)]
 # --- New Pydantic Models for Dashboard Data ---
 class HospitalProfile(BaseModel):
     id: ObjectIdStr = Field(alias="_id") # Use ObjectIdStr and alias for Pydantic
-    name: str
+    # Registration stores `hospitalName`; older documents only have `name`
+    name: str = Field(validation_alias=AliasChoices("hospitalName", "name"))
     email: str
     role: str
     address: Optional[str] = None
     phone: Optional[str] = None
     location: Optional[dict] = None
+    region: Optional[str] = None
 
 class HospitalUpdate(BaseModel):
-    name: Optional[str] = None
+    name: Optional[str] = None  # stored as `hospitalName`
     address: Optional[str] = None
     phone: Optional[str] = None
     location: Optional[dict] = None
+    region: Optional[str] = None  # used to group forecasting series
 
 class BloodRequest(BaseModel):
     # Use ObjectIdStr for all ObjectId fields
@@ -41,6 +64,8 @@ class BloodRequest(BaseModel):
     requestedAt: datetime
     donorResponses: int
     hospitalResponses: int
+    # Hospitals holding enough stock within the current escalation ring
+    backupHospitals: list[dict] = []
     
     # Allows Pydantic to handle `_id` and `id` conversion
     model_config = {
@@ -48,7 +73,7 @@ class BloodRequest(BaseModel):
     }
 
 class NewBloodRequest(BaseModel):
-    bloodType: str
+    bloodType: Annotated[str, AfterValidator(validate_blood_group)]
     unitsRequested: int
     urgency: str
 
@@ -61,6 +86,44 @@ class BloodInventory(BaseModel):
     minimumRequired: int
     status: str  # 'Critical' | 'Low' | 'Normal' | 'Adequate'
 
+class NewBloodLot(BaseModel):
+    bloodType: Annotated[str, AfterValidator(validate_blood_group)]
+    units: int = Field(..., ge=1)
+    collectedAt: datetime
+    expiresAt: Optional[datetime] = None  # defaults to the standard shelf life
+
+class BloodLot(BaseModel):
+    id: ObjectIdStr = Field(alias="_id")
+    hospital_id: ObjectIdStr
+    bloodType: str
+    units: int
+    unitsAvailable: int
+    collectedAt: datetime
+    expiresAt: datetime
+    status: str  # 'available' | 'allocated' | 'expired'
+
+class AllocationRequest(BaseModel):
+    bloodType: Annotated[str, AfterValidator(validate_blood_group)]
+    units: int = Field(..., ge=1)
+    request_id: Optional[str] = None
+
+class LotAllocation(BaseModel):
+    lotId: ObjectIdStr
+    units: int
+    expiresAt: datetime
+
+class AllocationResult(BaseModel):
+    allocations: List[LotAllocation]
+    shortfall: int
+
+class NearbyStock(BaseModel):
+    hospital_id: ObjectIdStr
+    name: Optional[str] = None
+    address: Optional[str] = None
+    phone: Optional[str] = None
+    distance_km: float
+    unitsAvailable: int
+
 class DonorResponse(BaseModel):
     id: ObjectIdStr = Field(alias="_id")
     request_id: ObjectIdStr
@@ -72,54 +135,222 @@ class DonorResponse(BaseModel):
     phone: str
     status: str  # 'Available' | 'Contacted' | 'Confirmed' | 'Completed'
 
+# List endpoints serialize raw documents, so they read exactly the model fields
+BLOOD_REQUEST_PROJECTION = projection_for(BloodRequest)
+BLOOD_INVENTORY_PROJECTION = projection_for(BloodInventory)
+DONOR_RESPONSE_PROJECTION = projection_for(DonorResponse)
+
 class HospitalStats(BaseModel):
     totalRequests: int
     activeRequests: int
     completedToday: int
     averageResponseTime: str
 
+class DashboardSnapshot(BaseModel):
+    stats: HospitalStats
+    requests: List[BloodRequest]
+    inventory: List[BloodInventory]
+    donorResponses: List[DonorResponse]
+
+# --- Dashboard Aggregation ---
+def dashboard_pipeline(hospital_id: ObjectId, include_active: bool) -> list:
+    """
+    One aggregation over the hospital's blood_requests that yields the stats
+    counters, the average donor response time and (optionally) the active
+    requests with their donor responses joined in.
+    """
+    now = datetime.now(timezone.utc)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    facets = {
+        "stats": [
+            {"$group": {
+                "_id": None,
+                "totalRequests": {"$sum": 1},
+                "activeRequests": {"$sum": {"$cond": [{"$eq": ["$status", "Active"]}, 1, 0]}},
+                "completedToday": {"$sum": {"$cond": [
+                    {"$and": [{"$eq": ["$status", "Completed"]}, {"$gte": ["$completedAt", today]}]}, 1, 0
+                ]}},
+            }}
+        ],
+        "responseTime": [
+            {"$match": {"requestedAt": {"$gte": now - timedelta(days=RESPONSE_TIME_WINDOW_DAYS)}}},
+            {"$lookup": {
+                "from": "donor_responses",
+                "let": {"request_id": "$_id", "requested_at": "$requestedAt"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$request_id", "$$request_id"]}}},
+                    # Responses without an explicit timestamp fall back to their ObjectId creation time
+                    {"$project": {"_id": 0, "minutes": {"$divide": [
+                        {"$subtract": [{"$ifNull": ["$respondedAt", {"$toDate": "$_id"}]}, "$$requested_at"]},
+                        60000
+                    ]}}},
+                ],
+                "as": "responses",
+            }},
+            {"$unwind": "$responses"},
+            {"$group": {"_id": None, "averageMinutes": {"$avg": "$responses.minutes"}}},
+        ],
+    }
+    if include_active:
+        facets["active"] = [
+            {"$match": {"status": "Active"}},
+            {"$lookup": {
+                "from": "donor_responses",
+                "localField": "_id",
+                "foreignField": "request_id",
+                "as": "responses",
+            }},
+        ]
+
+    return [{"$match": {"hospital_id": hospital_id}}, {"$facet": facets}]
+
+def _format_response_time(minutes: Optional[float]) -> str:
+    if minutes is None:
+        return "N/A"
+    return f"{round(max(minutes, 0.0), 1)} min"
+
+def _stats_from_facets(facets: dict) -> HospitalStats:
+    counters = facets["stats"][0] if facets["stats"] else {}
+    response_time = facets["responseTime"][0]["averageMinutes"] if facets["responseTime"] else None
+    return HospitalStats(
+        totalRequests=counters.get("totalRequests", 0),
+        activeRequests=counters.get("activeRequests", 0),
+        completedToday=counters.get("completedToday", 0),
+        averageResponseTime=_format_response_time(response_time)
+    )
+
+async def _aggregate_dashboard(db: Any, hospital_id: ObjectId, include_active: bool) -> dict:
+    results = await db.blood_requests.aggregate(dashboard_pipeline(hospital_id, include_active)).to_list(length=1)
+    return results[0]
+
+# --- Conditional GETs ---
+async def dashboard_etag(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(require_role("hospital"))
+) -> str:
+    """
+    Strong ETag over the caller's dashboard data. A matching If-None-Match is
+    answered with 304 here, before the route touches the database.
+    """
+    hospital_id = current_user['id']
+    return check_etag(request, response, versions.etag(
+        "hospital", hospital_id, versions.get("hospital", hospital_id), query_fingerprint(request)
+    ))
+
+def _dashboard_changed(hospital_id: Any):
+    """Drops the cached snapshot and moves the hospital's dashboard ETags on."""
+    snapshot_cache.invalidate(str(hospital_id))
+    versions.bump("hospital", hospital_id)
+
+# --- Profile Endpoints ---
+@router.put("/me", response_model=HospitalProfile)
+async def update_hospital_me(
+    updates: HospitalUpdate,
+    current_user: dict = Depends(require_role("hospital")),
+    db: AsyncIOMotorClient = Depends(get_database)
+):
+    """
+    Updates the logged-in hospital's profile.
+    Locations are stored as GeoJSON points so they can be used for geo queries.
+    """
+    update_data = updates.model_dump(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No update data provided")
+
+    if "name" in update_data:
+        update_data["hospitalName"] = update_data.pop("name")
+
+    if "location" in update_data:
+        update_data["location"] = to_geojson_point(update_data["location"])
+        if update_data["location"] is None:
+            raise HTTPException(status_code=400, detail="Location must include latitude and longitude")
+
+    updated_hospital = await db.hospitals.find_one_and_update(
+        {"_id": ObjectId(current_user['id'])},
+        {"$set": update_data},
+        projection={"password": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated_hospital:
+        raise HTTPException(status_code=404, detail="Hospital not found")
+
+    invalidate_cached_user("hospital", current_user['id'])
+    return updated_hospital
+
 # --- Dashboard Endpoints ---
 @router.get("/me/dashboard/stats", response_model=HospitalStats)
 async def get_dashboard_stats(
     current_user: dict = Depends(require_role("hospital")),
+    etag: str = Depends(dashboard_etag),
     db: AsyncIOMotorClient = Depends(get_database)
 ):
     """
     Fetches key statistics for the hospital dashboard.
+    Read from the primary, so a hospital always sees its own writes.
     """
     hospital_id = ObjectId(current_user['id'])
+    facets = await _aggregate_dashboard(db, hospital_id, include_active=False)
+    return _stats_from_facets(facets)
 
-    # Await all database calls to get the actual results
-    total_requests_future = db.blood_requests.count_documents({"hospital_id": hospital_id})
-    active_requests_future = db.blood_requests.count_documents({"hospital_id": hospital_id, "status": "Active"})
+@router.get("/me/dashboard/snapshot", response_model=DashboardSnapshot)
+async def get_dashboard_snapshot(
+    current_user: dict = Depends(require_role("hospital")),
+    etag: str = Depends(dashboard_etag),
+    db: AsyncIOMotorClient = Depends(get_database)
+):
+    """
+    Fetches everything the hospital dashboard shows in one call:
+    stats, active requests, inventory and donor responses.
+    Read from the primary, so a hospital always sees its own writes.
+    """
+    cached = snapshot_cache.get(current_user['id'])
+    if cached is not None:
+        return cached
 
-    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    completed_today_future = db.blood_requests.count_documents({
-        "hospital_id": hospital_id,
-        "status": "Completed",
-        "completedAt": {"$gte": today}
-    })
+    # A write landing while we read must not leave its pre-write snapshot in the cache
+    version = versions.get("hospital", current_user['id'])
+    hospital_id = ObjectId(current_user['id'])
 
-    # Run database calls concurrently for efficiency
-    total_requests, active_requests, completed_today = await asyncio.gather(
-        total_requests_future,
-        active_requests_future,
-        completed_today_future
+    # The request aggregation and the inventory read are independent, so run them together
+    facets, inventory = await asyncio.gather(
+        _aggregate_dashboard(db, hospital_id, include_active=True),
+        inventory_summary(hospital_id, db)
     )
 
-    # Placeholder for average response time calculation
-    average_response_time = "12 min"  # Hardcoded for now
+    active_requests = facets["active"]
+    donor_responses = [response for request in active_requests for response in request.pop("responses")]
 
-    return HospitalStats(
-        totalRequests=total_requests,
-        activeRequests=active_requests,
-        completedToday=completed_today,
-        averageResponseTime=average_response_time
+    snapshot = DashboardSnapshot(
+        stats=_stats_from_facets(facets),
+        requests=active_requests,
+        inventory=inventory,
+        donorResponses=donor_responses
+    )
+    if versions.get("hospital", current_user['id']) == version:
+        snapshot_cache.set(current_user['id'], snapshot)
+    return snapshot
+
+@router.get("/me/dashboard/events")
+async def stream_dashboard_events(
+    request: Request,
+    current_user: dict = Depends(require_role("hospital"))
+):
+    """
+    Server-Sent Events stream of new or changed blood requests and donor
+    responses for the logged-in hospital. Replaces polling the dashboard lists.
+    """
+    return StreamingResponse(
+        sse_stream(current_user['id'], request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @router.get("/me/dashboard/requests", response_model=List[BloodRequest])
 async def get_active_blood_requests(
     current_user: dict = Depends(require_role("hospital")),
+    etag: str = Depends(dashboard_etag),
     db: AsyncIOMotorClient = Depends(get_database)
 ):
     """
@@ -127,13 +358,13 @@ async def get_active_blood_requests(
     """
     hospital_id = ObjectId(current_user['id'])
     # Await the database cursor and iterate asynchronously
-    requests_cursor = db.blood_requests.find({"hospital_id": hospital_id, "status": "Active"})
-
-    # The conversion from ObjectId to str is handled by the `BloodRequest` Pydantic model
-    # due to the `ObjectIdStr` type hint.
+    requests_cursor = db.blood_requests.find(
+        {"hospital_id": hospital_id, "status": "Active"}, BLOOD_REQUEST_PROJECTION
+    )
     requests = await requests_cursor.to_list(length=None)
 
-    return requests
+    # Serialized straight from BSON; the projection matches `BloodRequest`
+    return FastJSONResponse(requests, headers=etag_headers(etag))
 
 @router.post("/me/dashboard/requests", response_model=BloodRequest, status_code=status.HTTP_201_CREATED)
 async def create_new_blood_request(
@@ -155,6 +386,7 @@ async def create_new_blood_request(
         "donorResponses": 0,
         "hospitalResponses": 0
     })
+    new_request_doc.update(escalation_fields(new_request_doc["requestedAt"]))
 
     # Await the asynchronous insert operation
     result = await db.blood_requests.insert_one(new_request_doc)
@@ -164,28 +396,137 @@ async def create_new_blood_request(
 
     if not created_request_doc:
         raise HTTPException(status_code=500, detail="Failed to retrieve created request.")
+
+    if "escalate_at" in created_request_doc:
+        escalation_scheduler.schedule("blood_requests", created_request_doc["_id"], created_request_doc["escalate_at"])
+    _dashboard_changed(current_user['id'])
+    publish_local(hospital_id, "blood_request", "insert", created_request_doc)
+    await record_request(current_user, created_request_doc)
     
     # Pydantic model with `ObjectIdStr` will handle the conversion of `_id` and `hospital_id`
     return created_request_doc
 
+@router.post("/me/dashboard/requests/{request_id}/complete", response_model=BloodRequest)
+async def complete_blood_request(
+    request_id: str,
+    current_user: dict = Depends(require_role("hospital")),
+    db: AsyncIOMotorClient = Depends(get_database)
+):
+    """
+    Marks one of the hospital's active requests as completed (units received).
+    """
+    try:
+        request_obj_id = ObjectId(request_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid request ID format")
+
+    completed_request = await db.blood_requests.find_one_and_update(
+        {"_id": request_obj_id, "hospital_id": ObjectId(current_user['id']), "status": "Active"},
+        {"$set": {"status": "Completed", "completedAt": datetime.now(timezone.utc)}, "$unset": {"escalate_at": ""}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not completed_request:
+        raise HTTPException(status_code=404, detail="Active request not found")
+
+    escalation_scheduler.cancel("blood_requests", request_obj_id)
+    _dashboard_changed(current_user['id'])
+    publish_local(current_user['id'], "blood_request", "update", completed_request)
+    await record_donation(current_user, completed_request)
+    activity_log.record(
+        "donation",
+        f"{completed_request.get('unitsRequested', 0)} units of {completed_request.get('bloodType', 'blood')} received",
+        "success", hospital_label(current_user)
+    )
+
+    return completed_request
+
 @router.get("/me/dashboard/inventory", response_model=List[BloodInventory])
 async def get_blood_inventory(
     current_user: dict = Depends(require_role("hospital")),
+    etag: str = Depends(dashboard_etag),
     db: AsyncIOMotorClient = Depends(get_database)
 ):
     """
     Fetches the current blood inventory for the logged-in hospital.
+    Stock is kept in step with the lot ledger; expiring counts come from the lots.
     """
     hospital_id = ObjectId(current_user['id'])
+    inventory = await inventory_summary(hospital_id, db)
 
-    inventory_cursor = db.blood_inventory.find({"hospital_id": hospital_id})
-    inventory = await inventory_cursor.to_list(length=None)
+    return FastJSONResponse(
+        [{field: item.get(field) for field in BLOOD_INVENTORY_PROJECTION} for item in inventory], headers=etag_headers(etag)
+    )
+
+@router.post("/me/dashboard/inventory/lots", response_model=BloodLot, status_code=status.HTTP_201_CREATED)
+async def receive_blood_lot(
+    lot_data: NewBloodLot,
+    current_user: dict = Depends(require_role("hospital"))
+):
+    """
+    Records a received lot of blood units in the hospital's ledger.
+    """
+    lot = await receive_lot(
+        ObjectId(current_user['id']), lot_data.bloodType, lot_data.units, lot_data.collectedAt, lot_data.expiresAt
+    )
+    _dashboard_changed(current_user['id'])
+    return lot
+
+@router.post("/me/dashboard/inventory/allocate", response_model=AllocationResult)
+async def allocate_blood_units(
+    allocation: AllocationRequest,
+    current_user: dict = Depends(require_role("hospital"))
+):
+    """
+    Allocates units first-expiring-first-out. Allocates what is in stock and
+    reports the rest as `shortfall`.
+    """
+    request_id = None
+    if allocation.request_id is not None:
+        if not ObjectId.is_valid(allocation.request_id):
+            raise HTTPException(status_code=400, detail="Invalid request ID format")
+        request_id = ObjectId(allocation.request_id)
+
+    allocations, shortfall = await allocate_fefo(
+        ObjectId(current_user['id']), allocation.bloodType, allocation.units, request_id
+    )
+    _dashboard_changed(current_user['id'])
+    return {"allocations": allocations, "shortfall": shortfall}
+
+@router.get("/inventory/search", response_model=List[NearbyStock])
+async def search_hospital_inventory(
+    bloodType: Annotated[str, AfterValidator(validate_blood_group)],
+    minUnits: int = Query(1, ge=1),
+    radiusKm: float = Query(50, gt=0, le=500),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(require_role("hospital"))
+):
+    """
+    Finds other hospitals within `radiusKm` holding at least `minUnits` of
+    `bloodType`, nearest first.
+    """
+    point = to_geojson_point(current_user.get("location"))
+    if point is None:
+        raise HTTPException(status_code=400, detail="Hospital profile must have a location to search nearby stock.")
 
-    return inventory
+    return await search_nearby_stock(
+        point, bloodType, minUnits, radiusKm, limit, exclude_id=ObjectId(current_user['id'])
+    )
+
+@router.get("/me/dashboard/inventory/expiring", response_model=List[BloodLot])
+async def get_expiring_lots(
+    days: int = Query(7, ge=1, le=365),
+    current_user: dict = Depends(require_role("hospital"))
+):
+    """
+    Lists available lots expiring within `days`, soonest first.
+    No ETag: lots enter the window as time passes, without any write to version.
+    """
+    return await expiring_lots(ObjectId(current_user['id']), days)
 
 @router.get("/me/dashboard/donor-responses", response_model=List[DonorResponse])
 async def get_all_donor_responses(
     current_user: dict = Depends(require_role("hospital")),
+    etag: str = Depends(dashboard_etag),
     db: AsyncIOMotorClient = Depends(get_database)
 ):
     """
@@ -202,10 +543,12 @@ async def get_all_donor_responses(
     active_request_ids = [req['_id'] for req in active_requests]
 
     # Await the find call and convert the cursor to a list
-    responses_cursor = db.donor_responses.find({"request_id": {"$in": active_request_ids}})
+    responses_cursor = db.donor_responses.find(
+        {"request_id": {"$in": active_request_ids}}, DONOR_RESPONSE_PROJECTION
+    )
     responses = await responses_cursor.to_list(length=None)
 
-    return responses
+    return FastJSONResponse(responses, headers=etag_headers(etag))
 
 @router.post("/me/dashboard/donor-responses/{response_id}/contact", status_code=status.HTTP_204_NO_CONTENT)
 async def contact_donor(
@@ -244,4 +587,11 @@ async def contact_donor(
         # This could happen if the status was already 'Contacted'
         raise HTTPException(status_code=409, detail="Donor response status not modified")
 
+    _dashboard_changed(current_user['id'])
+    response["status"] = "Contacted"
+    publish_local(current_user['id'], "donor_response", "update", response)
+    activity_log.record(
+        "match", f"Donor contacted for {request.get('bloodType', 'blood')} request", "success", hospital_label(current_user)
+    )
+
     return {"message": "Donor status updated successfully"}
\ No newline at end of file
@@ -1,10 +1,15 @@
 # api/routes/register.py
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, EmailStr, Field
+from fastapi import APIRouter, HTTPException, Depends, Request
+from pydantic import BaseModel, EmailStr, Field, AfterValidator
+from typing import Annotated
 from datetime import datetime, timezone
-from db.conn import db
+from db.conn import db, missing_unique_indexes
 # 🎯 1. Import the password hashing function
-from utils.security import hash_password
+from utils.security import hash_password_async, require_role
+from services.bulk_import import bulk_import, hash_if_needed, BulkImportAborted
+from services.donor_store import record_donors_inserted
+from utils.blood import validate_blood_group, compat_mask
+from services.activity import activity_log, hospital_label
 
 router = APIRouter()
 
@@ -14,7 +19,7 @@ class Donor(BaseModel):
     email: EmailStr
     password: str = Field(..., min_length=6) # Added password field
     phone: str = Field(..., example="+91-9876543210")
-    blood_group: str = Field(..., example="O+")
+    blood_group: Annotated[str, AfterValidator(validate_blood_group)] = Field(..., example="O+")
     age: int = Field(..., ge=18, le=65)
     city: str
     last_donation_date: str | None = Field(None, example="2025-05-01")
@@ -39,11 +44,14 @@ async def register_donor(donor: Donor):
     donor_data = donor.model_dump()
     
     # Hash the password before saving it
-    donor_data["password"] = hash_password(donor.password)
+    donor_data["password"] = await hash_password_async(donor.password)
+    donor_data["compat_mask"] = compat_mask(donor.blood_group)
     
     donor_data["created_at"] = datetime.now(timezone.utc)
     
     result = await db.donors.insert_one(donor_data)
+    record_donors_inserted([donor_data])
+    activity_log.record("registration", f"New {donor.blood_group} donor registered", "success", donor.city)
 
     created_donor = await db.donors.find_one({"_id": result.inserted_id})
 
@@ -68,7 +76,7 @@ async def register_hospital(hospital: Hospital):
     hospital_data = hospital.model_dump()
 
     # Hash the password before saving it
-    hospital_data["password"] = hash_password(hospital.password)
+    hospital_data["password"] = await hash_password_async(hospital.password)
 
     # Set the user role
     hospital_data["role"] = "hospital"
@@ -76,6 +84,7 @@ async def register_hospital(hospital: Hospital):
     hospital_data["created_at"] = datetime.now(timezone.utc)
 
     result = await db.hospitals.insert_one(hospital_data)
+    activity_log.record("registration", "New hospital registered in network", "pending", hospital_label(hospital_data))
 
     created_hospital = await db.hospitals.find_one({"_id": result.inserted_id})
 
@@ -85,4 +94,64 @@ async def register_hospital(hospital: Hospital):
             "hospital_id": str(created_hospital["_id"])
         }
     else:
-        raise HTTPException(status_code=500, detail="Failed to register hospital")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to register hospital")
+
+# --- Bulk Import Endpoints ---
+BULK_IMPORT_DESCRIPTION = (
+    "Streams a CSV (with header row) or NDJSON body. Send `Content-Type: text/csv` "
+    "or `application/x-ndjson`. Password columns may hold plain passwords or existing bcrypt hashes. "
+    "The body must be UTF-8; an unreadable line or header row stops the import with a 400."
+)
+
+async def _prepare_donor(donor: Donor) -> dict:
+    donor_data = donor.model_dump()
+    donor_data["password"] = await hash_if_needed(donor.password)
+    donor_data["compat_mask"] = compat_mask(donor.blood_group)
+    donor_data["created_at"] = datetime.now(timezone.utc)
+    return donor_data
+
+async def _prepare_hospital(hospital: Hospital) -> dict:
+    hospital_data = hospital.model_dump()
+    hospital_data["password"] = await hash_if_needed(hospital.password)
+    hospital_data["role"] = "hospital"
+    hospital_data["created_at"] = datetime.now(timezone.utc)
+    return hospital_data
+
+async def _require_unique_indexes(collection):
+    """Bulk imports detect duplicates only through the unique indexes, so refuse to run without them."""
+    missing = await missing_unique_indexes(collection)
+    if missing:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Unique indexes missing on {collection.name}: {', '.join(missing)}. "
+                   "Resolve duplicate values and restart to build them before importing."
+        )
+
+def _record_bulk_import(kind: str, inserted: int):
+    if inserted:
+        activity_log.record("registration", f"Bulk import registered {inserted} {kind}", "success", "Admin import")
+
+async def _run_bulk_import(kind: str, request: Request, *args, **kwargs) -> dict:
+    """Runs one import; an unreadable body is a 400 that says how many rows got in before it."""
+    try:
+        report = await bulk_import(request.stream(), request.headers.get("content-type", ""), *args, **kwargs)
+    except BulkImportAborted as e:
+        inserted = e.report.inserted if e.report else 0
+        _record_bulk_import(kind, inserted)
+        raise HTTPException(status_code=400, detail=f"{e}. {inserted} rows were imported before it.")
+    _record_bulk_import(kind, report.inserted)
+    return report.to_dict()
+
+@router.post("/donors/bulk", dependencies=[Depends(require_role("admin"))], description=BULK_IMPORT_DESCRIPTION)
+async def bulk_register_donors(request: Request):
+    """[Admin] Registers many donors from a streamed file and returns a per-row error report."""
+    await _require_unique_indexes(db.donors)
+    return await _run_bulk_import(
+        "donors", request, Donor, db.donors, _prepare_donor, on_inserted=record_donors_inserted
+    )
+
+@router.post("/hospitals/bulk", dependencies=[Depends(require_role("admin"))], description=BULK_IMPORT_DESCRIPTION)
+async def bulk_register_hospitals(request: Request):
+    """[Admin] Registers many hospitals from a streamed file and returns a per-row error report."""
+    await _require_unique_indexes(db.hospitals)
+    return await _run_bulk_import("hospitals", request, Hospital, db.hospitals, _prepare_hospital)
@@ -0,0 +1,266 @@
+# blood-backend/benchmarks/load.py
+"""
+End-to-end load test against a running API seeded by `benchmarks.seed`.
+
+Each of `--concurrency` virtual users logs in as a seeded hospital, then
+issues requests drawn from a weighted route mix (login, the hospital
+dashboard, alerts, registration) for `--duration` seconds after a warm-up.
+Throughput and p50/p95/p99 are reported per route and written as JSON so
+runs can be compared between releases:
+
+    python -m benchmarks.load --hospitals 100 --donors 10000 --concurrency 50 --duration 60
+    python -m benchmarks.load ... --compare benchmarks/results/previous.json
+
+Override the mix with e.g. `--mix login=30,create-alert=0`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+import httpx
+from benchmarks.login_latency import summarize
+from benchmarks.simulate import BENCHMARK_PASSWORD, ADMIN_EMAIL, BLOOD_GROUPS, URGENCIES, CITY, donor_email, hospital_email
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+@dataclass
+class VirtualUser:
+    hospital_index: int
+    headers: dict
+
+@dataclass
+class Action:
+    """One entry of the route mix; `call` issues a single request."""
+    name: str
+    route: str
+    weight: int
+    call: Callable[[httpx.AsyncClient, VirtualUser, "LoadContext"], Awaitable[httpx.Response]]
+
+@dataclass
+class RouteStats:
+    samples: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+@dataclass
+class LoadContext:
+    args: argparse.Namespace
+    rng: random.Random
+    admin_headers: dict = field(default_factory=dict)
+
+# --- Route Mix ---
+async def _login(client: httpx.AsyncClient, user: VirtualUser, ctx: LoadContext) -> httpx.Response:
+    # Half hospital, half donor logins; donors exercise the other collections' lookups
+    if ctx.args.donors and ctx.rng.random() < 0.5:
+        email = donor_email(ctx.rng.randrange(ctx.args.donors))
+    else:
+        email = hospital_email(ctx.rng.randrange(ctx.args.hospitals))
+    return await client.post("/auth/login", json={"email": email, "password": BENCHMARK_PASSWORD})
+
+def _get(path: str, params: Optional[Callable[[LoadContext], dict]] = None):
+    async def call(client: httpx.AsyncClient, user: VirtualUser, ctx: LoadContext) -> httpx.Response:
+        return await client.get(path, headers=user.headers, params=params(ctx) if params else None)
+    return call
+
+async def _create_request(client: httpx.AsyncClient, user: VirtualUser, ctx: LoadContext) -> httpx.Response:
+    body = {"bloodType": ctx.rng.choice(BLOOD_GROUPS), "unitsRequested": ctx.rng.randint(1, 6), "urgency": ctx.rng.choice(URGENCIES)}
+    return await client.post("/hospitals/me/dashboard/requests", json=body, headers=user.headers)
+
+async def _create_alert(client: httpx.AsyncClient, user: VirtualUser, ctx: LoadContext) -> httpx.Response:
+    body = {"blood_group": ctx.rng.choice(BLOOD_GROUPS), "units_required": ctx.rng.randint(1, 6)}
+    return await client.post("/alerts/", json=body, headers=user.headers)
+
+async def _list_alerts(client: httpx.AsyncClient, user: VirtualUser, ctx: LoadContext) -> httpx.Response:
+    return await client.get("/alerts/", headers=ctx.admin_headers)
+
+async def _register_donor(client: httpx.AsyncClient, user: VirtualUser, ctx: LoadContext) -> httpx.Response:
+    unique = uuid.uuid4().int
+    body = {
+        "full_name": "Load Test Donor",
+        "email": f"load-{unique % 10**12}@bench.example.com",
+        "password": BENCHMARK_PASSWORD,
+        "phone": f"+91-7{unique % 10**9:09d}",
+        "blood_group": ctx.rng.choice(BLOOD_GROUPS),
+        "age": ctx.rng.randint(18, 65),
+        "city": CITY,
+    }
+    return await client.post("/register/donor", json=body)
+
+def default_mix() -> list[Action]:
+    """Roughly a dashboard-heavy drill: hospitals polling, some raising alerts, new donors signing up."""
+    return [
+        Action("login", "POST /auth/login", 10, _login),
+        Action("snapshot", "GET /hospitals/me/dashboard/snapshot", 20, _get("/hospitals/me/dashboard/snapshot")),
+        Action("stats", "GET /hospitals/me/dashboard/stats", 10, _get("/hospitals/me/dashboard/stats")),
+        Action("requests", "GET /hospitals/me/dashboard/requests", 10, _get("/hospitals/me/dashboard/requests")),
+        Action("inventory", "GET /hospitals/me/dashboard/inventory", 10, _get("/hospitals/me/dashboard/inventory")),
+        Action("donor-responses", "GET /hospitals/me/dashboard/donor-responses", 10, _get("/hospitals/me/dashboard/donor-responses")),
+        Action("expiring", "GET /hospitals/me/dashboard/inventory/expiring", 5, _get("/hospitals/me/dashboard/inventory/expiring")),
+        Action("search", "GET /hospitals/inventory/search", 5, _get(
+            "/hospitals/inventory/search", lambda ctx: {"bloodType": ctx.rng.choice(BLOOD_GROUPS), "radiusKm": 25}
+        )),
+        Action("create-request", "POST /hospitals/me/dashboard/requests", 5, _create_request),
+        Action("create-alert", "POST /alerts/", 5, _create_alert),
+        Action("list-alerts", "GET /alerts/", 5, _list_alerts),
+        Action("register", "POST /register/donor", 5, _register_donor),
+    ]
+
+def apply_mix_overrides(actions: list[Action], spec: Optional[str]) -> list[Action]:
+    """Applies `name=weight,...` overrides; a weight of 0 drops the route."""
+    if spec:
+        by_name = {action.name: action for action in actions}
+        for item in spec.split(","):
+            name, _, weight = item.partition("=")
+            if name.strip() not in by_name:
+                raise SystemExit(f"Unknown route '{name.strip()}' in --mix; choose from {', '.join(by_name)}")
+            by_name[name.strip()].weight = int(weight)
+    return [action for action in actions if action.weight > 0]
+
+# --- Runner ---
+async def login(client: httpx.AsyncClient, email: str) -> dict:
+    response = await client.post("/auth/login", json={"email": email, "password": BENCHMARK_PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def worker(
+    client: httpx.AsyncClient, user: VirtualUser, ctx: LoadContext, actions: list[Action],
+    stats: dict[str, RouteStats], record_after: float, stop_at: float
+):
+    weights = [action.weight for action in actions]
+    while time.perf_counter() < stop_at:
+        action = ctx.rng.choices(actions, weights=weights)[0]
+        started = time.perf_counter()
+        try:
+            response = await action.call(client, user, ctx)
+            status = str(response.status_code)
+            failed = response.status_code >= 400
+        except httpx.HTTPError as e:
+            status, failed = type(e).__name__, True
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        # Requests started during the warm-up aren't counted
+        if started >= record_after:
+            route = stats[action.name]
+            route.samples.append(elapsed_ms)
+            route.statuses[status] += 1
+            route.errors += failed
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def build_report(args: argparse.Namespace, actions: list[Action], stats: dict[str, RouteStats], started_at: datetime) -> dict:
+    routes = {}
+    for action in actions:
+        route = stats[action.name]
+        routes[action.name] = {
+            "route": action.route,
+            "weight": action.weight,
+            **summarize(route.samples),
+            "errors": route.errors,
+            "statuses": dict(route.statuses),
+            "throughput_rps": round(len(route.samples) / args.duration, 2),
+        }
+    all_samples = [sample for route in stats.values() for sample in route.samples]
+    return {
+        "label": args.label,
+        "started_at": started_at.isoformat(),
+        "git_commit": git_commit(),
+        "base_url": args.base_url,
+        "config": {
+            "concurrency": args.concurrency, "duration_s": args.duration, "warmup_s": args.warmup,
+            "hospitals": args.hospitals, "donors": args.donors, "seed": args.seed,
+        },
+        "total": {
+            **summarize(all_samples),
+            "errors": sum(route.errors for route in stats.values()),
+            "throughput_rps": round(len(all_samples) / args.duration, 2),
+        },
+        "routes": routes,
+    }
+
+def print_report(report: dict, baseline: Optional[dict] = None):
+    print(f"{'route':<48}{'count':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}")
+    rows = [(stats["route"], stats) for stats in report["routes"].values()] + [("TOTAL", report["total"])]
+    for name, stats in rows:
+        line = (f"{name:<48}{stats['count']:>8}{stats['throughput_rps']:>9.1f}"
+                f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['errors']:>8}")
+        previous = _baseline_stats(baseline, name) if baseline else None
+        if previous and previous.get("p95_ms"):
+            change = (stats["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+            line += f"   p95 {change:+.0f}% vs {baseline.get('git_commit') or baseline.get('label') or 'baseline'}"
+        print(line)
+
+def _baseline_stats(baseline: dict, name: str) -> Optional[dict]:
+    if name == "TOTAL":
+        return baseline.get("total")
+    return next((stats for stats in baseline.get("routes", {}).values() if stats.get("route") == name), None)
+
+async def run(args: argparse.Namespace):
+    actions = apply_mix_overrides(default_mix(), args.mix)
+    ctx = LoadContext(args=args, rng=random.Random(args.seed))
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        # Sessions are set up before the clock starts; these logins aren't measured
+        hospital_indexes = [i % args.hospitals for i in range(args.concurrency)]
+        unique_indexes = sorted(set(hospital_indexes))
+        headers = await asyncio.gather(*(login(client, hospital_email(i)) for i in unique_indexes))
+        headers_by_index = dict(zip(unique_indexes, headers))
+        users = [VirtualUser(i, headers_by_index[i]) for i in hospital_indexes]
+        if any(action.name == "list-alerts" for action in actions):
+            ctx.admin_headers = await login(client, ADMIN_EMAIL)
+
+        stats = {action.name: RouteStats() for action in actions}
+        started_at = datetime.now(timezone.utc)
+        now = time.perf_counter()
+        record_after = now + args.warmup
+        stop_at = record_after + args.duration
+        print(f"Running {args.concurrency} virtual users for {args.warmup:.0f}s warm-up + {args.duration:.0f}s against {args.base_url}...")
+        await asyncio.gather(*(
+            worker(client, user, ctx, actions, stats, record_after, stop_at) for user in users
+        ))
+
+    report = build_report(args, actions, stats, started_at)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{started_at:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--hospitals", type=int, default=100, help="hospitals seeded by benchmarks.seed")
+    parser.add_argument("--donors", type=int, default=10000, help="donors seeded by benchmarks.seed")
+    parser.add_argument("--concurrency", type=int, default=50, help="virtual users")
+    parser.add_argument("--duration", type=float, default=60.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before the run")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--mix", help="route weight overrides, e.g. login=30,create-alert=0")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--label", help="free-form run label stored in the JSON")
+    parser.add_argument("--output", help="JSON path (default benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to show p95 changes against")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
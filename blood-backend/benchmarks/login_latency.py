@@ -0,0 +1,78 @@
+# blood-backend/benchmarks/login_latency.py
+"""
+Measures how a login storm affects the latency of unrelated endpoints.
+
+Runs a probe against a cheap endpoint on its own, then again while
+`--logins` concurrent clients hammer /auth/login, and prints p50/p95/p99
+for both phases. Start the server first, e.g. `uvicorn main:app`.
+
+    python -m benchmarks.login_latency --email donor@example.com --password secret123
+"""
+import argparse
+import asyncio
+import time
+import httpx
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50), 2),
+        "p95_ms": round(percentile(samples, 95), 2),
+        "p99_ms": round(percentile(samples, 99), 2),
+    }
+
+async def probe(client: httpx.AsyncClient, path: str, duration: float, interval: float) -> list[float]:
+    """Requests `path` every `interval` seconds and returns latencies in ms."""
+    samples = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return samples
+
+async def login_worker(client: httpx.AsyncClient, email: str, password: str, stop: asyncio.Event, counter: list[int]):
+    while not stop.is_set():
+        await client.post("/auth/login", json={"email": email, "password": password})
+        counter[0] += 1
+
+async def run(args: argparse.Namespace):
+    limits = httpx.Limits(max_connections=args.logins + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        baseline = await probe(client, args.probe_path, args.duration, args.interval)
+
+        stop = asyncio.Event()
+        counter = [0]
+        workers = [
+            asyncio.create_task(login_worker(client, args.email, args.password, stop, counter))
+            for _ in range(args.logins)
+        ]
+        under_load = await probe(client, args.probe_path, args.duration, args.interval)
+        stop.set()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    print(f"Probe {args.probe_path} without login traffic: {summarize(baseline)}")
+    print(f"Probe {args.probe_path} during {args.logins} concurrent logins: {summarize(under_load)}")
+    print(f"Logins completed: {counter[0]} ({counter[0] / args.duration:.1f}/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=50, help="concurrent login clients")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per phase")
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between probes")
+    parser.add_argument("--probe-path", default="/")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
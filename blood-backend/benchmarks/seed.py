@@ -0,0 +1,111 @@
+# blood-backend/benchmarks/seed.py
+"""
+Seeds a benchmark database with simulated donors, hospitals and history.
+
+The target database is dropped first, filled with bulk inserts, then given
+the full index registry (building indexes after the load is much faster
+than maintaining them during it). Every account shares one bcrypt hash of
+`benchmarks.simulate.BENCHMARK_PASSWORD`, so seeding never waits on bcrypt.
+
+    python -m benchmarks.seed --donors 100000 --hospitals 200
+
+Then start the API against it, e.g. `MONGO_DB=blood_alert_benchmark uvicorn main:app`,
+and drive it with `python -m benchmarks.load`.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any
+from db.conn import get_client, MONGO_DB_NAME, ensure_indexes_async
+from services.matching import COMPAT_MASK_MIGRATION
+from utils.security import hash_password
+from benchmarks.simulate import (
+    BENCHMARK_PASSWORD, ADMIN_EMAIL, simulate_donors, simulate_hospitals, simulate_history,
+    simulate_responses, simulate_lots, inventory_from_lots, simulate_weekly_rollups,
+)
+
+DEFAULT_DB_NAME = f"{MONGO_DB_NAME}_benchmark"
+INSERT_CHUNK_SIZE = 10000
+
+async def insert_chunked(collection: Any, documents: list[dict]):
+    for start in range(0, len(documents), INSERT_CHUNK_SIZE):
+        await collection.insert_many(documents[start:start + INSERT_CHUNK_SIZE], ordered=False)
+
+async def seed(database: Any, args: argparse.Namespace) -> dict:
+    """Fills `database` and returns the number of documents written per collection."""
+    rng = random.Random(args.seed)
+    password_hash = hash_password(BENCHMARK_PASSWORD)
+    counts = {}
+
+    hospitals = simulate_hospitals(args.hospitals, password_hash, rng)
+    await database.hospitals.insert_many(hospitals)
+    await database.admins.insert_one({"email": ADMIN_EMAIL, "name": "Benchmark Admin", "password": password_hash})
+    counts["hospitals"] = len(hospitals)
+
+    # Donors go in as they are generated; at 1M they don't fit comfortably in one list
+    started = time.perf_counter()
+    counts["donors"] = 0
+    for chunk in simulate_donors(args.donors, password_hash, rng, INSERT_CHUNK_SIZE):
+        await database.donors.insert_many(chunk, ordered=False)
+        counts["donors"] += len(chunk)
+        if counts["donors"] % 100000 == 0:
+            rate = counts["donors"] / (time.perf_counter() - started)
+            print(f"  {counts['donors']} donors inserted ({rate:.0f}/s)")
+
+    alerts, requests = simulate_history(hospitals, args.days, rng)
+    responses = simulate_responses(requests, args.donors, rng)
+    lots = simulate_lots(hospitals, rng)
+    inventory = inventory_from_lots(lots)
+    rollups = simulate_weekly_rollups(args.weeks, rng)
+
+    await asyncio.gather(
+        insert_chunked(database.alerts, alerts),
+        insert_chunked(database.blood_requests, requests),
+        insert_chunked(database.donor_responses, responses),
+        insert_chunked(database.blood_lots, lots),
+        insert_chunked(database.blood_inventory, inventory),
+        insert_chunked(database.weekly_rollups, rollups),
+    )
+    counts.update({
+        "alerts": len(alerts), "blood_requests": len(requests), "donor_responses": len(responses),
+        "blood_lots": len(lots), "blood_inventory": len(inventory), "weekly_rollups": len(rollups),
+    })
+
+    # Seeded donors already carry compat_mask, so the startup backfill has nothing to do
+    await database.migrations.insert_one({"_id": COMPAT_MASK_MIGRATION, "completed_at": datetime.now(timezone.utc)})
+    return counts
+
+async def run(args: argparse.Namespace):
+    if args.db == MONGO_DB_NAME:
+        raise SystemExit(f"Refusing to drop the application database '{MONGO_DB_NAME}'; pick another --db.")
+
+    client = get_client()
+    started = time.perf_counter()
+    await client.drop_database(args.db)
+    database = client[args.db]
+    print(f"Seeding '{args.db}' with {args.donors} donors and {args.hospitals} hospitals...")
+
+    counts = await seed(database, args)
+    print(f"Documents written in {time.perf_counter() - started:.1f}s: {counts}")
+
+    indexes_started = time.perf_counter()
+    await ensure_indexes_async(database)
+    print(f"Indexes built in {time.perf_counter() - indexes_started:.1f}s.")
+
+    print(f"\nStart the API with MONGO_DB={args.db}, then run:")
+    print(f"  python -m benchmarks.load --hospitals {args.hospitals} --donors {args.donors}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB_NAME, help="database to drop and seed")
+    parser.add_argument("--donors", type=int, default=10000, help="10k-1M is the supported range")
+    parser.add_argument("--hospitals", type=int, default=100)
+    parser.add_argument("--days", type=int, default=90, help="days of alert/request history")
+    parser.add_argument("--weeks", type=int, default=104, help="weeks of forecasting rollups")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
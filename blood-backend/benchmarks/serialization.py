@@ -0,0 +1,92 @@
+# blood-backend/benchmarks/serialization.py
+"""
+Compares the two ways list endpoints can serialize database documents:
+
+- validated: FastAPI's response_model path (Pydantic validation with the
+  ObjectIdStr conversion, then stdlib JSON encoding)
+- fast: utils.serialization.dumps on the raw BSON documents
+
+Runs offline on synthetic documents shaped like the dashboard collections.
+
+    python -m benchmarks.serialization --items 10000 --repeat 20
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+from bson import ObjectId
+from pydantic import TypeAdapter
+from api.routes.hospitals import BloodRequest, DonorResponse
+from utils.serialization import dumps, orjson
+from benchmarks.login_latency import summarize
+
+BLOOD_TYPES = ["O+", "O-", "A+", "A-", "B+", "B-", "AB+", "AB-"]
+
+def blood_request(hospital_id: ObjectId) -> dict:
+    return {
+        "_id": ObjectId(),
+        "hospital_id": hospital_id,
+        "bloodType": random.choice(BLOOD_TYPES),
+        "unitsRequested": random.randint(1, 10),
+        "urgency": random.choice(["Critical", "High", "Medium", "Low"]),
+        "status": "Active",
+        # Motor returns naive UTC datetimes with millisecond precision
+        "requestedAt": datetime(2025, 1, 1) + timedelta(milliseconds=random.randint(0, 10**10)),
+        "donorResponses": random.randint(0, 50),
+        "hospitalResponses": random.randint(0, 50),
+    }
+
+def donor_response(request_id: ObjectId) -> dict:
+    return {
+        "_id": ObjectId(),
+        "request_id": request_id,
+        "donor_id": ObjectId(),
+        "donorName": "Donor %d" % random.randint(1, 10**6),
+        "bloodType": random.choice(BLOOD_TYPES),
+        "distance": "%.1f km" % random.uniform(0, 25),
+        "lastDonation": "2025-05-01",
+        "phone": "+91-98765%05d" % random.randint(0, 99999),
+        "status": "Available",
+    }
+
+def validated(adapter: TypeAdapter, docs: list) -> bytes:
+    # What FastAPI does for a response_model: validate, dump by alias, json.dumps
+    content = adapter.dump_python(adapter.validate_python(docs), mode="json", by_alias=True)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def time_ms(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    hospital_id = ObjectId()
+    cases = {
+        "blood_requests": (List[BloodRequest], [blood_request(hospital_id) for _ in range(args.items)]),
+        "donor_responses": (List[DonorResponse], [donor_response(ObjectId()) for _ in range(args.items)]),
+    }
+
+    print(f"encoder: {'orjson' if orjson is not None else 'stdlib json'}, {args.items} items, {args.repeat} runs")
+    for name, (model, docs) in cases.items():
+        adapter = TypeAdapter(model)
+        # Both paths must put the same documents on the wire
+        assert json.loads(validated(adapter, docs)) == json.loads(dumps(docs)), f"{name}: outputs differ"
+
+        slow = summarize(time_ms(lambda: validated(adapter, docs), args.repeat))
+        fast = summarize(time_ms(lambda: dumps(docs), args.repeat))
+        speedup = slow["p50_ms"] / fast["p50_ms"] if fast["p50_ms"] else float("inf")
+        print(f"{name:16} validated p50 {slow['p50_ms']:8.2f} ms  p95 {slow['p95_ms']:8.2f} ms | "
+              f"fast p50 {fast['p50_ms']:7.2f} ms  p95 {fast['p95_ms']:7.2f} ms | {speedup:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# blood-backend/benchmarks/simulate.py
+"""
+Synthetic data shaped like production documents.
+
+The distributions are the ones the notebooks train on, so seeded data
+exercises the same code paths (and the same ranking features) as real
+traffic:
+
+- Most_Likely_responders.ipynb: donors within ±0.12° of the city center,
+  hospitals within ±0.06°, 0-3 historical alerts per day
+- future_blood_shortage_forecasting: four regions with yearly and weekly
+  seasonality in daily donations and requests
+
+Donors are generated in chunks so a 1M donor seed never holds the whole
+collection in memory.
+"""
+import math
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+from bson import ObjectId
+from utils.blood import compat_mask
+from services.rollups import week_start
+from services.inventory import DEFAULT_SHELF_LIFE_DAYS, DEFAULT_MINIMUM_UNITS
+
+CITY_CENTER = (22.5726, 88.3639)  # (lat, lon), Kolkata as in the notebooks
+DONOR_SPREAD_DEG = 0.12
+HOSPITAL_SPREAD_DEG = 0.06
+BLOOD_GROUPS = ["A+", "A-", "B+", "B-", "O+", "O-", "AB+", "AB-"]
+GENDERS = ["M", "F", "O"]
+URGENCIES = ["Low", "Medium", "High", "Critical"]
+URGENCY_WEIGHTS = [40, 30, 20, 10]
+REGIONS = ["North", "South", "East", "West"]
+CITY = "Kolkata"
+
+# Every seeded account logs in with this password
+BENCHMARK_PASSWORD = "benchmark123"
+ADMIN_EMAIL = "admin@bench.example.com"
+
+def donor_email(i: int) -> str:
+    return f"donor{i}@bench.example.com"
+
+def hospital_email(i: int) -> str:
+    return f"hospital{i}@bench.example.com"
+
+def _point(rng: random.Random, spread: float) -> dict:
+    lat = CITY_CENTER[0] + rng.uniform(-spread, spread)
+    lon = CITY_CENTER[1] + rng.uniform(-spread, spread)
+    return {"type": "Point", "coordinates": [lon, lat]}
+
+def simulate_donors(
+    n: int, password_hash: str, rng: random.Random, chunk_size: int = 10000
+) -> Iterator[list[dict]]:
+    """Yields donor documents in chunks of `chunk_size`."""
+    now = datetime.now(timezone.utc)
+    for start in range(0, n, chunk_size):
+        chunk = []
+        for i in range(start, min(n, start + chunk_size)):
+            group = rng.choice(BLOOD_GROUPS)
+            chunk.append({
+                "full_name": f"Donor {i}",
+                "email": donor_email(i),
+                "password": password_hash,
+                "phone": f"+91-9{i:09d}",
+                "blood_group": group,
+                "compat_mask": compat_mask(group),
+                "age": rng.randint(18, 65),
+                "gender": rng.choice(GENDERS),
+                "city": CITY,
+                "location": _point(rng, DONOR_SPREAD_DEG),
+                "last_donation_date": now - timedelta(days=rng.randint(30, 720)),
+                "donation_frequency_per_year": rng.choices([0, 1, 2, 3, 4, 5], weights=[30, 30, 20, 10, 8, 2])[0],
+                "is_available": rng.random() < 0.8,
+                "past_response_rate": round(rng.betavariate(2, 5), 3),
+                "created_at": now - timedelta(days=rng.randint(0, 720)),
+            })
+        yield chunk
+
+def simulate_hospitals(n: int, password_hash: str, rng: random.Random) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    hospitals = []
+    for i in range(n):
+        name = f"Hospital {i}"
+        hospitals.append({
+            "_id": ObjectId(),
+            # Registration stores `hospitalName`; profile and alerts read `name`
+            "hospitalName": name,
+            "name": name,
+            "address": f"{i} Hospital Road, {CITY}",
+            "email": hospital_email(i),
+            "password": password_hash,
+            "phone": f"+91-8{i:09d}",
+            "registrationNumber": f"BENCH-{i:06d}",
+            "role": "hospital",
+            "region": REGIONS[i % len(REGIONS)],
+            "location": _point(rng, HOSPITAL_SPREAD_DEG),
+            "created_at": now - timedelta(days=rng.randint(0, 720)),
+        })
+    return hospitals
+
+def simulate_history(
+    hospitals: list[dict], days_history: int, rng: random.Random, active_per_hospital: int = 5
+) -> tuple[list[dict], list[dict]]:
+    """
+    Historical alerts and the matching blood requests: 0-3 per hospital per
+    day over `days_history` days, notebook urgency weights. The last
+    `active_per_hospital` requests of each hospital stay open so the
+    dashboard routes have active work to return.
+    """
+    now = datetime.now(timezone.utc)
+    alerts, requests = [], []
+    for hospital in hospitals:
+        history = []
+        for day_offset in range(days_history, 0, -1):
+            day = now - timedelta(days=day_offset)
+            for _ in range(rng.randint(0, 3)):
+                history.append(day + timedelta(minutes=rng.randint(0, 24 * 60 - 1)))
+        history.sort()
+
+        for n, requested_at in enumerate(history):
+            group = rng.choice(BLOOD_GROUPS)
+            units = rng.randint(1, 6)
+            urgency = rng.choices(URGENCIES, weights=URGENCY_WEIGHTS)[0]
+            active = n >= len(history) - active_per_hospital
+            requests.append({
+                "_id": ObjectId(),
+                "hospital_id": hospital["_id"],
+                "bloodType": group,
+                "unitsRequested": units,
+                "urgency": urgency,
+                "status": "Active" if active else rng.choices(["Completed", "Cancelled"], weights=[9, 1])[0],
+                "requestedAt": requested_at,
+                "completedAt": None if active else requested_at + timedelta(hours=rng.uniform(0.5, 24.0)),
+                "donorResponses": 0,
+                "hospitalResponses": 0,
+            })
+            alerts.append({
+                "hospital_id": str(hospital["_id"]),
+                "hospital_name": hospital["name"],
+                "blood_group": group,
+                "units_required": units,
+                "location": hospital["location"],
+                "status": "active" if active else "fulfilled",
+                "created_at": requested_at,
+                "donors_notified": 0,
+            })
+    return alerts, requests
+
+def simulate_responses(requests: list[dict], n_donors: int, rng: random.Random, per_request: int = 8) -> list[dict]:
+    """Donor responses for the open requests, answered 0.5-24h after the request as in the notebook."""
+    responses = []
+    for request in requests:
+        if request["status"] != "Active" or not n_donors:
+            continue
+        for _ in range(rng.randint(0, per_request)):
+            i = rng.randrange(n_donors)
+            responses.append({
+                "request_id": request["_id"],
+                "donor_id": ObjectId(),
+                "donorName": f"Donor {i}",
+                "bloodType": request["bloodType"],
+                "distance": f"{rng.uniform(0.5, 15.0):.1f} km",
+                "lastDonation": f"{rng.randint(30, 720)} days ago",
+                "phone": f"+91-9{i:09d}",
+                "status": rng.choice(["Available", "Contacted", "Confirmed"]),
+                "respondedAt": request["requestedAt"] + timedelta(hours=rng.uniform(0.5, 24.0)),
+            })
+    return responses
+
+def simulate_lots(hospitals: list[dict], rng: random.Random, lots_per_hospital: int = 120) -> list[dict]:
+    """Lot ledger entries collected over the last 60 days with the standard shelf life."""
+    now = datetime.now(timezone.utc)
+    lots = []
+    for hospital in hospitals:
+        for _ in range(lots_per_hospital):
+            collected_at = now - timedelta(days=rng.uniform(0, 60))
+            expires_at = collected_at + timedelta(days=DEFAULT_SHELF_LIFE_DAYS)
+            units = rng.randint(1, 4)
+            expired = expires_at <= now
+            lots.append({
+                "hospital_id": hospital["_id"],
+                "bloodType": rng.choice(BLOOD_GROUPS),
+                "units": units,
+                "unitsAvailable": 0 if expired else units,
+                "collectedAt": collected_at,
+                "expiresAt": expires_at,
+                "status": "expired" if expired else "available",
+                "allocations": [],
+            })
+    return lots
+
+def inventory_from_lots(lots: list[dict]) -> list[dict]:
+    """blood_inventory summaries kept in step with the available lots."""
+    totals: dict[tuple, int] = {}
+    for lot in lots:
+        key = (lot["hospital_id"], lot["bloodType"])
+        totals[key] = totals.get(key, 0) + lot["unitsAvailable"]
+    return [
+        {
+            "hospital_id": hospital_id, "bloodType": group, "unitsAvailable": units,
+            "minimumRequired": DEFAULT_MINIMUM_UNITS, "expiringIn7Days": 0, "status": "Normal",
+        }
+        for (hospital_id, group), units in totals.items()
+    ]
+
+def simulate_weekly_rollups(weeks: int, rng: random.Random) -> list[dict]:
+    """
+    The forecasting notebook's daily region x blood type series (yearly
+    sinusoid, weekend dip, noise, rare campaigns), summed into the weekly
+    counters the forecaster reads.
+    """
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(weeks=weeks)
+    counters: dict[tuple, dict] = {}
+    for region in REGIONS:
+        region_trend = rng.uniform(-0.0005, 0.001)
+        amplitude = rng.uniform(10, 30)
+        for group in BLOOD_GROUPS:
+            base_level = rng.randint(20, 80)
+            for i in range(weeks * 7):
+                day = start + timedelta(days=i)
+                seasonal = amplitude * math.sin(2 * math.pi * day.timetuple().tm_yday / 365.25)
+                weekly = -5 if day.weekday() >= 5 else 0
+                campaign = rng.randint(30, 100) if rng.random() < 0.005 else 0
+                donations = max(0.0, base_level + seasonal + weekly + rng.gauss(0, 5.0) + campaign + region_trend * i)
+                requests = max(0.0, base_level * rng.uniform(0.8, 1.2) + seasonal * 0.5 + rng.gauss(0, 6.0))
+
+                key = (region, group, week_start(day))
+                row = counters.setdefault(key, {"region": region, "blood_type": group, "week": key[2], "donations": 0, "requests": 0})
+                row["donations"] += round(donations)
+                row["requests"] += round(requests)
+    return list(counters.values())
@@ -1,10 +1,15 @@
 # blood-backend/db/conn.py
 import os
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
 from dotenv import load_dotenv
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Optional
 from bson import ObjectId
 import asyncio
+from db.indexes import INDEXES, unique_index_names
+from utils.metrics import command_listener, pool_monitor
 
 # Load environment variables
 load_dotenv()
@@ -12,30 +17,128 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DB_NAME = os.getenv("MONGO_DB", "blood_alert")
 
-if not MONGO_URI:
-    raise ValueError("MONGO_URI environment variable is not set. Please add it to your .env file.")
+# Pool sizing (per server); the pool metrics show when these need raising
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_MAX_CONNECTING = int(os.getenv("MONGO_MAX_CONNECTING", "4"))
+# 0 waits indefinitely for a free connection
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+# Admin analytics reads; writes and a hospital's own dashboard always use the primary
+MONGO_ANALYTICS_READ_PREFERENCE = os.getenv("MONGO_ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+# At least 90 when set (a server-side minimum); unset means any secondary is acceptable
+MONGO_ANALYTICS_MAX_STALENESS_SECONDS = int(os.getenv("MONGO_ANALYTICS_MAX_STALENESS_SECONDS", "-1"))
 
-# Global client and database instance
-client = AsyncIOMotorClient(MONGO_URI)
-db = client[MONGO_DB_NAME]
+class ConnectionManager:
+    """
+    Owns the MongoDB client. Created lazily (scripts) or by the app lifespan,
+    which also warms the pool up so the first requests don't pay for the
+    connection handshakes.
 
-async def ensure_indexes_async():
-    """Asynchronously creates unique and geospatial indexes on collections."""
+    `db` reads and writes on the primary. `analytics_db` is the same database
+    with MONGO_ANALYTICS_READ_PREFERENCE, for heavy aggregations that can
+    tolerate replication lag.
+    """
+
+    def __init__(self):
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.db: Any = None
+        self.analytics_db: Any = None
+
+    def connect(self) -> AsyncIOMotorClient:
+        if self.client is not None:
+            return self.client
+        if not MONGO_URI:
+            raise RuntimeError("MONGO_URI environment variable is not set. Please add it to your .env file.")
+
+        self.client = AsyncIOMotorClient(
+            MONGO_URI,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxConnecting=MONGO_MAX_CONNECTING,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+            event_listeners=[command_listener, pool_monitor],
+        )
+        self.db = self.client[MONGO_DB_NAME]
+        analytics_preference = make_read_preference(
+            read_pref_mode_from_name(MONGO_ANALYTICS_READ_PREFERENCE), None, MONGO_ANALYTICS_MAX_STALENESS_SECONDS
+        )
+        self.analytics_db = self.client.get_database(MONGO_DB_NAME, read_preference=analytics_preference)
+        return self.client
+
+    async def warm_up(self):
+        """Connects, then opens MONGO_MIN_POOL_SIZE connections with concurrent pings."""
+        self.connect()
+        started = time.perf_counter()
+        await self.db.command("ping")
+        await asyncio.gather(*(self.db.command("ping") for _ in range(MONGO_MIN_POOL_SIZE)))
+        print(f"MongoDB connection pool warmed up in {(time.perf_counter() - started) * 1000:.0f} ms.")
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        self.client = self.db = self.analytics_db = None
+
+connection_manager = ConnectionManager()
+
+class _DatabaseProxy:
+    """
+    Stands in for a Motor database at import time, so modules can keep
+    `from db.conn import db` while the client is created later.
+    """
+
+    def __init__(self, attribute: str):
+        self._attribute = attribute
+
+    def _database(self) -> Any:
+        if getattr(connection_manager, self._attribute) is None:
+            connection_manager.connect()
+        return getattr(connection_manager, self._attribute)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._database(), name)
+
+    def __getitem__(self, name: str) -> Any:
+        return self._database()[name]
+
+# Global database handles
+db = _DatabaseProxy("db")
+analytics_db = _DatabaseProxy("analytics_db")
+
+def get_client() -> AsyncIOMotorClient:
+    return connection_manager.connect()
+
+async def _create_index(database: Any, collection_name: str, index: IndexModel) -> bool:
     try:
-        print("Ensuring MongoDB indexes...")
-        
-        # Unique email indexes for all user types
-        await db.donors.create_index("email", unique=True)
-        await db.hospitals.create_index("email", unique=True)
-        await db.admins.create_index("email", unique=True)
-
-        # Geospatial index for donor locations
-        await db.donors.create_index([("location", "2dsphere")])
-        
-        print("MongoDB indexes ensured successfully.")
+        await database[collection_name].create_indexes([index])
+        return True
     except Exception as e:
-        print(f"Failed to create indexes: {e}")
+        print(f"Failed to create index {index.document['name']} on {collection_name}: {e}")
+        return False
+
+async def ensure_indexes_async(database: Any = None):
+    """
+    Creates every index in the registry concurrently.
+    Each index is created on its own so one failure doesn't block the rest;
+    any failure is raised afterwards, so startup reports the phase as failed.
+    """
+    database = db if database is None else database
+    print("Ensuring MongoDB indexes...")
+    targets = [(collection_name, index) for collection_name, indexes in INDEXES.items() for index in indexes]
+    results = await asyncio.gather(*(_create_index(database, collection_name, index) for collection_name, index in targets))
+    print(f"MongoDB indexes ensured: {sum(results)}/{len(results)} succeeded.")
+    failed = [f"{collection_name}.{index.document['name']}" for (collection_name, index), ok in zip(targets, results) if not ok]
+    if failed:
+        raise RuntimeError(f"Missing indexes: {', '.join(failed)}")
+
+async def missing_unique_indexes(collection: Any) -> list[str]:
+    """Registry unique indexes that don't exist on `collection` (e.g. the build failed on duplicates)."""
+    existing = await collection.index_information()
+    return [name for name in unique_index_names(collection.name) if name not in existing]
 
 async def get_database() -> AsyncGenerator[AsyncIOMotorClient, None]:
     """Dependency that provides an async database connection."""
-    yield db
\ No newline at end of file
+    yield db
+
+async def get_analytics_database() -> AsyncGenerator[AsyncIOMotorClient, None]:
+    """Dependency for admin analytics reads that may be served by a secondary."""
+    yield analytics_db
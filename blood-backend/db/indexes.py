@@ -0,0 +1,78 @@
+# blood-backend/db/indexes.py
+from pymongo import IndexModel, ASCENDING, DESCENDING, GEOSPHERE
+from utils.throttle import FULL_REFILL_SECONDS
+
+# Unique contact fields only constrain documents that actually have a value,
+# so legacy rows with a missing or null phone don't block the index build
+def _present(field: str) -> dict:
+    return {field: {"$type": "string"}}
+
+# Every index the routes rely on, keyed by collection.
+# Each entry names the query shape it serves; db/query_plans.py checks them with explain().
+INDEXES: dict[str, list[IndexModel]] = {
+    "donors": [
+        # login / registration lookups
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("phone", ASCENDING)], unique=True, partialFilterExpression=_present("phone")),
+        # alert fan-out: $near on location
+        IndexModel([("location", GEOSPHERE), ("compat_mask", ASCENDING)]),
+    ],
+    "hospitals": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("phone", ASCENDING)], unique=True, partialFilterExpression=_present("phone")),
+        IndexModel([("registrationNumber", ASCENDING)], unique=True, partialFilterExpression=_present("registrationNumber")),
+        # cross-hospital inventory search
+        IndexModel([("location", GEOSPHERE)]),
+    ],
+    "admins": [
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "blood_requests": [
+        # dashboard: by hospital, by hospital + status, completed today
+        IndexModel([("hospital_id", ASCENDING), ("status", ASCENDING), ("completedAt", DESCENDING)]),
+        # admin metrics: distinct hospitals with active requests
+        IndexModel([("status", ASCENDING), ("hospital_id", ASCENDING)]),
+        # escalation deadlines reloaded at startup; only open requests carry one
+        IndexModel([("escalate_at", ASCENDING)], sparse=True),
+    ],
+    "donor_responses": [
+        # responses joined to their request
+        IndexModel([("request_id", ASCENDING)]),
+    ],
+    "alerts": [
+        # active alerts, newest first, keyset-paginated on (created_at, _id)
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        # admin metrics: alerts today, most recent alerts
+        IndexModel([("created_at", DESCENDING)]),
+        IndexModel([("escalate_at", ASCENDING)], sparse=True),
+    ],
+    "blood_inventory": [
+        # one summary per hospital and blood type, upserted as lots come and go
+        IndexModel([("hospital_id", ASCENDING), ("bloodType", ASCENDING)], unique=True),
+        # cross-hospital search: covered read of who holds a blood type
+        IndexModel([("bloodType", ASCENDING), ("unitsAvailable", ASCENDING), ("hospital_id", ASCENDING)]),
+    ],
+    "blood_lots": [
+        # FEFO allocation: soonest-expiring available lot of a type
+        IndexModel([("hospital_id", ASCENDING), ("status", ASCENDING), ("bloodType", ASCENDING), ("expiresAt", ASCENDING)]),
+        # expiring within N days, per hospital
+        IndexModel([("hospital_id", ASCENDING), ("status", ASCENDING), ("expiresAt", ASCENDING)]),
+        # expiry sweeper, across hospitals
+        IndexModel([("status", ASCENDING), ("expiresAt", ASCENDING)]),
+    ],
+    "weekly_rollups": [
+        # one counter document per series-week; unique so concurrent upserts can't duplicate it
+        IndexModel([("region", ASCENDING), ("blood_type", ASCENDING), ("week", ASCENDING)], unique=True),
+    ],
+    "alert_notifications": [
+        IndexModel([("alert_id", ASCENDING)]),
+    ],
+    "donor_throttle": [
+        # TTL: drop buckets that would have refilled completely (same settings as the governor)
+        IndexModel([("updated_at", ASCENDING)], expireAfterSeconds=FULL_REFILL_SECONDS),
+    ],
+}
+
+def unique_index_names(collection_name: str) -> list[str]:
+    """Names of the registry's unique indexes on a collection (duplicate detection relies on them)."""
+    return [index.document["name"] for index in INDEXES.get(collection_name, []) if index.document.get("unique")]
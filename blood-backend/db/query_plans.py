@@ -0,0 +1,289 @@
+# blood-backend/db/query_plans.py
+"""
+Query-plan regression check.
+
+Seeds a scratch database, builds the index registry on it, runs every
+query shape the routes issue through explain("executionStats") and fails
+if a plan contains a COLLSCAN or examines too many documents per result.
+
+    python -m db.query_plans            # exits 1 on any regression
+"""
+import sys
+import random
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from bson import ObjectId
+from db.conn import get_client, MONGO_DB_NAME, ensure_indexes_async
+from utils.blood import compat_mask
+from utils.pagination import encode_cursor, keyset_filter
+from services.matching import compatible_donors_pipeline
+from services.admin_metrics import (
+    ACTIVE_REQUESTS_FILTER, alerts_since_filter, successful_matches_filter,
+    response_times_pipeline, success_rates_pipeline,
+)
+from api.routes.hospitals import dashboard_pipeline
+
+SCRATCH_DB_NAME = f"{MONGO_DB_NAME}_query_plans"
+DEFAULT_MAX_EXAMINED_RATIO = 2.0
+
+CITY_CENTER = (22.5726, 88.3639)  # (lat, lon), same as the responder notebook
+BLOOD_GROUPS = ["A+", "A-", "B+", "B-", "O+", "O-", "AB+", "AB-"]
+
+@dataclass
+class QueryShape:
+    """One query the application issues, expressed as an explainable command."""
+    name: str
+    collection: str
+    filter: dict = field(default_factory=dict)
+    sort: Optional[dict] = None
+    limit: Optional[int] = None
+    pipeline: Optional[list] = None
+    distinct: Optional[str] = None
+    max_examined_ratio: float = DEFAULT_MAX_EXAMINED_RATIO
+
+    def command(self) -> dict:
+        if self.pipeline is not None:
+            return {"aggregate": self.collection, "pipeline": self.pipeline, "cursor": {}}
+        if self.distinct is not None:
+            return {"distinct": self.collection, "key": self.distinct, "query": self.filter}
+        cmd = {"find": self.collection, "filter": self.filter}
+        if self.sort:
+            cmd["sort"] = self.sort
+        if self.limit:
+            cmd["limit"] = self.limit
+        return cmd
+
+def _random_point(spread: float = 0.12) -> dict:
+    lat = CITY_CENTER[0] + random.uniform(-spread, spread)
+    lon = CITY_CENTER[1] + random.uniform(-spread, spread)
+    return {"type": "Point", "coordinates": [lon, lat]}
+
+async def seed(database: Any, ids: dict, n_donors: int = 5000, n_hospitals: int = 50):
+    """Fills the scratch database with data shaped like production documents."""
+    now = datetime.now(timezone.utc)
+
+    donors = [{
+        "full_name": f"Donor {i}",
+        "email": f"donor{i}@example.com",
+        "phone": f"+91-9{i:09d}",
+        "blood_group": random.choice(BLOOD_GROUPS),
+        "is_available": random.random() < 0.8,
+        "location": _random_point(),
+        "created_at": now - timedelta(days=random.randint(0, 720)),
+    } for i in range(n_donors)]
+    for donor in donors:
+        donor["compat_mask"] = compat_mask(donor["blood_group"])
+
+    hospitals = [{
+        "_id": ObjectId(),
+        "name": f"Hospital {i}",
+        "email": f"hospital{i}@example.com",
+        "phone": f"+91-8{i:09d}",
+        "registrationNumber": f"REG-{i:06d}",
+        "role": "hospital",
+        "location": _random_point(0.06),
+    } for i in range(n_hospitals)]
+
+    requests = [{
+        "_id": ObjectId(),
+        "hospital_id": random.choice(hospitals)["_id"],
+        "bloodType": random.choice(BLOOD_GROUPS),
+        "unitsRequested": random.randint(1, 6),
+        "urgency": random.choice(["Low", "Medium", "High", "Critical"]),
+        "status": random.choices(["Active", "Completed", "Cancelled"], weights=[2, 7, 1])[0],
+        "requestedAt": now - timedelta(hours=random.randint(0, 24 * 90)),
+        "completedAt": now - timedelta(hours=random.randint(0, 24 * 90)),
+        "donorResponses": 0,
+        "hospitalResponses": 0,
+    } for _ in range(n_hospitals * 100)]
+
+    responses = [{
+        "request_id": random.choice(requests)["_id"],
+        "donor_id": ObjectId(),
+        "status": random.choice(["Available", "Contacted", "Confirmed", "Completed"]),
+        "respondedAt": now - timedelta(hours=random.randint(0, 24 * 90)),
+    } for _ in range(len(requests) * 2)]
+
+    alerts = [{
+        "hospital_id": str(random.choice(hospitals)["_id"]),
+        "blood_group": random.choice(BLOOD_GROUPS),
+        "units_required": random.randint(1, 6),
+        "status": random.choices(["active", "fulfilled"], weights=[1, 9])[0],
+        "created_at": now - timedelta(minutes=random.randint(0, 60 * 24 * 90)),
+    } for _ in range(5000)]
+
+    inventory = [{
+        "hospital_id": hospital["_id"],
+        "bloodType": bt,
+        "unitsAvailable": random.randint(0, 40),
+    } for hospital in hospitals for bt in BLOOD_GROUPS]
+
+    lots = []
+    for hospital in hospitals:
+        for _ in range(200):
+            collected_at = now - timedelta(days=random.randint(0, 400))
+            expired = collected_at + timedelta(days=42) < now
+            lots.append({
+                "hospital_id": hospital["_id"],
+                "bloodType": random.choice(BLOOD_GROUPS),
+                "units": 1,
+                "unitsAvailable": 0 if expired else 1,
+                "collectedAt": collected_at,
+                "expiresAt": collected_at + timedelta(days=42),
+                "status": "expired" if expired else random.choice(["available", "allocated"]),
+            })
+
+    await asyncio.gather(
+        database.blood_lots.insert_many(lots),
+        database.donors.insert_many(donors),
+        database.hospitals.insert_many(hospitals),
+        database.admins.insert_one({"email": "admin@example.com", "name": "Admin"}),
+        database.blood_requests.insert_many(requests),
+        database.donor_responses.insert_many(responses),
+        database.alerts.insert_many(alerts),
+        database.blood_inventory.insert_many(inventory),
+    )
+
+    ids["hospital_id"] = hospitals[0]["_id"]
+    ids["hospital_ids"] = [hospital["_id"] for hospital in hospitals[::3]]
+    ids["request_ids"] = [r["_id"] for r in requests if r["hospital_id"] == hospitals[0]["_id"] and r["status"] == "Active"]
+    ids["latest_alert"] = max((a for a in alerts if a["status"] == "active"), key=lambda a: a["created_at"])
+
+def query_shapes(ids: dict) -> list[QueryShape]:
+    """
+    The query shapes issued by the routes, parameterized with seeded ids.
+    Where a route or service builds its filter or pipeline with a helper, the
+    shape uses that helper, so changes to those queries are checked as-is.
+    """
+    hospital_id = ids["hospital_id"]
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    center = {"type": "Point", "coordinates": [CITY_CENTER[1], CITY_CENTER[0]]}
+    latest_alert = ids["latest_alert"]
+
+    return [
+        QueryShape("auth.login donors", "donors", {"email": "donor42@example.com"}),
+        QueryShape("auth.login hospitals", "hospitals", {"email": "hospital7@example.com"}),
+        QueryShape("auth.login admins", "admins", {"email": "admin@example.com"}),
+        QueryShape("register.donor duplicate check", "donors",
+                   {"$or": [{"email": "donor42@example.com"}, {"phone": "+91-9000000042"}]}),
+        QueryShape("register.hospital duplicate check", "hospitals",
+                   {"$or": [{"email": "hospital7@example.com"}, {"phone": "+91-8000000007"}, {"registrationNumber": "REG-000007"}]}),
+        QueryShape("hospitals.dashboard active requests", "blood_requests",
+                   {"hospital_id": hospital_id, "status": "Active"}),
+        QueryShape("hospitals.dashboard aggregation", "blood_requests",
+                   pipeline=dashboard_pipeline(hospital_id, include_active=True)),
+        QueryShape("hospitals.donor responses", "donor_responses",
+                   {"request_id": {"$in": ids["request_ids"]}}),
+        QueryShape("hospitals.inventory", "blood_inventory", {"hospital_id": hospital_id}),
+        QueryShape("hospitals.inventory expiring soon", "blood_lots",
+                   {"hospital_id": hospital_id, "status": "available",
+                    "expiresAt": {"$gt": datetime.now(timezone.utc), "$lte": datetime.now(timezone.utc) + timedelta(days=7)}},
+                   sort={"expiresAt": 1}),
+        QueryShape("hospitals.inventory FEFO allocation", "blood_lots",
+                   {"hospital_id": hospital_id, "status": "available", "bloodType": "O+",
+                    "expiresAt": {"$gt": datetime.now(timezone.utc)}},
+                   sort={"expiresAt": 1}, limit=1),
+        QueryShape("hospitals.inventory search stock", "blood_inventory",
+                   {"bloodType": "B-", "unitsAvailable": {"$gt": 0}}),
+        QueryShape("hospitals.inventory search nearby", "hospitals",
+                   pipeline=[{"$geoNear": {"near": center, "key": "location", "distanceField": "distance_m",
+                                           "maxDistance": 50000, "spherical": True,
+                                           "query": {"_id": {"$in": ids["hospital_ids"]}}}},
+                             {"$limit": 20}],
+                   max_examined_ratio=8.0),
+        QueryShape("inventory.expiry sweep", "blood_lots",
+                   {"status": "available", "expiresAt": {"$lte": datetime.now(timezone.utc)}}, limit=500),
+        QueryShape("alerts.list first page", "alerts", {"status": "active"},
+                   sort={"created_at": -1, "_id": -1}, limit=51),
+        QueryShape("alerts.list next page", "alerts",
+                   {"$and": [{"status": "active"}, keyset_filter(
+                       encode_cursor(latest_alert, "created_at"), "created_at", descending=True
+                   )]},
+                   sort={"created_at": -1, "_id": -1}, limit=51),
+        # Geo scans examine donors of every group in the covered cells, so allow more slack
+        QueryShape("alerts.fan-out nearby donors", "donors",
+                   pipeline=compatible_donors_pipeline(center, "A-", radius_km=5, limit=200),
+                   max_examined_ratio=8.0),
+        QueryShape("admin.metrics active hospitals", "blood_requests",
+                   ACTIVE_REQUESTS_FILTER, distinct="hospital_id"),
+        QueryShape("admin.metrics alerts today", "alerts", alerts_since_filter(today)),
+        # _id range on the default index; status is filtered after the fetch
+        QueryShape("admin.metrics successful matches", "donor_responses",
+                   successful_matches_filter(today), max_examined_ratio=4.0),
+        QueryShape("admin.metrics response times", "donor_responses",
+                   pipeline=response_times_pipeline(today - timedelta(days=7))),
+        QueryShape("admin.metrics success rates", "blood_requests",
+                   pipeline=success_rates_pipeline(today - timedelta(days=90))),
+    ]
+
+def _find_key(document: Any, key: str) -> Optional[Any]:
+    """Depth-first search for the first occurrence of `key` in an explain document."""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        children = document.values()
+    elif isinstance(document, list):
+        children = document
+    else:
+        return None
+    for child in children:
+        found = _find_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+def _stages(document: Any) -> list[str]:
+    if isinstance(document, dict):
+        stages = [document["stage"]] if isinstance(document.get("stage"), str) else []
+        for key, child in document.items():
+            # Rejected plans never run; only the winning plan matters
+            if key != "rejectedPlans":
+                stages.extend(_stages(child))
+        return stages
+    if isinstance(document, list):
+        return [stage for child in document for stage in _stages(child)]
+    return []
+
+async def check_shape(database: Any, shape: QueryShape) -> Optional[str]:
+    """Returns a failure message for the shape, or None if its plan is acceptable."""
+    explain = await database.command({"explain": shape.command(), "verbosity": "executionStats"})
+
+    winning_plan = _find_key(explain, "winningPlan")
+    if "COLLSCAN" in _stages(winning_plan):
+        return "plan uses COLLSCAN"
+
+    stats = _find_key(explain, "executionStats") or {}
+    examined = stats.get("totalDocsExamined", 0)
+    returned = max(stats.get("nReturned", 0), 1)
+    ratio = examined / returned
+    if ratio > shape.max_examined_ratio:
+        return f"examined {examined} docs for {returned} results (ratio {ratio:.1f} > {shape.max_examined_ratio})"
+    return None
+
+async def run() -> int:
+    client = get_client()
+    database = client[SCRATCH_DB_NAME]
+    await client.drop_database(SCRATCH_DB_NAME)
+    try:
+        random.seed(42)
+        ids = {}
+        await ensure_indexes_async(database)
+        await seed(database, ids)
+
+        failures = 0
+        for shape in query_shapes(ids):
+            failure = await check_shape(database, shape)
+            if failure:
+                failures += 1
+                print(f"FAIL  {shape.name}: {failure}")
+            else:
+                print(f"ok    {shape.name}")
+        print(f"{failures} query-plan regression(s).")
+        return 1 if failures else 0
+    finally:
+        await client.drop_database(SCRATCH_DB_NAME)
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run()))
@@ -1,10 +1,26 @@
 # main.py
 import os
+import asyncio
 from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Any
-from db.conn import ensure_indexes_async, get_database
+from db.conn import connection_manager, ensure_indexes_async, get_database
+from services.notifications import drain_fan_outs
+from services.matching import backfill_compat_masks
+from services.events import start_event_source, stop_event_source
+from services.ranking import load_ranker
+from services.donor_store import start_donor_store, stop_donor_store
+from services.forecasting import forecaster
+from services.admin_metrics import admin_metrics
+from services.activity import activity_log
+from services.escalation import escalation_scheduler
+from services.governor import governor
+from services.inventory import start_inventory_sweeper, stop_inventory_sweeper
+from services.startup import startup_report
+from utils.security import password_executor
+from utils.metrics import MetricsMiddleware, registry, PROMETHEUS_CONTENT_TYPE
 from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import BaseModel
 from datetime import datetime, timezone
@@ -15,12 +31,48 @@ from bson import ObjectId
 async def lifespan(app: FastAPI):
     """
     Handles startup and shutdown events for the application.
-    This is where we ensure database indexes are created.
+    Only the background loops and the donor throttle state load before serving;
+    pool warm-up, indexes, models and caches load in the background (see
+    services/startup.py).
     """
     print("Application starting up...")
-    await ensure_indexes_async()
+    await startup_report.phase("mongo client", connection_manager.connect)
+    await startup_report.phase("background loops", _start_background_loops)
+    # One small scan; without it a restart would let alerts re-notify donors still inside their dedup window
+    await startup_report.phase("donor throttle state", governor.start)
+    await startup_report.warm_up([
+        [
+            ("mongo pool warm-up", connection_manager.warm_up),
+            ("indexes", ensure_indexes_async),
+            ("compat mask backfill", backfill_compat_masks),
+            ("escalation deadlines", escalation_scheduler.start),
+            ("activity log", activity_log.start),
+        ],
+        # joblib/sklearn unpickling is CPU-bound, keep it off the event loop
+        [("responder model", lambda: asyncio.to_thread(load_ranker))],
+        [("donor store", start_donor_store)],
+        [("forecasts", forecaster.start_warm)],
+    ])
+    startup_report.mark_ready()
     yield
     print("Application shutting down...")
+    await startup_report.stop()
+    await escalation_scheduler.stop()
+    await stop_inventory_sweeper()
+    await stop_event_source()
+    await stop_donor_store()
+    await forecaster.stop()
+    await admin_metrics.stop()
+    await drain_fan_outs()
+    await governor.stop()
+    await activity_log.stop()
+    password_executor.shutdown(wait=False)
+    connection_manager.close()
+
+def _start_background_loops():
+    admin_metrics.start()
+    start_inventory_sweeper()
+    start_event_source()
 
 # --- FastAPI App Initialization ---
 app = FastAPI(
@@ -40,12 +92,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Metrics Middleware ---
+# Added last so it is outermost and times the whole stack, CORS included.
+app.add_middleware(MetricsMiddleware)
+
 # --- Import Routers ---
 from api.routes.auth import router as auth_router
 from api.routes.register import router as register_router
 from api.routes.donors import router as donors_router
 from api.routes.hospitals import router as hospitals_router
 from api.routes.alerts import router as alerts_router
+from api.routes.forecast import router as forecast_router
+from api.routes.admin import router as admin_router
 
 # --- Register Routers ---
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
@@ -53,6 +111,8 @@ app.include_router(register_router, prefix="/register", tags=["Registration"])
 app.include_router(donors_router, prefix="/donors", tags=["Donors"])
 app.include_router(hospitals_router, prefix="/hospitals", tags=["Hospitals"])
 app.include_router(alerts_router, prefix="/alerts", tags=["Alerts"])
+app.include_router(forecast_router, prefix="/forecast", tags=["Forecasting"])
+app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 
 # --- Test Routes (Corrected for async) ---
 # Pydantic model for testing
@@ -68,6 +128,16 @@ def home():
     """Simple root endpoint to confirm the server is running."""
     return {"message": "Backend is running!"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint: route latency, MongoDB command timings, bcrypt and cache stats."""
+    return Response(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/startup", include_in_schema=False)
+def startup():
+    """Per-phase startup timings and whether the background warm-up has finished."""
+    return startup_report.to_dict()
+
 @app.get("/test-db")
 async def test_db(db: AsyncIOMotorClient = Depends(get_database)):
     """Tests the database connection by fetching a few donor documents."""
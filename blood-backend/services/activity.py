@@ -0,0 +1,131 @@
+# blood-backend/services/activity.py
+import os
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+from bson import ObjectId
+from pymongo.errors import CollectionInvalid
+from db.conn import db
+from utils.versioning import versions
+
+ACTIVITY_COLLECTION = "activity_log"
+ACTIVITY_LOG_MAX_BYTES = int(os.getenv("ACTIVITY_LOG_MAX_BYTES", str(16 * 1024 * 1024)))
+ACTIVITY_BUFFER_SIZE = int(os.getenv("ACTIVITY_BUFFER_SIZE", "1000"))
+ACTIVITY_FLUSH_SECONDS = float(os.getenv("ACTIVITY_FLUSH_SECONDS", "1"))
+ACTIVITY_FLUSH_BATCH = int(os.getenv("ACTIVITY_FLUSH_BATCH", "100"))
+# Only with a single worker does the in-memory ring hold every event; otherwise
+# reads go to the capped collection, which all workers write to
+ACTIVITY_SINGLE_WORKER = os.getenv("ACTIVITY_SINGLE_WORKER", "false").lower() == "true"
+
+def hospital_label(user: dict) -> str:
+    """Display name for a hospital document or authenticated hospital profile."""
+    return user.get("hospitalName") or user.get("name") or "Unknown hospital"
+
+class ActivityLog:
+    """
+    Append-only network activity feed.
+
+    `record` is synchronous and O(1): the event goes into an in-memory ring
+    and a pending list that a background task writes to a capped collection
+    with one insert_many per flush. Callers never wait on MongoDB.
+
+    Reads come from the capped collection, so every worker's events are
+    visible (about ACTIVITY_FLUSH_SECONDS after they happen). With
+    ACTIVITY_SINGLE_WORKER the ring serves them instead, without a query.
+    """
+
+    def __init__(self, buffer_size: int = ACTIVITY_BUFFER_SIZE):
+        self._ring: deque[dict] = deque(maxlen=buffer_size)
+        self._pending: list[dict] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, type: str, description: str, status: str = "success", location: str = ""):
+        # ObjectIds generated in one process increase monotonically, so they double as the tail cursor
+        event = {
+            "_id": ObjectId(),
+            "type": type,
+            "description": description,
+            "timestamp": datetime.now(timezone.utc),
+            "status": status,
+            "location": location,
+        }
+        self._ring.append(event)
+        self._pending.append(event)
+        if ACTIVITY_SINGLE_WORKER:
+            # Reads come from the ring, so the event is visible right away
+            versions.bump(ACTIVITY_COLLECTION)
+        if len(self._pending) >= ACTIVITY_FLUSH_BATCH:
+            self._wakeup.set()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await db[ACTIVITY_COLLECTION].insert_many(batch, ordered=False)
+        except Exception as e:
+            print(f"Activity log flush failed ({len(batch)} events): {e}")
+            # Keep the newest events for the next attempt, bounded by the ring size
+            self._pending = (batch + self._pending)[-self._ring.maxlen:]
+            return
+        if not ACTIVITY_SINGLE_WORKER:
+            # Only now can collection reads see the events; bumping earlier would
+            # let a poll tag pre-flush data with the new ETag
+            versions.bump(ACTIVITY_COLLECTION)
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=ACTIVITY_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def _ensure_collection(self):
+        try:
+            await db.create_collection(ACTIVITY_COLLECTION, capped=True, size=ACTIVITY_LOG_MAX_BYTES)
+        except CollectionInvalid:
+            pass  # already exists
+
+    async def start(self):
+        """Creates the capped collection, warms the ring (single worker) and starts the writer."""
+        try:
+            await self._ensure_collection()
+            if ACTIVITY_SINGLE_WORKER:
+                recent = await db[ACTIVITY_COLLECTION].find().sort("_id", -1).limit(self._ring.maxlen).to_list(length=None)
+                self._ring.extendleft(recent)  # extendleft reverses, restoring oldest-first order
+        except Exception as e:
+            print(f"Activity log warm-up failed: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def read(self, after: Optional[ObjectId] = None, limit: int = 50) -> list[dict]:
+        """
+        Returns up to `limit` events, newest first. With `after`, only events
+        newer than that id, oldest of them first in the page so a reader that
+        keeps passing the newest id it has seen never skips events. (Across
+        workers, ids are only ordered to the second, so an event flushed late
+        by another worker can fall behind a cursor that already passed it.)
+        """
+        if ACTIVITY_SINGLE_WORKER and (after is None or (self._ring and self._ring[0]["_id"] <= after)):
+            if after is None:
+                return list(reversed(list(self._ring)[-limit:]))
+            newer = [event for event in self._ring if event["_id"] > after][:limit]
+            return list(reversed(newer))
+
+        collection = db[ACTIVITY_COLLECTION]
+        if after is None:
+            return await collection.find().sort("_id", -1).limit(limit).to_list(length=limit)
+        newer = await collection.find({"_id": {"$gt": after}}).sort("_id", 1).limit(limit).to_list(length=limit)
+        return list(reversed(newer))
+
+activity_log = ActivityLog()
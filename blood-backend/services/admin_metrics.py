@@ -0,0 +1,208 @@
+# blood-backend/services/admin_metrics.py
+import os
+import time
+import shutil
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from bson import ObjectId
+from db.conn import db, analytics_db
+from utils.metrics import http_request_duration
+
+ADMIN_METRICS_REFRESH_SECONDS = float(os.getenv("ADMIN_METRICS_REFRESH_SECONDS", "30"))
+DB_DEGRADED_PING_MS = float(os.getenv("DB_DEGRADED_PING_MS", "100"))
+RECENT_ALERTS = 5
+
+PROCESS_STARTED = time.time()
+
+try:
+    import psutil
+except ImportError:  # optional; fall back to /proc and load average
+    psutil = None
+
+# --- Live measurements ---
+def api_response_time_ms() -> float:
+    """Median request latency across every route."""
+    return http_request_duration.combined().quantile(0.5) * 1000
+
+def cpu_percent() -> float:
+    if psutil is not None:
+        return psutil.cpu_percent(interval=None)
+    load_1m = os.getloadavg()[0]
+    return min(100.0, load_1m / (os.cpu_count() or 1) * 100)
+
+def memory_percent() -> float:
+    if psutil is not None:
+        return psutil.virtual_memory().percent
+    try:
+        with open("/proc/meminfo") as f:
+            info = {line.split(":")[0]: int(line.split()[1]) for line in f}
+        return (1 - info["MemAvailable"] / info["MemTotal"]) * 100
+    except (OSError, KeyError, ValueError):
+        return 0.0
+
+def storage_percent() -> float:
+    usage = shutil.disk_usage("/")
+    return usage.used / usage.total * 100
+
+def uptime() -> str:
+    seconds = int(time.time() - PROCESS_STARTED)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    return f"{days}d {hours}h {seconds // 60}m"
+
+def format_minutes(minutes: Optional[float]) -> str:
+    return "N/A" if minutes is None else f"{round(max(minutes, 0.0), 1)} min"
+
+def _since(moment: datetime) -> dict:
+    """Matches documents created after `moment` using the default _id index."""
+    return {"_id": {"$gte": ObjectId.from_datetime(moment)}}
+
+# --- Query builders (also explained by db/query_plans.py) ---
+def response_times_pipeline(since: datetime) -> list:
+    """Donor responses since `since`, joined to their request, averaged per urgency."""
+    return [
+        {"$match": _since(since)},
+        {"$lookup": {
+            "from": "blood_requests",
+            "localField": "request_id",
+            "foreignField": "_id",
+            "as": "request",
+        }},
+        {"$unwind": "$request"},
+        {"$group": {
+            "_id": "$request.urgency",
+            "minutes": {"$avg": {"$divide": [
+                {"$subtract": [{"$ifNull": ["$respondedAt", {"$toDate": "$_id"}]}, "$request.requestedAt"]},
+                60000
+            ]}},
+            "count": {"$sum": 1},
+        }},
+    ]
+
+def success_rates_pipeline(since: datetime) -> list:
+    return [
+        {"$match": _since(since)},
+        {"$group": {
+            "_id": "$bloodType",
+            "total": {"$sum": 1},
+            "completed": {"$sum": {"$cond": [{"$eq": ["$status", "Completed"]}, 1, 0]}},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+# distinct("hospital_id") over this filter counts hospitals with open requests
+ACTIVE_REQUESTS_FILTER = {"status": "Active"}
+
+def alerts_since_filter(moment: datetime) -> dict:
+    return {"created_at": {"$gte": moment}}
+
+def successful_matches_filter(since: datetime) -> dict:
+    return {**_since(since), "status": {"$in": ["Confirmed", "Completed"]}}
+
+class AdminMetricsEngine:
+    """
+    Materialized admin counters, recomputed by one background task.
+    Dashboard reads are served from memory, so polling never triggers
+    collection-wide counts.
+    """
+
+    def __init__(self):
+        self.counters: dict = {}
+        self.refreshed_at: Optional[datetime] = None
+        self.generation = 0
+        self.db_status = "Offline"
+        self.db_ping_ms: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _ping(self):
+        started = time.perf_counter()
+        try:
+            await db.command("ping")
+        except Exception:
+            self.db_status, self.db_ping_ms = "Offline", None
+            return
+        self.db_ping_ms = (time.perf_counter() - started) * 1000
+        self.db_status = "Normal" if self.db_ping_ms < DB_DEGRADED_PING_MS else "Degraded"
+
+    async def _response_times(self, since: datetime) -> dict:
+        """Average minutes from request to donor response, overall and per urgency."""
+        rows = await analytics_db.donor_responses.aggregate(response_times_pipeline(since)).to_list(length=None)
+        total = sum(row["count"] for row in rows)
+        overall = sum(row["minutes"] * row["count"] for row in rows) / total if total else None
+        return {"overall": overall, "by_urgency": {row["_id"]: row["minutes"] for row in rows}}
+
+    async def _success_rates(self, since: datetime) -> list[dict]:
+        rows = await analytics_db.blood_requests.aggregate(success_rates_pipeline(since)).to_list(length=None)
+        return [
+            {"blood_type": row["_id"], "success_rate": round(row["completed"] / row["total"] * 100)}
+            for row in rows if row["_id"]
+        ]
+
+    async def _recent_alerts(self) -> list[dict]:
+        cursor = analytics_db.alerts.find(
+            {}, {"blood_group": 1, "status": 1, "donors_notified": 1, "responses": 1, "created_at": 1}
+        ).sort("created_at", -1).limit(RECENT_ALERTS)
+        return await cursor.to_list(length=RECENT_ALERTS)
+
+    async def refresh(self):
+        now = datetime.now(timezone.utc)
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        week_ago = now - timedelta(days=7)
+
+        (
+            _, total_donors, hospital_partners, system_admins, active_hospitals,
+            alerts_today, successful_matches, new_donors_this_week, pending_verification,
+            response_times_by_urgency, success_rates, recent_alerts,
+        ) = await asyncio.gather(
+            self._ping(),
+            analytics_db.donors.estimated_document_count(),
+            analytics_db.hospitals.estimated_document_count(),
+            analytics_db.admins.estimated_document_count(),
+            analytics_db.blood_requests.distinct("hospital_id", ACTIVE_REQUESTS_FILTER),
+            analytics_db.alerts.count_documents(alerts_since_filter(today)),
+            analytics_db.donor_responses.count_documents(successful_matches_filter(today)),
+            analytics_db.donors.count_documents(_since(week_ago)),
+            analytics_db.hospitals.count_documents({"verified": False}),
+            self._response_times(week_ago),
+            self._success_rates(now - timedelta(days=90)),
+            self._recent_alerts(),
+        )
+
+        self.counters = {
+            "total_donors": total_donors,
+            "hospital_partners": hospital_partners,
+            "system_admins": system_admins,
+            "active_hospitals": len(active_hospitals),
+            "alerts_today": alerts_today,
+            "successful_matches": successful_matches,
+            "new_donors_this_week": new_donors_this_week,
+            "pending_hospital_verification": pending_verification,
+            "average_response_minutes": response_times_by_urgency["overall"],
+            "response_minutes_by_urgency": response_times_by_urgency["by_urgency"],
+            "success_rates": success_rates,
+            "recent_alerts": recent_alerts,
+        }
+        self.refreshed_at = now
+        self.generation += 1
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Admin metrics refresh failed: {e}")
+            await asyncio.sleep(ADMIN_METRICS_REFRESH_SECONDS)
+
+    def start(self):
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)  # first call only primes the counter
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+admin_metrics = AdminMetricsEngine()
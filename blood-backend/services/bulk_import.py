@@ -0,0 +1,231 @@
+# blood-backend/services/bulk_import.py
+import os
+import csv
+import json
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Type
+from pydantic import BaseModel, ValidationError
+from pymongo.errors import BulkWriteError
+from utils.security import hash_password_async, is_password_hash
+
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "1000"))
+# Keep the report bounded even if every row of a huge file fails
+MAX_REPORTED_ERRORS = int(os.getenv("BULK_IMPORT_MAX_REPORTED_ERRORS", "10000"))
+
+DUPLICATE_KEY_ERROR = 11000
+
+class BulkImportAborted(Exception):
+    """The upload can't be read past this point; rows before it may already be imported."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.report: Optional["BulkImportReport"] = None
+
+def _decode_line(raw: bytes, line_number: int) -> str:
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise BulkImportAborted(f"Line {line_number} is not valid UTF-8") from e
+
+async def iter_lines(chunks: AsyncIterator[bytes], keepends: bool = False) -> AsyncIterator[str]:
+    """Splits a streamed request body into lines without buffering the whole body."""
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            text = _decode_line(line, line_number)
+            yield text + "\n" if keepends else text.rstrip("\r")
+    if buffer:
+        text = _decode_line(buffer, line_number + 1)
+        yield text if keepends else text.rstrip("\r")
+
+class _RecordFeed:
+    """The line iterator csv.reader pulls from; only ever holds complete records."""
+
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[Optional[list[str]], Optional[str]]]:
+    """
+    Yields (values, parse_error) per CSV record, parsed by one csv.reader over
+    the stream. Quoted fields may span lines: lines are held back until their
+    quotes balance, so the reader is only ever handed whole records.
+    """
+    feed = _RecordFeed()
+    reader = csv.reader(feed)
+    pending: list[str] = []
+    quotes = 0
+    async for line in iter_lines(chunks, keepends=True):
+        if not pending and not line.strip():
+            continue
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            if sum(len(part) for part in pending) > csv.field_size_limit():
+                yield None, "Unterminated quoted field"
+                pending, quotes = [], 0
+            continue
+
+        feed.lines.extend(pending)
+        pending, quotes = [], 0
+        try:
+            yield next(reader), None
+        except csv.Error as e:
+            feed.lines.clear()
+            yield None, f"Invalid CSV: {e}"
+    if pending:
+        yield None, "Unterminated quoted field"
+
+async def iter_rows(chunks: AsyncIterator[bytes], content_type: str) -> AsyncIterator[tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yields (row_number, row, parse_error) for a CSV (with header) or NDJSON body.
+    Blank lines are skipped and not counted as rows.
+    """
+    row_number = 0
+
+    if "csv" in content_type:
+        header = None
+        async for values, error in iter_csv_records(chunks):
+            if header is None:
+                if error:
+                    raise BulkImportAborted(f"Header row could not be parsed: {error}")
+                header = [name.strip() for name in values]
+                continue
+            row_number += 1
+            if error:
+                yield row_number, None, error
+                continue
+            if len(values) != len(header):
+                yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            # Empty CSV cells mean "not provided" for optional fields
+            yield row_number, {k: (v if v != "" else None) for k, v in zip(header, values)}, None
+        return
+
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(row, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+        yield row_number, row, None
+
+async def hash_if_needed(password: str) -> str:
+    """Hashes a plain password on the bcrypt executor; pre-hashed values pass through."""
+    if is_password_hash(password):
+        return password
+    return await hash_password_async(password)
+
+class BulkImportReport:
+    """Accumulates per-row outcomes for one import."""
+
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def add_error(self, row_number: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    def to_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+def _validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    field = ".".join(str(part) for part in first.get("loc", ()))
+    return f"{field}: {first.get('msg')}" if field else first.get("msg", "Invalid row")
+
+async def _insert_batch(collection: Any, batch: list[tuple[int, BaseModel]], prepare: Callable[[Any], Awaitable[dict]], report: BulkImportReport) -> list[dict]:
+    # Hash every password in the batch in parallel on the bcrypt executor
+    documents = await asyncio.gather(*(prepare(item) for _, item in batch))
+
+    try:
+        await collection.insert_many(documents, ordered=False)
+        report.inserted += len(documents)
+        return documents
+    except BulkWriteError as e:
+        details = e.details
+        report.inserted += details.get("nInserted", 0)
+        failed_indexes = set()
+        for write_error in details.get("writeErrors", []):
+            index = write_error["index"]
+            failed_indexes.add(index)
+            if write_error.get("code") == DUPLICATE_KEY_ERROR:
+                message = "An account with this email, phone, or registration number already exists."
+            else:
+                message = write_error.get("errmsg", "Write failed")
+            report.add_error(batch[index][0], message)
+        return [doc for i, doc in enumerate(documents) if i not in failed_indexes]
+
+async def bulk_import(
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    model: Type[BaseModel],
+    collection: Any,
+    prepare: Callable[[Any], Awaitable[dict]],
+    on_inserted: Optional[Callable[[list[dict]], Any]] = None,
+) -> BulkImportReport:
+    """
+    Streams rows from the body, validates them against `model`, and writes
+    them with unordered insert_many batches. Duplicates are detected by the
+    unique indexes rather than per-row lookups. Raises BulkImportAborted when
+    the body itself can't be read.
+    """
+    report = BulkImportReport()
+    batch: list[tuple[int, BaseModel]] = []
+
+    async def flush():
+        inserted = await _insert_batch(collection, batch, prepare, report)
+        if on_inserted and inserted:
+            on_inserted(inserted)
+
+    try:
+        async for row_number, row, error in iter_rows(chunks, content_type):
+            report.received += 1
+            if error:
+                report.add_error(row_number, error)
+                continue
+            try:
+                batch.append((row_number, model.model_validate(row)))
+            except ValidationError as e:
+                report.add_error(row_number, _validation_message(e))
+                continue
+
+            if len(batch) >= BULK_IMPORT_BATCH_SIZE:
+                await flush()
+                batch = []
+    except BulkImportAborted as e:
+        # Batches flushed before the unreadable line stay imported
+        e.report = report
+        raise
+
+    if batch:
+        await flush()
+    return report
@@ -0,0 +1,356 @@
+# blood-backend/services/donor_store.py
+"""
+In-memory donor feature store for alert fan-out and responder ranking.
+
+Sanity check of the id round-trip, upserts, removes and compaction (offline):
+
+    python -m services.donor_store check
+"""
+import os
+import sys
+import math
+import asyncio
+from datetime import date, datetime
+from typing import Any, Iterable, Optional
+import numpy as np
+from bson import ObjectId
+from db.conn import analytics_db
+from utils.blood import BLOOD_GROUPS, COMPATIBLE_DONORS, normalize_blood_group
+from utils.geo import haversine_km, to_geojson_point
+
+DONOR_STORE_ENABLED = os.getenv("DONOR_STORE_ENABLED", "true").lower() == "true"
+# Full reloads pick up writes made by other workers
+DONOR_STORE_REFRESH_SECONDS = float(os.getenv("DONOR_STORE_REFRESH_SECONDS", "300"))
+LOAD_BATCH_SIZE = 10000
+
+UNKNOWN_BLOOD = len(BLOOD_GROUPS)
+BLOOD_CODES = {group: code for code, group in enumerate(BLOOD_GROUPS)}
+# COMPATIBILITY[recipient, donor] is True if donor can give to recipient.
+# The extra last column is for donors with an unknown group, who never match.
+COMPATIBILITY = np.zeros((len(BLOOD_GROUPS), len(BLOOD_GROUPS) + 1), dtype=bool)
+for _recipient, _donors in COMPATIBLE_DONORS.items():
+    for _donor in _donors:
+        COMPATIBILITY[BLOOD_CODES[_recipient], BLOOD_CODES[_donor]] = True
+
+GENDER_CODES = {"F": 0, "M": 1, "O": 2}
+MISSING_DAY = np.iinfo(np.int32).min
+
+STORE_PROJECTION = {
+    "_id": 1, "location": 1, "blood_group": 1, "is_available": 1, "age": 1, "gender": 1,
+    "last_donation_date": 1, "past_response_rate": 1, "donation_frequency_per_year": 1,
+}
+
+# Column name -> dtype. About 40 bytes per donor in the columns (~20 MB at 500k),
+# plus the id -> row dict (~150 bytes per donor).
+COLUMNS = {
+    # Raw ObjectId bytes. "V12" rather than "S12": the S dtype strips trailing NULs.
+    "id": "V12",
+    "lat": np.float32,
+    "lon": np.float32,
+    "blood": np.int8,
+    "available": bool,
+    "alive": bool,
+    "age": np.float32,
+    "gender": np.int8,
+    "last_donation_day": np.int32,
+    "response_rate": np.float32,
+    "donation_frequency": np.float32,
+}
+
+def _to_float(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def _epoch_day(value: Any) -> int:
+    """Days since 1970-01-01 for a date, datetime or ISO date string."""
+    if isinstance(value, str):
+        try:
+            value = date.fromisoformat(value[:10])
+        except ValueError:
+            return MISSING_DAY
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return (value - date(1970, 1, 1)).days
+    return MISSING_DAY
+
+def _row_values(doc: dict) -> Optional[dict]:
+    """Extracts one donor's feature values; None if the donor has no usable location."""
+    point = to_geojson_point(doc.get("location"))
+    if point is None:
+        return None
+    lon, lat = point["coordinates"]
+    blood_group = doc.get("blood_group")
+    return {
+        "id": ObjectId(doc["_id"]).binary,
+        "lat": lat,
+        "lon": lon,
+        "blood": BLOOD_CODES.get(normalize_blood_group(blood_group), UNKNOWN_BLOOD) if blood_group else UNKNOWN_BLOOD,
+        "available": doc.get("is_available") is not False,
+        "alive": True,
+        "age": _to_float(doc.get("age")),
+        "gender": GENDER_CODES.get(str(doc.get("gender") or "")[:1].upper(), -1),
+        "last_donation_day": _epoch_day(doc.get("last_donation_date")),
+        "response_rate": _to_float(doc.get("past_response_rate")),
+        "donation_frequency": _to_float(doc.get("donation_frequency_per_year")),
+    }
+
+def object_ids(raw_ids: np.ndarray) -> list[ObjectId]:
+    return [ObjectId(raw.tobytes()) for raw in raw_ids]
+
+def blood_groups(codes: np.ndarray) -> list[Optional[str]]:
+    return [BLOOD_GROUPS[code] if code < UNKNOWN_BLOOD else None for code in codes]
+
+class DonorFeatureStore:
+    """
+    Columnar, NumPy-backed copy of the donor fields that matching and ranking need.
+    Rows are appended in amortized O(1); updates and deletes find a donor's live row
+    through an id -> row dict. Deleted rows are tombstoned and compacted lazily.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._rows: dict[bytes, int] = {}
+        self.size = 0
+        self.tombstones = 0
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return self.size - self.tombstones
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self._columns.values())
+
+    def _column(self, name: str) -> np.ndarray:
+        return self._columns[name][:self.size]
+
+    def _reserve(self, extra: int):
+        capacity = len(self._columns["id"])
+        if self.size + extra <= capacity:
+            return
+        new_capacity = max(capacity * 2, self.size + extra)
+        for name, column in self._columns.items():
+            grown = np.zeros(new_capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self._columns[name] = grown
+
+    def _kill(self, row: int):
+        self._columns["alive"][row] = False
+        self.tombstones += 1
+
+    def append_many(self, docs: Iterable[dict]):
+        """Appends donors known to be new (initial load, registration, bulk import)."""
+        rows = [values for values in (_row_values(doc) for doc in docs) if values is not None]
+        if not rows:
+            return
+        self._reserve(len(rows))
+        start, end = self.size, self.size + len(rows)
+        for name in COLUMNS:
+            self._columns[name][start:end] = [row[name] for row in rows]
+        for row, values in enumerate(rows, start):
+            # A repeated id replaces the earlier row rather than duplicating the donor
+            previous = self._rows.get(values["id"])
+            if previous is not None:
+                self._kill(previous)
+            self._rows[values["id"]] = row
+        self.size = end
+
+    def upsert(self, doc: dict):
+        """Inserts or replaces one donor after a profile write."""
+        self.remove(doc["_id"])
+        self.append_many([doc])
+
+    def remove(self, donor_id: Any):
+        row = self._rows.pop(ObjectId(donor_id).binary, None)
+        if row is None:
+            return
+        self._kill(row)
+        if self.tombstones > max(1024, self.size // 4):
+            self.compact()
+
+    def compact(self):
+        keep = np.flatnonzero(self._column("alive"))
+        for name, column in self._columns.items():
+            column[:len(keep)] = column[keep]
+        self.size = len(keep)
+        self.tombstones = 0
+        ids = self._column("id")
+        self._rows = {ids[row].tobytes(): row for row in range(self.size)}
+
+    def query(
+        self, lat: float, lon: float, radius_km: float, recipient_group: str, min_radius_km: float = 0.0
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Rows of available donors compatible with `recipient_group` within `radius_km`
+        (and beyond `min_radius_km`, for escalation rings), and their distances.
+        A bounding-box prefilter limits the trig to nearby rows.
+        """
+        code = BLOOD_CODES.get(normalize_blood_group(recipient_group))
+        if code is None or self.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        lats = self._column("lat")
+        lons = self._column("lon")
+        dlat = radius_km / 111.0
+        dlon = radius_km / (111.0 * max(math.cos(math.radians(lat)), 1e-6))
+
+        mask = self._column("alive") & self._column("available")
+        mask &= COMPATIBILITY[code][self._column("blood")]
+        mask &= np.abs(lats - lat) <= dlat
+        mask &= np.abs(lons - lon) <= dlon
+
+        rows = np.flatnonzero(mask)
+        distances = haversine_km(lat, lon, lats[rows], lons[rows])
+        within = distances <= radius_km
+        if min_radius_km > 0:
+            within &= distances > min_radius_km
+        return rows[within], distances[within]
+
+    def nearest(
+        self, lat: float, lon: float, radius_km: float, recipient_group: str, limit: int, min_radius_km: float = 0.0
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Like query(), but only the `limit` closest rows, nearest first."""
+        rows, distances = self.query(lat, lon, radius_km, recipient_group, min_radius_km)
+        if len(rows) > limit:
+            closest = np.argpartition(distances, limit - 1)[:limit]
+            rows, distances = rows[closest], distances[closest]
+        order = np.argsort(distances)
+        return rows[order], distances[order]
+
+    def donor_ids(self, rows: np.ndarray) -> list[ObjectId]:
+        return object_ids(self._columns["id"][rows])
+
+    def blood_groups(self, rows: np.ndarray) -> list[Optional[str]]:
+        return blood_groups(self._columns["blood"][rows])
+
+    def identities(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Copies of the rows' raw ids and blood codes. Row numbers change when the
+        store compacts, so callers that await between nearest() and reading the
+        ids take these first (cheaper than building ObjectIds for every row).
+        """
+        return self._columns["id"][rows], self._columns["blood"][rows]
+
+    def features(self, rows: np.ndarray) -> dict[str, np.ndarray]:
+        """The per-column arrays the responder ranker expects, for the given rows."""
+        days = self._columns["last_donation_day"][rows].astype("datetime64[D]")
+        days[self._columns["last_donation_day"][rows] == MISSING_DAY] = np.datetime64("NaT")
+        return {
+            "age": self._columns["age"][rows].astype(float),
+            "gender_code": self._columns["gender"][rows].astype(float),
+            "last_donation_date": days,
+            "donation_frequency_per_year": self._columns["donation_frequency"][rows].astype(float),
+            "past_response_rate": self._columns["response_rate"][rows].astype(float),
+        }
+
+donor_store = DonorFeatureStore()
+
+async def build_store() -> DonorFeatureStore:
+    """Streams every donor from Mongo into a fresh store."""
+    store = DonorFeatureStore()
+    batch = []
+    async for doc in analytics_db.donors.find({}, STORE_PROJECTION).batch_size(LOAD_BATCH_SIZE):
+        batch.append(doc)
+        if len(batch) >= LOAD_BATCH_SIZE:
+            store.append_many(batch)
+            batch = []
+    store.append_many(batch)
+    store.loaded = True
+    return store
+
+# Writes that land while a reload is streaming are journaled and replayed onto the new store
+_rebuilding = False
+_journal: list[tuple[str, Any]] = []
+
+async def load_donor_store():
+    """(Re)loads the store in the background and swaps it in once complete."""
+    global donor_store, _rebuilding
+    _rebuilding = True
+    _journal.clear()
+    try:
+        fresh = await build_store()
+    except Exception as e:
+        print(f"Failed to load donor feature store: {e}")
+        return
+    finally:
+        _rebuilding = False
+
+    for operation, payload in _journal:
+        _apply(fresh, operation, payload)
+    _journal.clear()
+
+    donor_store = fresh
+    print(f"Donor feature store loaded: {len(fresh)} donors, {fresh.nbytes / 1e6:.1f} MB.")
+
+def _apply(store: DonorFeatureStore, operation: str, payload: Any):
+    if operation == "insert":
+        store.append_many(payload)
+    elif operation == "upsert":
+        store.upsert(payload)
+    elif operation == "remove":
+        store.remove(payload)
+
+def _record(operation: str, payload: Any):
+    _apply(donor_store, operation, payload)
+    if _rebuilding:
+        _journal.append((operation, payload))
+
+# --- Write hooks, called by the routes after a successful DB write ---
+def record_donors_inserted(docs: list[dict]):
+    _record("insert", docs)
+
+def record_donor_updated(doc: dict):
+    _record("upsert", doc)
+
+def record_donor_removed(donor_id: Any):
+    _record("remove", donor_id)
+
+def get_donor_store() -> DonorFeatureStore:
+    return donor_store
+
+async def _refresh_loop():
+    while True:
+        await asyncio.sleep(DONOR_STORE_REFRESH_SECONDS)
+        await load_donor_store()
+
+_refresh_task: Optional[asyncio.Task] = None
+
+async def start_donor_store():
+    global _refresh_task
+    if not DONOR_STORE_ENABLED:
+        return
+    await load_donor_store()
+    _refresh_task = asyncio.create_task(_refresh_loop())
+
+async def stop_donor_store():
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        _refresh_task = None
+
+def check():
+    """Round-trips donor ids (including ones ending in NUL bytes) through the store."""
+    location = {"type": "Point", "coordinates": [88.3639, 22.5726]}
+    ids = [ObjectId(bytes(11) + b"\x00"), ObjectId(b"\x01" * 10 + bytes(2)), *(ObjectId() for _ in range(2000))]
+    store = DonorFeatureStore(capacity=16)
+    store.append_many({"_id": donor_id, "location": location, "blood_group": "O-"} for donor_id in ids)
+    rows, _ = store.query(22.5726, 88.3639, 1.0, "AB+")
+    assert sorted(store.donor_ids(rows)) == sorted(ids), "ids did not round-trip"
+
+    store.upsert({"_id": ids[0], "location": location, "blood_group": "O-", "is_available": False})
+    for donor_id in ids[1:1500]:
+        store.remove(donor_id)
+    assert store.tombstones < 1500, "compaction did not run"
+    rows, _ = store.query(22.5726, 88.3639, 1.0, "AB+")
+    assert sorted(store.donor_ids(rows)) == sorted(ids[1500:]), "ids wrong after upsert/remove/compact"
+    assert len(store) == len(ids) - 1499
+    print(f"Donor store check passed ({len(ids)} donors).")
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["check"]:
+        print("usage: python -m services.donor_store check")
+        sys.exit(2)
+    check()
@@ -0,0 +1,219 @@
+# blood-backend/services/escalation.py
+import os
+import heapq
+import asyncio
+from datetime import datetime, timedelta, timezone
+from itertools import count
+from typing import Any, Optional
+from pymongo import ReturnDocument
+from db.conn import db
+from utils.geo import to_geojson_point
+from services.notifications import (
+    fan_out_alert, AUTO_ESCALATION_MINUTES, ALERT_SEARCH_RADIUS_KM, BACKUP_HOSPITAL_RANGE_KM
+)
+from services.events import publish_local
+from services.activity import activity_log
+from services.governor import governor
+from services.inventory import search_nearby_stock
+
+# Search radius per escalation level; level 0 is the initial fan-out
+ESCALATION_RADII_KM = [
+    float(radius) for radius in
+    os.getenv("ESCALATION_RADII_KM", f"{ALERT_SEARCH_RADIUS_KM:g},25,{BACKUP_HOSPITAL_RANGE_KM:g}").split(",")
+]
+URGENCY_LEVELS = ["Low", "Medium", "High", "Critical"]
+# Due escalations handled concurrently per scheduler tick
+ESCALATION_BATCH_SIZE = int(os.getenv("ESCALATION_BATCH_SIZE", "100"))
+# Backup hospitals attached to a blood request each time its ring widens
+ESCALATION_BACKUP_LIMIT = int(os.getenv("ESCALATION_BACKUP_LIMIT", "10"))
+
+# Open statuses per collection; anything else is resolved and never escalates
+OPEN_STATUS = {"alerts": "active", "blood_requests": "Active"}
+
+def bump_urgency(urgency: Optional[str]) -> str:
+    level = URGENCY_LEVELS.index(urgency) if urgency in URGENCY_LEVELS else 1
+    return URGENCY_LEVELS[min(level + 1, len(URGENCY_LEVELS) - 1)]
+
+def _utc(moment: datetime) -> datetime:
+    # Motor returns naive datetimes that are already UTC
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+def escalation_fields(now: Optional[datetime] = None) -> dict:
+    """Fields a new alert or blood request starts with; empty when escalation is disabled."""
+    if AUTO_ESCALATION_MINUTES <= 0 or len(ESCALATION_RADII_KM) < 2:
+        return {}
+    now = now or datetime.now(timezone.utc)
+    return {
+        "escalation_level": 0,
+        "search_radius_km": ESCALATION_RADII_KM[0],
+        "escalate_at": now + timedelta(minutes=AUTO_ESCALATION_MINUTES),
+    }
+
+class EscalationScheduler:
+    """
+    One task and one heap of (deadline, collection, _id) for every open alert
+    and blood request, so 10k open alerts cost 10k heap entries, not 10k
+    sleeping coroutines. Rescheduling and cancelling are lazy: stale heap
+    entries are skipped when popped.
+
+    MongoDB stays the source of truth. Each escalation is a conditional
+    find_one_and_update on `escalate_at`, so a restart (or a second worker)
+    never escalates the same deadline twice.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, str, Any]] = []
+        self._deadlines: dict[tuple[str, Any], float] = {}
+        self._sequence = count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, collection: str, doc_id: Any, due: datetime):
+        due_ts = _utc(due).timestamp()
+        self._deadlines[(collection, doc_id)] = due_ts
+        heapq.heappush(self._heap, (due_ts, next(self._sequence), collection, doc_id))
+        if self._heap[0][0] == due_ts:
+            self._wakeup.set()  # new earliest deadline
+
+    def cancel(self, collection: str, doc_id: Any):
+        self._deadlines.pop((collection, doc_id), None)
+
+    def _pop_due(self, now_ts: float) -> list[tuple[str, Any]]:
+        due = []
+        while self._heap and self._heap[0][0] <= now_ts and len(due) < ESCALATION_BATCH_SIZE:
+            due_ts, _, collection, doc_id = heapq.heappop(self._heap)
+            if self._deadlines.get((collection, doc_id)) == due_ts:
+                del self._deadlines[(collection, doc_id)]
+                due.append((collection, doc_id))
+        return due
+
+    async def _claim(self, collection: str, doc_id: Any) -> Optional[dict]:
+        """Atomically moves a still-open document to its next escalation level."""
+        now = datetime.now(timezone.utc)
+        current = await db[collection].find_one(
+            {"_id": doc_id, "status": OPEN_STATUS[collection], "escalate_at": {"$lte": now}},
+            {"escalation_level": 1, "urgency": 1}
+        )
+        if not current:
+            return None
+
+        level = current.get("escalation_level", 0) + 1
+        update = {"$set": {
+            "escalation_level": level,
+            "search_radius_km": ESCALATION_RADII_KM[min(level, len(ESCALATION_RADII_KM) - 1)],
+            "urgency": bump_urgency(current.get("urgency")),
+            "escalated_at": now,
+        }}
+        if level + 1 < len(ESCALATION_RADII_KM):
+            update["$set"]["escalate_at"] = now + timedelta(minutes=AUTO_ESCALATION_MINUTES)
+        else:
+            update["$unset"] = {"escalate_at": ""}  # outermost ring reached
+
+        return await db[collection].find_one_and_update(
+            {
+                "_id": doc_id, "status": OPEN_STATUS[collection],
+                "escalation_level": current.get("escalation_level", 0), "escalate_at": {"$lte": now},
+            },
+            update,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _find_backup_hospitals(self, request: dict, radius_km: float) -> tuple[list[dict], str]:
+        """Other hospitals within the request's new ring that hold enough of the requested blood type."""
+        hospital = await db.hospitals.find_one({"_id": request["hospital_id"]}, {"location": 1, "hospitalName": 1, "name": 1})
+        label = (hospital or {}).get("hospitalName") or (hospital or {}).get("name") or "Unknown hospital"
+        point = to_geojson_point((hospital or {}).get("location"))
+        if point is None:
+            return [], label
+        backups = await search_nearby_stock(
+            point, request["bloodType"], max(request.get("unitsRequested") or 1, 1), radius_km,
+            ESCALATION_BACKUP_LIMIT, exclude_id=request["hospital_id"]
+        )
+        for backup in backups:
+            backup["hospital_id"] = str(backup["hospital_id"])
+        return backups, label
+
+    async def _escalate(self, collection: str, doc_id: Any):
+        doc = await self._claim(collection, doc_id)
+        if doc is None:
+            return
+        if doc.get("escalate_at"):
+            self.schedule(collection, doc_id, doc["escalate_at"])
+
+        level = doc["escalation_level"]
+        inner, outer = ESCALATION_RADII_KM[level - 1], ESCALATION_RADII_KM[min(level, len(ESCALATION_RADII_KM) - 1)]
+        if collection == "alerts":
+            notified = await fan_out_alert(doc, radius_km=outer, min_radius_km=inner) if governor.remaining(doc) else 0
+            activity_log.record(
+                "alert", f"{doc['blood_group']} alert escalated to {outer:g} km, {notified} more donors notified",
+                "pending", doc.get("hospital_name") or "Unknown hospital"
+            )
+        else:
+            backups, label = await self._find_backup_hospitals(doc, outer)
+            # Skipped if the request was completed while the search ran
+            updated = await db.blood_requests.find_one_and_update(
+                {"_id": doc_id, "status": OPEN_STATUS[collection]},
+                {"$set": {"backupHospitals": backups}},
+                return_document=ReturnDocument.AFTER
+            )
+            if updated is None:
+                return
+            publish_local(doc["hospital_id"], "blood_request", "update", updated)
+            activity_log.record(
+                "alert",
+                f"{doc.get('bloodType', 'Blood')} request escalated to {doc['urgency']} ({outer:g} km), "
+                f"{len(backups)} backup hospitals found",
+                "pending", label
+            )
+
+    async def _run(self):
+        while True:
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, self._heap[0][0] - datetime.now(timezone.utc).timestamp())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            while due := self._pop_due(datetime.now(timezone.utc).timestamp()):
+                results = await asyncio.gather(*(self._escalate(*item) for item in due), return_exceptions=True)
+                for item, result in zip(due, results):
+                    if isinstance(result, Exception):
+                        print(f"Escalation failed for {item[0]} {item[1]}: {result}")
+
+    async def load(self):
+        """Rebuilds the heap from the deadlines persisted on open documents."""
+        for collection, status in OPEN_STATUS.items():
+            cursor = db[collection].find(
+                {"escalate_at": {"$exists": True}, "status": status}, {"escalate_at": 1}
+            )
+            async for doc in cursor:
+                if (collection, doc["_id"]) in self._deadlines:
+                    continue  # already scheduled since startup
+                due_ts = _utc(doc["escalate_at"]).timestamp()
+                self._deadlines[(collection, doc["_id"])] = due_ts
+                self._heap.append((due_ts, next(self._sequence), collection, doc["_id"]))
+        heapq.heapify(self._heap)
+        print(f"Escalation scheduler loaded {len(self._deadlines)} pending deadlines.")
+
+    async def start(self):
+        if AUTO_ESCALATION_MINUTES <= 0:
+            return
+        try:
+            await self.load()
+        except Exception as e:
+            print(f"Failed to load escalation deadlines: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+escalation_scheduler = EscalationScheduler()
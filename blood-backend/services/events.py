@@ -0,0 +1,155 @@
+# blood-backend/services/events.py
+import os
+import json
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional
+from bson import ObjectId
+from db.conn import db
+from utils.cache import TTLCache
+from utils.versioning import versions
+
+# "local" publishes from the routes in this process; "change_streams" tails MongoDB
+# so every worker sees every write (requires a replica set).
+EVENT_SOURCE = os.getenv("EVENT_SOURCE", "local")
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+
+WATCHED_COLLECTIONS = {"blood_requests": "blood_request", "donor_responses": "donor_response"}
+
+class EventBus:
+    """
+    In-process pub/sub keyed by hospital id.
+    Each subscriber owns a bounded queue; a slow consumer loses its oldest events
+    rather than growing memory or blocking publishers.
+    """
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, hospital_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[hospital_id].add(queue)
+        return queue
+
+    def unsubscribe(self, hospital_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(hospital_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[hospital_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, hospital_id: str, event: dict):
+        # Every request/response change for a hospital passes through here, change streams included
+        versions.bump("hospital", hospital_id)
+        for queue in self._subscribers.get(hospital_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+event_bus = EventBus()
+
+def _make_event(kind: str, operation: str, document: dict) -> dict:
+    return {"type": kind, "operation": operation, "data": document}
+
+def publish_local(hospital_id: Any, kind: str, operation: str, document: dict):
+    """
+    Publishes a write made by a route in this process.
+    Skipped when change streams are the source, since they will deliver it.
+    """
+    if EVENT_SOURCE == "local":
+        event_bus.publish(str(hospital_id), _make_event(kind, operation, document))
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    return str(value)
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=_json_default)}\n\n"
+
+async def sse_stream(hospital_id: str, is_disconnected) -> AsyncIterator[str]:
+    """Yields Server-Sent Events for one hospital until the client disconnects."""
+    queue = event_bus.subscribe(hospital_id)
+    try:
+        yield f"retry: {int(EVENT_KEEPALIVE_SECONDS * 1000)}\n\n"
+        while not await is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        event_bus.unsubscribe(hospital_id, queue)
+
+# --- Change stream source ---
+# request_id -> hospital_id, so donor responses can be routed without a lookup each time
+_request_owner_cache = TTLCache(maxsize=50000, ttl_seconds=3600)
+
+async def _hospital_for(kind: str, document: dict) -> Optional[str]:
+    if kind == "blood_request":
+        return str(document["hospital_id"])
+
+    request_id = document.get("request_id")
+    if request_id is None:
+        return None
+    hospital_id = _request_owner_cache.get(request_id)
+    if hospital_id is None:
+        request = await db.blood_requests.find_one({"_id": request_id}, {"hospital_id": 1})
+        if not request:
+            return None
+        hospital_id = str(request["hospital_id"])
+        _request_owner_cache.set(request_id, hospital_id)
+    return hospital_id
+
+async def watch_changes():
+    """Tails blood_requests and donor_responses and publishes each change to its hospital."""
+    pipeline = [{"$match": {
+        "ns.coll": {"$in": list(WATCHED_COLLECTIONS)},
+        "operationType": {"$in": ["insert", "update", "replace"]},
+    }}]
+    resume_token = None
+    while True:
+        try:
+            async with db.watch(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    document = change.get("fullDocument")
+                    if not document:
+                        continue
+                    kind = WATCHED_COLLECTIONS[change["ns"]["coll"]]
+                    hospital_id = await _hospital_for(kind, document)
+                    if hospital_id:
+                        event_bus.publish(hospital_id, _make_event(kind, change["operationType"], document))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Change stream interrupted, resuming in 5s: {e}")
+            await asyncio.sleep(5)
+
+_watcher_task: Optional[asyncio.Task] = None
+
+def start_event_source():
+    global _watcher_task
+    if EVENT_SOURCE == "change_streams" and _watcher_task is None:
+        _watcher_task = asyncio.create_task(watch_changes())
+
+async def stop_event_source():
+    global _watcher_task
+    if _watcher_task is not None:
+        _watcher_task.cancel()
+        try:
+            await _watcher_task
+        except asyncio.CancelledError:
+            pass
+        _watcher_task = None
@@ -0,0 +1,179 @@
+# blood-backend/services/forecasting.py
+import os
+import math
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WEEKLY_ARTIFACT_PATH = os.getenv("WEEKLY_ARTIFACT_PATH", os.path.join(BASE_DIR, "models", "weekly_artifact.joblib"))
+# "sarima" needs statsmodels and falls back to "moving_average" without it
+FORECAST_METHOD = os.getenv("FORECAST_METHOD", "sarima")
+FORECAST_MAX_HORIZON = int(os.getenv("FORECAST_MAX_HORIZON", "12"))
+FORECAST_REFRESH_SECONDS = float(os.getenv("FORECAST_REFRESH_SECONDS", str(6 * 3600)))
+# "auto" reads the live weekly rollups when any exist, otherwise the notebook artifact
+FORECAST_SOURCE = os.getenv("FORECAST_SOURCE", "auto")
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", str(os.cpu_count() or 1)))
+
+MOVING_AVERAGE_WINDOW = 8  # same window as the notebook's baseline
+SARIMA_ORDER = (1, 1, 1)
+SARIMA_SEASONAL_ORDER = (1, 1, 1, 52)
+
+SeriesKey = tuple[str, str]
+
+# --- Worker-side functions (must be top-level so they can be pickled) ---
+def _init_worker():
+    """One BLAS thread per worker; the pool already uses every core."""
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+def _moving_average(values: list[float], horizon: int) -> list[float]:
+    window = values[-MOVING_AVERAGE_WINDOW:]
+    mean = sum(window) / len(window) if window else 0.0
+    return [mean] * horizon
+
+def forecast_series(values: list[float], horizon: int, method: str) -> tuple[list[float], str]:
+    """Forecasts one weekly net series; returns (forecast, method actually used)."""
+    if method == "sarima" and len(values) >= 2 * SARIMA_SEASONAL_ORDER[3]:
+        try:
+            import warnings
+            from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                model = SARIMAX(
+                    values, order=SARIMA_ORDER, seasonal_order=SARIMA_SEASONAL_ORDER,
+                    enforce_stationarity=False, enforce_invertibility=False
+                )
+                result = model.fit(disp=False)
+            forecast = [float(v) for v in result.forecast(steps=horizon)]
+            if all(math.isfinite(v) for v in forecast):
+                return forecast, "sarima"
+        except Exception:
+            pass
+    return _moving_average(values, horizon), "moving_average"
+
+def forecast_chunk(chunk: list[tuple[SeriesKey, list[float]]], horizon: int, method: str) -> list[tuple[SeriesKey, list[float], str]]:
+    """Runs in a worker process; several series per task keeps IPC overhead low."""
+    return [(key, *forecast_series(values, horizon, method)) for key, values in chunk]
+
+# --- Series loading ---
+def load_artifact_series(path: str = WEEKLY_ARTIFACT_PATH) -> dict[SeriesKey, tuple[datetime, list[float]]]:
+    """Reads the notebook's weekly artifact into {(region, blood_type): (last_week, net values)}."""
+    import joblib
+
+    weekly = joblib.load(path)["weekly"].sort_values("week")
+    series = {}
+    for (region, blood_type), group in weekly.groupby(["region", "blood_type"]):
+        series[(region, blood_type)] = (group["week"].iloc[-1].to_pydatetime(), group["net"].astype(float).tolist())
+    return series
+
+class ShortageForecaster:
+    """
+    Keeps forecasts for every (region, blood_type) series, refreshed on a schedule.
+    Each refresh fans the series out across a process pool and swaps the results
+    in at once, so readers never see a half-refreshed set.
+    """
+
+    def __init__(self):
+        self.forecasts: dict[SeriesKey, dict] = {}
+        self.refreshed_at: Optional[datetime] = None
+        self.last_refresh_seconds: Optional[float] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=FORECAST_WORKERS, initializer=_init_worker)
+        return self._pool
+
+    async def load_series(self) -> dict[SeriesKey, tuple[datetime, list[float]]]:
+        if FORECAST_SOURCE in ("auto", "rollups"):
+            from services.rollups import load_rollup_series
+
+            series = await load_rollup_series()
+            if series or FORECAST_SOURCE == "rollups":
+                return series
+        return await asyncio.to_thread(load_artifact_series)
+
+    async def refresh(self):
+        started = asyncio.get_running_loop().time()
+        series = await self.load_series()
+        if not series:
+            return
+
+        items = [(key, values) for key, (_, values) in series.items()]
+        chunk_size = max(1, math.ceil(len(items) / (FORECAST_WORKERS * 4)))
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, forecast_chunk, chunk, FORECAST_MAX_HORIZON, FORECAST_METHOD)
+            for chunk in chunks
+        ))
+
+        generated_at = datetime.now(timezone.utc)
+        forecasts = {}
+        for key, values, method in (row for chunk in results for row in chunk):
+            last_week = series[key][0]
+            forecasts[key] = {
+                "region": key[0],
+                "blood_type": key[1],
+                "method": method,
+                "generated_at": generated_at,
+                "forecast": [
+                    {"week": last_week + timedelta(weeks=i + 1), "net": round(value, 2), "shortage": value < 0}
+                    for i, value in enumerate(values)
+                ],
+            }
+
+        self.forecasts = forecasts
+        self.refreshed_at = generated_at
+        self.last_refresh_seconds = round(loop.time() - started, 3)
+        print(f"Shortage forecasts refreshed: {len(forecasts)} series in {self.last_refresh_seconds}s.")
+
+    def query(self, region: Optional[str], blood_type: Optional[str], horizon: int) -> list[dict]:
+        rows = []
+        for (series_region, series_type), entry in sorted(self.forecasts.items()):
+            if region and series_region != region:
+                continue
+            if blood_type and series_type != blood_type:
+                continue
+            rows.append({**entry, "forecast": entry["forecast"][:horizon]})
+        return rows
+
+    async def _refresh_loop(self, delay: float = 0.0):
+        if delay:
+            await asyncio.sleep(delay)
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Shortage forecast refresh failed: {e}")
+            await asyncio.sleep(FORECAST_REFRESH_SECONDS)
+
+    def start(self, delay: float = 0.0):
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop(delay))
+
+    async def start_warm(self):
+        """Computes the first forecasts now, then refreshes on the usual schedule."""
+        try:
+            await self.refresh()
+        finally:
+            self.start(delay=FORECAST_REFRESH_SECONDS)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+forecaster = ShortageForecaster()
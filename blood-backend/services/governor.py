@@ -0,0 +1,160 @@
+# blood-backend/services/governor.py
+import os
+import time
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+from pymongo import UpdateOne
+from db.conn import db
+from utils.cache import TTLCache
+from utils.throttle import DONOR_NOTIFY_BURST, REFILL_SECONDS, FULL_REFILL_SECONDS
+
+# A donor picked for one alert is skipped by every other alert for this long
+DONOR_DEDUP_MINUTES = float(os.getenv("DONOR_DEDUP_MINUTES", "30"))
+MAX_DONOR_NOTIFICATIONS_PER_ALERT = int(os.getenv("MAX_DONOR_NOTIFICATIONS_PER_ALERT", "200"))
+THROTTLE_FLUSH_SECONDS = float(os.getenv("THROTTLE_FLUSH_SECONDS", "5"))
+# How long per-alert state (count + seen donors) is kept in memory
+ALERT_STATE_TTL_SECONDS = float(os.getenv("ALERT_STATE_TTL_SECONDS", str(24 * 3600)))
+
+class _DonorBucket:
+    __slots__ = ("tokens", "updated", "last_notified")
+
+    def __init__(self, tokens: float, updated: float, last_notified: float):
+        self.tokens = tokens
+        self.updated = updated
+        self.last_notified = last_notified
+
+class _AlertState:
+    __slots__ = ("admitted", "seen")
+
+    def __init__(self, admitted: int):
+        self.admitted = admitted
+        self.seen: set = set()
+
+class NotificationGovernor:
+    """
+    Decides, per (alert, donor) candidate, whether a notification may go out:
+
+    - the alert is under its MAX_DONOR_NOTIFICATIONS_PER_ALERT cap,
+    - the donor hasn't already been picked for this alert,
+    - the donor wasn't notified for any alert in the last DONOR_DEDUP_MINUTES,
+    - the donor's token bucket has a token left.
+
+    Each decision is a few dict lookups. Donor buckets are flushed to the
+    donor_throttle collection in batches and reloaded at startup; stale
+    entries expire through the TTL index in db/indexes.py once their bucket
+    would be full.
+    """
+
+    def __init__(self, timer: Callable[[], float] = time.time):
+        self._timer = timer
+        self._buckets: dict[Any, _DonorBucket] = {}
+        self._alerts = TTLCache(maxsize=50000, ttl_seconds=ALERT_STATE_TTL_SECONDS)
+        self._dirty: set = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def _alert_state(self, alert: dict) -> _AlertState:
+        state = self._alerts.get(alert["_id"])
+        if state is None:
+            # After a restart, resume from what the alert has already sent
+            state = _AlertState(alert.get("donors_notified", 0))
+            self._alerts.set(alert["_id"], state)
+        return state
+
+    def remaining(self, alert: dict) -> int:
+        return max(0, MAX_DONOR_NOTIFICATIONS_PER_ALERT - self._alert_state(alert).admitted)
+
+    def admit(self, alert: dict, donor_id: Any) -> bool:
+        state = self._alert_state(alert)
+        if state.admitted >= MAX_DONOR_NOTIFICATIONS_PER_ALERT or donor_id in state.seen:
+            return False
+
+        now = self._timer()
+        bucket = self._buckets.get(donor_id)
+        if bucket is not None:
+            if now - bucket.last_notified < DONOR_DEDUP_MINUTES * 60:
+                return False
+            bucket.tokens = min(DONOR_NOTIFY_BURST, bucket.tokens + (now - bucket.updated) / REFILL_SECONDS)
+            bucket.updated = now
+            if bucket.tokens < 1:
+                return False
+        else:
+            bucket = self._buckets[donor_id] = _DonorBucket(DONOR_NOTIFY_BURST, now, 0.0)
+
+        bucket.tokens -= 1
+        bucket.last_notified = now
+        state.admitted += 1
+        state.seen.add(donor_id)
+        self._dirty.add(donor_id)
+        return True
+
+    async def flush(self):
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        operations = []
+        for donor_id in dirty:
+            bucket = self._buckets.get(donor_id)
+            if bucket is None:
+                continue
+            operations.append(UpdateOne(
+                {"_id": donor_id},
+                {"$set": {
+                    "tokens": bucket.tokens,
+                    "updated_at": datetime.fromtimestamp(bucket.updated, timezone.utc),
+                    "last_notified_at": datetime.fromtimestamp(bucket.last_notified, timezone.utc),
+                }},
+                upsert=True
+            ))
+        try:
+            if operations:
+                await db.donor_throttle.bulk_write(operations, ordered=False)
+        except Exception as e:
+            print(f"Donor throttle flush failed ({len(operations)} donors): {e}")
+            self._dirty |= dirty
+
+    def _expire_full_buckets(self):
+        cutoff = self._timer() - FULL_REFILL_SECONDS
+        for donor_id in [d for d, bucket in self._buckets.items() if bucket.updated < cutoff]:
+            del self._buckets[donor_id]
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(THROTTLE_FLUSH_SECONDS)
+            await self.flush()
+            self._expire_full_buckets()
+
+    async def load(self):
+        async for doc in db.donor_throttle.find():
+            persisted = _DonorBucket(
+                doc["tokens"],
+                doc["updated_at"].replace(tzinfo=timezone.utc).timestamp(),
+                doc["last_notified_at"].replace(tzinfo=timezone.utc).timestamp(),
+            )
+            bucket = self._buckets.get(doc["_id"])
+            if bucket is None:
+                self._buckets[doc["_id"]] = persisted
+                continue
+            # Touched since startup: keep the stricter of the two states, so the
+            # persisted dedup window and spent tokens still apply
+            refilled = min(DONOR_NOTIFY_BURST, persisted.tokens + max(0.0, bucket.updated - persisted.updated) / REFILL_SECONDS)
+            bucket.tokens = min(bucket.tokens, refilled)
+            bucket.last_notified = max(bucket.last_notified, persisted.last_notified)
+            self._dirty.add(doc["_id"])
+        print(f"Notification governor loaded {len(self._buckets)} donor buckets.")
+
+    async def start(self):
+        try:
+            await self.load()
+        except Exception as e:
+            print(f"Failed to load donor throttle state: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+governor = NotificationGovernor()
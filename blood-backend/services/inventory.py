@@ -0,0 +1,258 @@
+# blood-backend/services/inventory.py
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from db.conn import db
+from utils.blood import BLOOD_GROUPS
+from utils.cache import TTLCache
+from utils.versioning import versions
+
+# Red cell units keep for 42 days when no expiry is given
+DEFAULT_SHELF_LIFE_DAYS = int(os.getenv("DEFAULT_SHELF_LIFE_DAYS", "42"))
+DEFAULT_MINIMUM_UNITS = int(os.getenv("DEFAULT_MINIMUM_UNITS", "10"))
+EXPIRING_WINDOW_DAYS = 7
+INVENTORY_SWEEP_SECONDS = float(os.getenv("INVENTORY_SWEEP_SECONDS", "600"))
+SWEEP_BATCH_SIZE = 500
+# Cross-hospital search: how long a per-blood-type stock map may be served without re-reading it
+STOCK_CACHE_TTL_SECONDS = float(os.getenv("STOCK_CACHE_TTL_SECONDS", "30"))
+HOSPITAL_SEARCH_PROJECTION = {"_id": 1, "hospitalName": 1, "name": 1, "address": 1, "phone": 1, "distance_m": 1}
+
+LOT_AVAILABLE = "available"
+LOT_ALLOCATED = "allocated"
+LOT_EXPIRED = "expired"
+
+def stock_status(units: int, minimum: int) -> str:
+    """Maps stock against the hospital's minimum to the dashboard's status labels."""
+    if units < minimum * 0.25:
+        return "Critical"
+    if units < minimum:
+        return "Low"
+    if units < minimum * 2:
+        return "Normal"
+    return "Adequate"
+
+# bloodType -> {hospital_id: unitsAvailable} for every hospital holding that type.
+# A few thousand entries per type; patched in place on this worker's writes.
+stock_cache = TTLCache(maxsize=len(BLOOD_GROUPS), ttl_seconds=STOCK_CACHE_TTL_SECONDS)
+
+async def _adjust_summary(hospital_id: ObjectId, blood_type: str, delta: int):
+    """Keeps the per-(hospital, blood type) summary, and the cached stock map, in step with the ledger."""
+    summary = await db.blood_inventory.find_one_and_update(
+        {"hospital_id": hospital_id, "bloodType": blood_type},
+        {
+            "$inc": {"unitsAvailable": delta},
+            "$setOnInsert": {"minimumRequired": DEFAULT_MINIMUM_UNITS, "expiringIn7Days": 0, "status": "Normal"},
+        },
+        projection={"unitsAvailable": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    stock = stock_cache.get(blood_type)
+    if stock is not None:
+        stock[hospital_id] = summary["unitsAvailable"]
+    versions.bump("hospital", hospital_id)
+
+async def receive_lot(
+    hospital_id: ObjectId, blood_type: str, units: int, collected_at: datetime, expires_at: Optional[datetime] = None
+) -> dict:
+    """Adds a lot to the ledger and its units to the summary."""
+    lot = {
+        "hospital_id": hospital_id,
+        "bloodType": blood_type,
+        "units": units,
+        "unitsAvailable": units,
+        "collectedAt": collected_at,
+        "expiresAt": expires_at or collected_at + timedelta(days=DEFAULT_SHELF_LIFE_DAYS),
+        "status": LOT_AVAILABLE,
+    }
+    await db.blood_lots.insert_one(lot)
+    await _adjust_summary(hospital_id, blood_type, units)
+    return lot
+
+async def allocate_fefo(
+    hospital_id: ObjectId, blood_type: str, units: int, request_id: Optional[ObjectId] = None
+) -> tuple[list[dict], int]:
+    """
+    Takes `units` from the hospital's unexpired lots, first-expiring first out.
+    Each step is one atomic find_one_and_update on the soonest-expiring lot
+    (index: hospital_id, status, bloodType, expiresAt), so concurrent
+    allocations never take the same unit twice.
+    Returns the allocations made and the shortfall, if stock ran out.
+    """
+    now = datetime.now(timezone.utc)
+    remaining = units
+    allocations = []
+    while remaining > 0:
+        lot = await db.blood_lots.find_one_and_update(
+            {"hospital_id": hospital_id, "status": LOT_AVAILABLE, "bloodType": blood_type, "expiresAt": {"$gt": now}},
+            [
+                {"$set": {"allocations": {"$concatArrays": [
+                    {"$ifNull": ["$allocations", []]},
+                    [{"request_id": request_id, "units": {"$min": ["$unitsAvailable", remaining]}, "at": now}],
+                ]}}},
+                {"$set": {"unitsAvailable": {"$subtract": ["$unitsAvailable", {"$last": "$allocations.units"}]}}},
+                {"$set": {"status": {"$cond": [{"$gt": ["$unitsAvailable", 0]}, LOT_AVAILABLE, LOT_ALLOCATED]}}},
+            ],
+            projection={"expiresAt": 1, "allocations": {"$slice": -1}},
+            sort=[("expiresAt", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if lot is None:
+            break
+        taken = lot["allocations"][-1]["units"]
+        remaining -= taken
+        allocations.append({"lotId": lot["_id"], "units": taken, "expiresAt": lot["expiresAt"]})
+
+    allocated = units - remaining
+    if allocated:
+        await _adjust_summary(hospital_id, blood_type, -allocated)
+    return allocations, remaining
+
+async def expiring_lots(hospital_id: ObjectId, days: int, limit: int = 500) -> list[dict]:
+    """Available lots expiring within `days`, soonest first; a range scan on (hospital_id, status, expiresAt)."""
+    now = datetime.now(timezone.utc)
+    cursor = db.blood_lots.find(
+        {"hospital_id": hospital_id, "status": LOT_AVAILABLE, "expiresAt": {"$gt": now, "$lte": now + timedelta(days=days)}},
+        {"allocations": 0}
+    ).sort("expiresAt", 1).limit(limit)
+    return await cursor.to_list(length=limit)
+
+async def inventory_summary(hospital_id: ObjectId, database: Any = None) -> list[dict]:
+    """
+    The hospital's per-blood-type summary. Stock comes from the incrementally
+    maintained blood_inventory documents; the expiring-soon counts are a
+    bounded index range over lots in the next EXPIRING_WINDOW_DAYS, never a
+    scan of historical lots.
+    """
+    database = db if database is None else database
+    now = datetime.now(timezone.utc)
+    summaries, expiring = await asyncio.gather(
+        database.blood_inventory.find({"hospital_id": hospital_id}).to_list(length=None),
+        database.blood_lots.aggregate([
+            {"$match": {
+                "hospital_id": hospital_id,
+                "status": LOT_AVAILABLE,
+                "expiresAt": {"$gt": now, "$lte": now + timedelta(days=EXPIRING_WINDOW_DAYS)},
+            }},
+            {"$group": {"_id": "$bloodType", "units": {"$sum": "$unitsAvailable"}}},
+        ]).to_list(length=None),
+    )
+    expiring_by_type = {row["_id"]: row["units"] for row in expiring}
+    for summary in summaries:
+        summary["expiringIn7Days"] = expiring_by_type.get(summary["bloodType"], 0)
+        summary["status"] = stock_status(summary.get("unitsAvailable", 0), summary.get("minimumRequired", DEFAULT_MINIMUM_UNITS))
+    return summaries
+
+# --- Cross-Hospital Search ---
+async def stock_by_hospital(blood_type: str) -> dict:
+    """Units of `blood_type` held by each hospital, from a covered index read cached per type."""
+    stock = stock_cache.get(blood_type)
+    if stock is None:
+        rows = await db.blood_inventory.find(
+            {"bloodType": blood_type, "unitsAvailable": {"$gt": 0}},
+            {"_id": 0, "hospital_id": 1, "unitsAvailable": 1}
+        ).to_list(length=None)
+        stock = {row["hospital_id"]: row["unitsAvailable"] for row in rows}
+        stock_cache.set(blood_type, stock)
+    return stock
+
+async def search_nearby_stock(
+    point: dict, blood_type: str, min_units: int, radius_km: float, limit: int, exclude_id: Optional[ObjectId] = None
+) -> list[dict]:
+    """
+    Hospitals within `radius_km` of `point` holding at least `min_units` of
+    `blood_type`. Candidates come from the cached stock map; one $geoNear on
+    the hospitals 2dsphere index restricted to their _ids does the distance
+    work. Nearest first; within the same kilometre, larger stock first.
+    """
+    stock = await stock_by_hospital(blood_type)
+    candidates = [hospital_id for hospital_id, units in stock.items() if units >= min_units and hospital_id != exclude_id]
+    if not candidates:
+        return []
+
+    hospitals = await db.hospitals.aggregate([
+        {"$geoNear": {
+            "near": point,
+            "key": "location",
+            "distanceField": "distance_m",
+            "maxDistance": radius_km * 1000,
+            "query": {"_id": {"$in": candidates}},
+            "spherical": True,
+        }},
+        {"$limit": limit},
+        {"$project": HOSPITAL_SEARCH_PROJECTION},
+    ]).to_list(length=limit)
+
+    results = [{
+        "hospital_id": hospital["_id"],
+        "name": hospital.get("hospitalName") or hospital.get("name"),
+        "address": hospital.get("address"),
+        "phone": hospital.get("phone"),
+        "distance_km": round(hospital["distance_m"] / 1000, 2),
+        "unitsAvailable": stock.get(hospital["_id"], 0),
+    } for hospital in hospitals]
+    results.sort(key=lambda row: (int(row["distance_km"]), -row["unitsAvailable"]))
+    return results
+
+# --- Expiry Sweeper ---
+async def _expire_lot(lot_id: ObjectId, now: datetime) -> Optional[dict]:
+    # Returns the lot as it was, so its remaining units are exact even if an allocation raced us
+    return await db.blood_lots.find_one_and_update(
+        {"_id": lot_id, "status": LOT_AVAILABLE},
+        {"$set": {"status": LOT_EXPIRED, "expiredAt": now, "unitsAvailable": 0}},
+        projection={"hospital_id": 1, "bloodType": 1, "unitsAvailable": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+
+async def sweep_expired() -> int:
+    """Marks lots past their expiry as expired and takes their units out of the summaries."""
+    now = datetime.now(timezone.utc)
+    expired = 0
+    while True:
+        # Range scan on (status, expiresAt); swept lots leave the range, so each pass starts over
+        lots = await db.blood_lots.find(
+            {"status": LOT_AVAILABLE, "expiresAt": {"$lte": now}}, {"_id": 1}
+        ).limit(SWEEP_BATCH_SIZE).to_list(length=SWEEP_BATCH_SIZE)
+        if not lots:
+            return expired
+
+        swept = [lot for lot in await asyncio.gather(*(_expire_lot(lot["_id"], now) for lot in lots)) if lot]
+        deltas: dict[tuple, int] = {}
+        for lot in swept:
+            key = (lot["hospital_id"], lot["bloodType"])
+            deltas[key] = deltas.get(key, 0) - lot["unitsAvailable"]
+        if deltas:
+            for hospital_id, blood_type in deltas:
+                stock_cache.invalidate(blood_type)
+                versions.bump("hospital", hospital_id)
+            await db.blood_inventory.bulk_write([
+                UpdateOne({"hospital_id": hospital_id, "bloodType": blood_type}, {"$inc": {"unitsAvailable": delta}})
+                for (hospital_id, blood_type), delta in deltas.items()
+            ], ordered=False)
+        expired += len(swept)
+
+async def _sweep_loop():
+    while True:
+        try:
+            expired = await sweep_expired()
+            if expired:
+                print(f"Inventory sweep expired {expired} lots.")
+        except Exception as e:
+            print(f"Inventory expiry sweep failed: {e}")
+        await asyncio.sleep(INVENTORY_SWEEP_SECONDS)
+
+_sweep_task: Optional[asyncio.Task] = None
+
+def start_inventory_sweeper():
+    global _sweep_task
+    if _sweep_task is None:
+        _sweep_task = asyncio.create_task(_sweep_loop())
+
+async def stop_inventory_sweeper():
+    global _sweep_task
+    if _sweep_task is not None:
+        _sweep_task.cancel()
+        _sweep_task = None
@@ -0,0 +1,109 @@
+# blood-backend/services/matching.py
+from datetime import datetime, timezone
+from typing import Optional
+from pymongo import UpdateOne
+from db.conn import db
+from utils.blood import BLOOD_GROUPS, RECIPIENT_BITS, compat_mask, normalize_blood_group
+
+# Only what the dispatcher needs; keeps each streamed batch small.
+DONOR_CONTACT_PROJECTION = {"_id": 1, "full_name": 1, "phone": 1, "email": 1, "blood_group": 1}
+
+COMPAT_MASK_MIGRATION = "donor_compat_mask_v1"
+BACKFILL_BATCH_SIZE = 1000
+
+def compatible_donor_filter(recipient_group: str) -> Optional[dict]:
+    """
+    Filter for available donors who can give to `recipient_group`, evaluated
+    on the compat_mask key of the (location, compat_mask) index.
+    None for a group the system doesn't know, which matches nobody.
+    """
+    bit = RECIPIENT_BITS.get(normalize_blood_group(recipient_group))
+    if bit is None:
+        return None
+    return {"compat_mask": {"$bitsAllSet": bit}, "is_available": {"$ne": False}}
+
+def compatible_donors_pipeline(
+    point: dict, blood_group: str, radius_km: float, limit: int, min_radius_km: float = 0.0
+) -> Optional[list]:
+    """
+    Aggregation for the `limit` nearest available donors who can give to
+    `blood_group`, within `radius_km` of the GeoJSON `point` and beyond
+    `min_radius_km` (used to search only the new ring when escalating),
+    ordered exact-match first, then by distance.
+    Backed by the (location 2dsphere, compat_mask) index on donors.
+
+    The limit applies before the exact-match sort: the result is the nearest
+    `limit` compatible donors, reordered. Sorting first would rank donors
+    across the whole radius, but $geoNear could then no longer stop after
+    `limit` documents and every compatible donor in range would be read.
+    """
+    query = compatible_donor_filter(blood_group)
+    if query is None:
+        return None
+
+    geo_near = {
+        "near": point,
+        "key": "location",
+        "distanceField": "distance_m",
+        "maxDistance": radius_km * 1000,
+        "query": query,
+        "spherical": True,
+    }
+    if min_radius_km > 0:
+        geo_near["minDistance"] = min_radius_km * 1000
+
+    return [
+        {"$geoNear": geo_near},
+        # Nearest `limit` first (stops the index walk early); exact matches lead within them
+        {"$limit": limit},
+        {"$addFields": {"exact_match": {"$eq": ["$blood_group", normalize_blood_group(blood_group)]}}},
+        {"$sort": {"exact_match": -1, "distance_m": 1}},
+        {"$project": {**DONOR_CONTACT_PROJECTION, "distance_m": 1, "exact_match": 1}},
+    ]
+
+def find_compatible_donors(
+    point: dict, blood_group: str, radius_km: float, limit: int, batch_size: int = 100, min_radius_km: float = 0.0
+):
+    """Cursor over compatible_donors_pipeline(), or None for an unknown blood group."""
+    pipeline = compatible_donors_pipeline(point, blood_group, radius_km, limit, min_radius_km)
+    if pipeline is None:
+        return None
+    return db.donors.aggregate(pipeline, batchSize=batch_size)
+
+async def backfill_compat_masks(database=None):
+    """
+    One-off migration: normalizes stored blood groups and sets compat_mask on
+    donors written before it existed. Recorded in `migrations` so later
+    startups skip it.
+    """
+    database = db if database is None else database
+    if await database.migrations.find_one({"_id": COMPAT_MASK_MIGRATION}):
+        return
+
+    print("Backfilling donor compatibility masks...")
+    updated = 0
+    for group in BLOOD_GROUPS:
+        result = await database.donors.update_many({"blood_group": group}, {"$set": {"compat_mask": compat_mask(group)}})
+        updated += result.modified_count
+
+    # Free-text groups (" o+", "ab +") need normalizing first
+    operations = []
+    async for donor in database.donors.find({"compat_mask": {"$exists": False}}, {"blood_group": 1}):
+        group = normalize_blood_group(donor.get("blood_group") or "")
+        if group not in BLOOD_GROUPS:
+            continue
+        operations.append(UpdateOne(
+            {"_id": donor["_id"]}, {"$set": {"blood_group": group, "compat_mask": compat_mask(group)}}
+        ))
+        if len(operations) >= BACKFILL_BATCH_SIZE:
+            updated += (await database.donors.bulk_write(operations, ordered=False)).modified_count
+            operations = []
+    if operations:
+        updated += (await database.donors.bulk_write(operations, ordered=False)).modified_count
+
+    # The compound index replaces the plain one; two 2dsphere indexes on location make $geoNear ambiguous
+    if "location_2dsphere" in await database.donors.index_information():
+        await database.donors.drop_index("location_2dsphere")
+
+    await database.migrations.insert_one({"_id": COMPAT_MASK_MIGRATION, "completed_at": datetime.now(timezone.utc)})
+    print(f"Donor compatibility masks backfilled: {updated} donors updated.")
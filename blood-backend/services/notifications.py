@@ -0,0 +1,175 @@
+# blood-backend/services/notifications.py
+import os
+import asyncio
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from db.conn import db
+from services.matching import find_compatible_donors, DONOR_CONTACT_PROJECTION
+from services.donor_store import get_donor_store
+from services.activity import activity_log
+from services.governor import governor, MAX_DONOR_NOTIFICATIONS_PER_ALERT
+from utils.geo import to_geojson_point
+from utils.versioning import versions
+
+ALERT_SEARCH_RADIUS_KM = float(os.getenv("ALERT_SEARCH_RADIUS_KM", "10"))
+FANOUT_BATCH_SIZE = int(os.getenv("FANOUT_BATCH_SIZE", "50"))
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "20"))
+# Candidates fetched per notification slot, since the governor skips throttled donors
+FANOUT_OVERFETCH = int(os.getenv("FANOUT_OVERFETCH", "3"))
+# Alert policy shown on the admin dashboard
+CRITICAL_THRESHOLD_UNITS = int(os.getenv("CRITICAL_THRESHOLD_UNITS", "5"))
+AUTO_ESCALATION_MINUTES = int(os.getenv("AUTO_ESCALATION_MINUTES", "15"))
+BACKUP_HOSPITAL_RANGE_KM = float(os.getenv("BACKUP_HOSPITAL_RANGE_KM", "50"))
+
+SendFunction = Callable[[dict, dict], Awaitable[bool]]
+
+async def _record_only(alert: dict, donor: dict) -> bool:
+    """Default channel: no SMS/push gateway is configured, the stored notification is the delivery."""
+    return True
+
+class NotificationDispatcher:
+    """
+    Delivers alert notifications to donors with a global concurrency limit,
+    so one large alert cannot starve the gateway (or the event loop) for others.
+    """
+
+    def __init__(self, concurrency: int = FANOUT_CONCURRENCY, send: Optional[SendFunction] = None):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._send = send or _record_only
+
+    async def _deliver(self, alert: dict, donor: dict) -> bool:
+        async with self._semaphore:
+            try:
+                return bool(await self._send(alert, donor))
+            except Exception as e:
+                print(f"Failed to notify donor {donor.get('_id')} for alert {alert.get('_id')}: {e}")
+                return False
+
+    async def dispatch(self, alert: dict, donors: list[dict]) -> int:
+        """Sends one batch concurrently and records the outcome with a single bulk insert."""
+        results = await asyncio.gather(*(self._deliver(alert, donor) for donor in donors))
+
+        sent_at = datetime.now(timezone.utc)
+        records = [
+            {
+                "alert_id": alert["_id"],
+                "donor_id": donor["_id"],
+                "status": "sent" if ok else "failed",
+                "sent_at": sent_at,
+            }
+            for donor, ok in zip(donors, results)
+        ]
+        if records:
+            await db.alert_notifications.insert_many(records, ordered=False)
+        return sum(results)
+
+dispatcher = NotificationDispatcher()
+
+async def _candidate_batches(
+    point: dict, blood_group: str, radius_km: float, limit: int, min_radius_km: float = 0.0
+) -> AsyncIterator[list[dict]]:
+    """
+    Yields batches of donor contact documents, nearest first.
+    Candidates come from the in-memory feature store when it is loaded
+    (only the batch's contact details are read from Mongo), otherwise from
+    a $near query streamed straight off the 2dsphere index.
+    """
+    store = get_donor_store()
+    if store.loaded:
+        lon, lat = point["coordinates"]
+        rows, _ = store.nearest(lat, lon, radius_km, blood_group, limit, min_radius_km)
+        donor_ids = store.donor_ids(rows)
+        for start in range(0, len(donor_ids), FANOUT_BATCH_SIZE):
+            chunk = donor_ids[start:start + FANOUT_BATCH_SIZE]
+            batch = await db.donors.find({"_id": {"$in": chunk}}, DONOR_CONTACT_PROJECTION).to_list(length=len(chunk))
+            if batch:
+                yield batch
+        return
+
+    cursor = find_compatible_donors(
+        point, blood_group, radius_km, limit=limit, batch_size=FANOUT_BATCH_SIZE, min_radius_km=min_radius_km
+    )
+    if cursor is None:
+        return
+    batch = []
+    async for donor in cursor:
+        batch.append(donor)
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def fan_out_alert(
+    alert: dict,
+    radius_km: float = ALERT_SEARCH_RADIUS_KM,
+    limit: int = MAX_DONOR_NOTIFICATIONS_PER_ALERT,
+    min_radius_km: float = 0.0,
+) -> int:
+    """
+    Notifies compatible, available donors near the alert's location.
+    Donors are handled nearest-first in batches and capped at `limit`,
+    so memory and gateway load stay bounded regardless of collection size.
+    Escalations pass `min_radius_km` to reach only the newly added ring.
+    Every candidate goes through the governor (per-alert cap, cross-alert
+    dedup, per-donor cooldown), so candidates are over-fetched.
+    """
+    point = to_geojson_point(alert.get("location"))
+    if point is None:
+        print(f"Alert {alert['_id']} has no usable location; skipping donor fan-out.")
+        return 0
+
+    limit = min(limit, governor.remaining(alert))
+    if limit <= 0:
+        return 0
+
+    notified = admitted = 0
+    candidates = _candidate_batches(point, alert["blood_group"], radius_km, limit * FANOUT_OVERFETCH, min_radius_km)
+    async for batch in candidates:
+        # admit() spends the donor's token and dedup slot, so stop asking once the limit is reached
+        chosen = []
+        for donor in batch:
+            if admitted + len(chosen) >= limit:
+                break
+            if governor.admit(alert, donor["_id"]):
+                chosen.append(donor)
+        if chosen:
+            admitted += len(chosen)
+            notified += await dispatcher.dispatch(alert, chosen)
+        if admitted >= limit:
+            break
+
+    await db.alerts.update_one(
+        {"_id": alert["_id"]},
+        {"$inc": {"donors_notified": notified}, "$set": {"fanout_completed_at": datetime.now(timezone.utc)}}
+    )
+    versions.bump("alerts")
+    return notified
+
+# Strong references to running fan-outs; asyncio only keeps weak ones.
+_background_tasks: set[asyncio.Task] = set()
+
+async def _run_fan_out(alert: dict):
+    location = alert.get("hospital_name") or "Unknown hospital"
+    try:
+        notified = await fan_out_alert(alert)
+        print(f"Alert {alert['_id']} fan-out complete: {notified} donors notified.")
+        activity_log.record(
+            "alert", f"{alert['blood_group']} blood alert sent to {notified} donors",
+            "success" if notified else "failed", location
+        )
+    except Exception as e:
+        print(f"Donor fan-out failed for alert {alert.get('_id')}: {e}")
+        activity_log.record("alert", f"{alert.get('blood_group')} blood alert fan-out failed", "failed", location)
+
+def schedule_fan_out(alert: dict) -> asyncio.Task:
+    """Starts the fan-out in the background so the request can return immediately."""
+    task = asyncio.create_task(_run_fan_out(alert))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def drain_fan_outs(timeout: float = 10.0):
+    """Gives in-flight fan-outs a chance to finish during shutdown."""
+    if _background_tasks:
+        await asyncio.wait(set(_background_tasks), timeout=timeout)
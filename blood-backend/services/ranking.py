@@ -0,0 +1,213 @@
+# blood-backend/services/ranking.py
+import os
+import asyncio
+from datetime import datetime, timezone
+from typing import Any
+import numpy as np
+from db.conn import db
+from utils.blood import normalize_blood_group
+from utils.geo import haversine_km, to_geojson_point
+from services.donor_store import get_donor_store, object_ids, blood_groups
+from services.matching import compatible_donor_filter
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESPONDER_MODEL_PATH = os.getenv(
+    "RESPONDER_MODEL_PATH", os.path.join(BASE_DIR, "models", "logistic_regression_pipeline.joblib")
+)
+RANKING_RADIUS_KM = float(os.getenv("RANKING_RADIUS_KM", "25"))
+MAX_RANKING_CANDIDATES = int(os.getenv("MAX_RANKING_CANDIDATES", "50000"))
+
+# pandas category codes the notebook produced for the training genders (sorted F, M, O)
+GENDER_CODES = {"F": 0, "M": 1, "O": 2}
+# Same default the notebook uses when a donor has never donated
+NEVER_DONATED_DAYS = 9999
+
+CANDIDATE_PROJECTION = {
+    "_id": 1, "full_name": 1, "blood_group": 1, "location": 1, "age": 1, "gender": 1,
+    "last_donation_date": 1, "past_response_rate": 1, "donation_frequency_per_year": 1,
+}
+
+class ResponderRanker:
+    """
+    Scores candidate donors with the model trained in Most_Likely_responders.ipynb.
+    Features are built column-wise for the whole candidate set and scored with
+    a single predict_proba call.
+    """
+
+    def __init__(self):
+        self.model = None
+        self.scaler = None
+        self.feature_columns: list[str] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self.model is not None
+
+    def load(self, path: str = RESPONDER_MODEL_PATH):
+        import joblib
+
+        artifact = joblib.load(path)
+        self.scaler = artifact.get("scaler")
+        self.feature_columns = list(artifact["feature_columns"])
+        # Set last: loading runs in a worker thread and `loaded` checks the model
+        self.model = artifact["model"]
+
+    def build_features(self, candidates: dict[str, np.ndarray], alert_time: datetime):
+        """
+        Vectorized equivalent of the notebook's build_features_for_model.
+        `candidates` maps column name to a 1-D array with one entry per donor.
+        """
+        import pandas as pd
+
+        n = len(candidates["distance_km"])
+        last_donation = candidates["last_donation_date"]
+        elapsed = np.datetime64(alert_time.replace(tzinfo=None), "D") - last_donation
+        days_ago = elapsed.astype("timedelta64[D]").astype(float)
+        days_ago[np.isnat(elapsed)] = NEVER_DONATED_DAYS
+
+        columns = {
+            "age": candidates["age"],
+            "gender_encoded": candidates["gender_code"],
+            # Not present in the training frame, so the notebook encoded them as 0
+            "blood_type_encoded": np.zeros(n),
+            "urgency_encoded": np.zeros(n),
+            "distance_km": candidates["distance_km"],
+            "last_donation_days_ago": days_ago,
+            "donation_frequency_per_year": candidates["donation_frequency_per_year"],
+            "past_response_rate": candidates["past_response_rate"],
+        }
+        return pd.DataFrame({name: columns[name] for name in self.feature_columns})
+
+    def score(self, features) -> np.ndarray:
+        """Probability of responding for every row, in one batched call."""
+        values = self.scaler.transform(features) if self.scaler is not None else features
+        if hasattr(self.model, "predict_proba"):
+            return self.model.predict_proba(values)[:, 1]
+        return np.asarray(self.model.predict(values), dtype=float)
+
+    def rank(self, candidates: dict[str, np.ndarray], alert_time: datetime, k: int) -> list[tuple[int, float]]:
+        """Returns (candidate index, score) for the top `k` candidates, best first."""
+        if len(candidates["distance_km"]) == 0:
+            return []
+        scores = self.score(self.build_features(candidates, alert_time))
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+ranker = ResponderRanker()
+
+def load_ranker():
+    """Loads the responder model once at startup; ranking stays disabled if it can't be read."""
+    try:
+        ranker.load()
+        print(f"Responder ranking model loaded from {RESPONDER_MODEL_PATH}.")
+    except Exception as e:
+        print(f"Responder ranking model unavailable: {e}")
+
+def _to_float(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+def candidates_to_columns(donors: list[dict], lat: float, lon: float) -> dict[str, np.ndarray]:
+    """Turns candidate donor documents into the per-column arrays the ranker expects."""
+    import pandas as pd
+
+    points = [to_geojson_point(d.get("location")) for d in donors]
+    lons = np.array([p["coordinates"][0] if p else np.nan for p in points])
+    lats = np.array([p["coordinates"][1] if p else np.nan for p in points])
+
+    return {
+        "distance_km": haversine_km(lat, lon, lats, lons),
+        "age": np.array([_to_float(d.get("age")) for d in donors]),
+        "gender_code": np.array([GENDER_CODES.get(str(d.get("gender", ""))[:1].upper(), -1) for d in donors], dtype=float),
+        "last_donation_date": pd.to_datetime(
+            [d.get("last_donation_date") for d in donors], errors="coerce", utc=True
+        ).tz_localize(None).values.astype("datetime64[D]"),
+        "donation_frequency_per_year": np.array([_to_float(d.get("donation_frequency_per_year")) for d in donors]),
+        "past_response_rate": np.array([_to_float(d.get("past_response_rate")) for d in donors]),
+    }
+
+async def load_candidates(alert: dict, radius_km: float = RANKING_RADIUS_KM, limit: int = MAX_RANKING_CANDIDATES) -> list[dict]:
+    """Compatible, available donors within `radius_km` of the alert, read in one streamed query."""
+    point = to_geojson_point(alert.get("location"))
+    compatible = compatible_donor_filter(alert["blood_group"])
+    if point is None or compatible is None:
+        return []
+    query = {
+        "location": {"$geoWithin": {"$centerSphere": [point["coordinates"], radius_km / 6378.1]}},
+        **compatible,
+    }
+    return await db.donors.find(query, CANDIDATE_PROJECTION).batch_size(5000).to_list(length=limit)
+
+def rank_candidates(alert: dict, donors: list[dict], k: int) -> list[dict]:
+    """Scores candidate documents read from Mongo and returns the top `k` as response rows."""
+    point = to_geojson_point(alert.get("location"))
+    lon, lat = point["coordinates"]
+    columns = candidates_to_columns(donors, lat, lon)
+    alert_time = alert.get("created_at") or datetime.now(timezone.utc)
+    needed = normalize_blood_group(alert["blood_group"])
+
+    ranked = []
+    for index, score in ranker.rank(columns, alert_time, k):
+        donor = donors[index]
+        ranked.append({
+            "donor_id": str(donor["_id"]),
+            "name": donor.get("full_name") or donor.get("name"),
+            "blood_group": donor.get("blood_group"),
+            "exact_match": donor.get("blood_group") == needed,
+            "distance_km": round(float(columns["distance_km"][index]), 2),
+            "score": round(score, 4),
+        })
+    return ranked
+
+async def _rank_from_store(alert: dict, k: int) -> list[dict]:
+    store = get_donor_store()
+    lon, lat = to_geojson_point(alert.get("location"))["coordinates"]
+    rows, distances = store.nearest(lat, lon, RANKING_RADIUS_KM, alert["blood_group"], MAX_RANKING_CANDIDATES)
+
+    columns = store.features(rows)
+    columns["distance_km"] = distances.astype(float)
+    # A removal during the await below can compact the store and renumber rows
+    raw_ids, blood_codes = store.identities(rows)
+    alert_time = alert.get("created_at") or datetime.now(timezone.utc)
+    # Scoring is CPU work; keep it off the event loop
+    top = await asyncio.to_thread(ranker.rank, columns, alert_time, k)
+    if not top:
+        return []
+
+    positions = [index for index, _ in top]
+    donor_ids = object_ids(raw_ids[positions])
+    groups = blood_groups(blood_codes[positions])
+    names = {
+        donor["_id"]: donor.get("full_name") or donor.get("name")
+        async for donor in db.donors.find({"_id": {"$in": donor_ids}}, {"full_name": 1, "name": 1})
+    }
+    needed = normalize_blood_group(alert["blood_group"])
+
+    return [
+        {
+            "donor_id": str(donor_id),
+            "name": names.get(donor_id),
+            "blood_group": group,
+            "exact_match": group == needed,
+            "distance_km": round(float(distances[index]), 2),
+            "score": round(score, 4),
+        }
+        for donor_id, group, (index, score) in zip(donor_ids, groups, top)
+    ]
+
+async def rank_donors_for_alert(alert: dict, k: int) -> list[dict]:
+    """
+    Top `k` likely responders for the alert. Uses the in-memory donor feature
+    store when it is loaded, otherwise reads candidates from Mongo.
+    """
+    if to_geojson_point(alert.get("location")) is None:
+        return []
+    if get_donor_store().loaded:
+        return await _rank_from_store(alert, k)
+
+    candidates = await load_candidates(alert)
+    return await asyncio.to_thread(rank_candidates, alert, candidates, k)
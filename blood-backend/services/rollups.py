@@ -0,0 +1,118 @@
+# blood-backend/services/rollups.py
+"""
+Weekly donation/request counters per (region, blood_type).
+
+Routes bump the current week's counter with an upsert $inc as events happen,
+so forecast inputs are an O(series x weeks) read instead of a regroup of every
+historical event. A backfill rebuilds the counters from existing data:
+
+    python -m services.rollups backfill
+"""
+import sys
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from pymongo import UpdateOne
+from db.conn import db, analytics_db
+from utils.blood import normalize_blood_group
+
+BACKFILL_BATCH_SIZE = 5000
+BULK_WRITE_SIZE = 1000
+UNKNOWN_REGION = "Unknown"
+
+def week_start(moment: datetime) -> datetime:
+    """Monday 00:00 UTC of the moment's week, matching pandas' to_period('W') start."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    monday = moment - timedelta(days=moment.weekday())
+    return monday.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def region_of(hospital: dict) -> str:
+    return hospital.get("region") or hospital.get("city") or UNKNOWN_REGION
+
+def _key(region: str, blood_type: str, moment: datetime) -> dict:
+    return {"region": region, "blood_type": normalize_blood_group(blood_type), "week": week_start(moment)}
+
+async def record_event(hospital: dict, blood_type: str, field: str, amount: int, at: Optional[datetime] = None):
+    """Adds `amount` to the `field` ('requests' or 'donations') counter for the event's week."""
+    key = _key(region_of(hospital), blood_type, at or datetime.now(timezone.utc))
+    await db.weekly_rollups.update_one(key, {"$inc": {field: amount}}, upsert=True)
+
+async def record_request(hospital: dict, request_doc: dict):
+    await record_event(hospital, request_doc["bloodType"], "requests", request_doc["unitsRequested"], request_doc["requestedAt"])
+
+async def record_donation(hospital: dict, request_doc: dict):
+    await record_event(hospital, request_doc["bloodType"], "donations", request_doc["unitsRequested"], request_doc.get("completedAt"))
+
+async def load_rollup_series() -> dict[tuple[str, str], tuple[datetime, list[float]]]:
+    """
+    Reads the counters as {(region, blood_type): (last_week, weekly net values)}.
+    Weeks without any events count as zero so every series is contiguous.
+    """
+    series: dict[tuple[str, str], dict[datetime, float]] = defaultdict(dict)
+    cursor = analytics_db.weekly_rollups.find({}, {"_id": 0}).sort([("region", 1), ("blood_type", 1), ("week", 1)])
+    async for row in cursor:
+        net = row.get("donations", 0) - row.get("requests", 0)
+        series[(row["region"], row["blood_type"])][row["week"]] = float(net)
+
+    result = {}
+    for key, weeks in series.items():
+        first, last = min(weeks), max(weeks)
+        values = []
+        week = first
+        while week <= last:
+            values.append(weeks.get(week, 0.0))
+            week += timedelta(weeks=1)
+        result[key] = (last, values)
+    return result
+
+# --- Backfill ---
+async def _flush(counters: dict[tuple, dict[str, int]]):
+    operations = [
+        UpdateOne(
+            {"region": region, "blood_type": blood_type, "week": week},
+            {"$set": values},
+            upsert=True,
+        )
+        for (region, blood_type, week), values in counters.items()
+    ]
+    for start in range(0, len(operations), BULK_WRITE_SIZE):
+        await db.weekly_rollups.bulk_write(operations[start:start + BULK_WRITE_SIZE], ordered=False)
+
+async def backfill() -> int:
+    """
+    Rebuilds every counter from blood_requests, streamed in batches.
+    Counters are accumulated in memory (one entry per series-week) and written
+    with $set, so the backfill is idempotent. Run it before relying on the live
+    $inc path, or while writes are paused.
+    """
+    regions = {
+        hospital["_id"]: region_of(hospital)
+        async for hospital in db.hospitals.find({}, {"region": 1, "city": 1})
+    }
+
+    counters: dict[tuple, dict[str, int]] = defaultdict(lambda: {"requests": 0, "donations": 0})
+    projection = {"hospital_id": 1, "bloodType": 1, "unitsRequested": 1, "status": 1, "requestedAt": 1, "completedAt": 1}
+    processed = 0
+    async for request in db.blood_requests.find({}, projection).batch_size(BACKFILL_BATCH_SIZE):
+        processed += 1
+        region = regions.get(request.get("hospital_id"), UNKNOWN_REGION)
+        blood_type = normalize_blood_group(request.get("bloodType") or "")
+        units = request.get("unitsRequested") or 0
+        if request.get("requestedAt"):
+            counters[(region, blood_type, week_start(request["requestedAt"]))]["requests"] += units
+        if request.get("status") == "Completed" and request.get("completedAt"):
+            counters[(region, blood_type, week_start(request["completedAt"]))]["donations"] += units
+        if processed % (BACKFILL_BATCH_SIZE * 20) == 0:
+            print(f"Backfill: {processed} requests processed...")
+
+    await _flush(counters)
+    print(f"Backfill complete: {processed} requests into {len(counters)} weekly counters.")
+    return processed
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        print("usage: python -m services.rollups backfill")
+        sys.exit(2)
+    asyncio.run(backfill())
@@ -0,0 +1,115 @@
+# blood-backend/services/startup.py
+"""
+Startup sequencing with a per-phase timing report.
+
+In the default "fast" STARTUP_MODE the lifespan only starts the background
+loops and loads the donor throttle state (one small scan, so a restart
+can't re-notify donors inside their dedup window) before serving;
+everything slow (pool warm-up, index builds, the
+compat-mask backfill, loading the responder model, the donor store and the
+first forecast) runs as a background warm-up, so a fresh worker accepts
+traffic at once. Until a component is warm its routes degrade the way they
+already do when it is unavailable: ranking answers 503, fan-out queries
+Mongo instead of the donor store, and escalations due during the warm-up
+fire once their deadlines are reloaded. "eager" finishes every phase
+before serving.
+"""
+import os
+import time
+import asyncio
+import inspect
+from typing import Any, Callable, Optional
+from utils.metrics import registry, Gauge
+
+STARTUP_MODE = os.getenv("STARTUP_MODE", "fast")  # "fast" | "eager"
+
+Step = tuple[str, Callable[[], Any]]
+
+class StartupReport:
+    """Times each startup phase and records when the app could serve and when it was fully warm."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: list[dict] = []
+        self.ready_seconds: Optional[float] = None
+        self.warm_seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def warm(self) -> bool:
+        return self.warm_seconds is not None
+
+    async def phase(self, name: str, step: Callable[[], Any], background: bool = False) -> bool:
+        """Runs one step (sync or async), records its duration and never lets a failure stop startup."""
+        started = time.perf_counter()
+        error = None
+        try:
+            result = step()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            error = str(e)
+            print(f"Startup phase '{name}' failed: {e}")
+        self.phases.append({
+            "name": name,
+            "seconds": round(time.perf_counter() - started, 3),
+            "status": "failed" if error else "ok",
+            "background": background,
+            **({"error": error} if error else {}),
+        })
+        return error is None
+
+    async def _sequence(self, steps: list[Step], background: bool):
+        for name, step in steps:
+            await self.phase(name, step, background)
+
+    async def _warm_up(self, chains: list[list[Step]], background: bool):
+        # Chains run concurrently; steps within a chain run in order
+        await asyncio.gather(*(self._sequence(steps, background) for steps in chains))
+        self.warm_seconds = round(time.perf_counter() - self.started, 3)
+        print(f"Warm-up complete {self.warm_seconds:.2f}s after start: {self._phase_summary(background=True)}")
+
+    async def warm_up(self, chains: list[list[Step]]):
+        """Runs the warm-up chains in the background, or inline in eager mode."""
+        if STARTUP_MODE == "eager":
+            await self._warm_up(chains, background=False)
+        else:
+            self._task = asyncio.create_task(self._warm_up(chains, background=True))
+
+    def mark_ready(self):
+        self.ready_seconds = round(time.perf_counter() - self.started, 3)
+        print(f"Accepting traffic {self.ready_seconds:.2f}s after start ({STARTUP_MODE} mode): {self._phase_summary(background=False)}")
+
+    async def stop(self):
+        """Cancels a warm-up still running when the app shuts down."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def _phase_summary(self, background: bool) -> str:
+        phases = [p for p in self.phases if p["background"] == background]
+        return ", ".join(f"{p['name']} {p['seconds'] * 1000:.0f}ms{'' if p['status'] == 'ok' else ' (failed)'}" for p in phases) or "-"
+
+    def to_dict(self) -> dict:
+        return {
+            "mode": STARTUP_MODE,
+            "ready_seconds": self.ready_seconds,
+            "warm_seconds": self.warm_seconds,
+            "warm": self.warm,
+            "phases": list(self.phases),
+        }
+
+startup_report = StartupReport()
+
+registry.register(Gauge(
+    "app_startup_ready_seconds", "Seconds from process start until the app accepted traffic.",
+    read=lambda: startup_report.ready_seconds or 0.0
+))
+registry.register(Gauge(
+    "app_startup_warm_seconds", "Seconds from process start until the background warm-up finished (0 while warming).",
+    read=lambda: startup_report.warm_seconds or 0.0
+))
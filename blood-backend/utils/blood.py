@@ -0,0 +1,42 @@
+# blood-backend/utils/blood.py
+
+# All ABO/Rh groups the system understands.
+BLOOD_GROUPS = ("O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+")
+
+# Recipient group -> donor groups it can safely receive red cells from.
+COMPATIBLE_DONORS = {
+    "O-": ("O-",),
+    "O+": ("O-", "O+"),
+    "A-": ("O-", "A-"),
+    "A+": ("O-", "O+", "A-", "A+"),
+    "B-": ("O-", "B-"),
+    "B+": ("O-", "O+", "B-", "B+"),
+    "AB-": ("O-", "A-", "B-", "AB-"),
+    "AB+": BLOOD_GROUPS,
+}
+
+# Bit i stands for recipient group BLOOD_GROUPS[i]. A donor's compat_mask has
+# the bit set for every recipient group that can receive from them, so
+# "can give to AB+" is a single $bitsAllSet test.
+RECIPIENT_BITS = {group: 1 << i for i, group in enumerate(BLOOD_GROUPS)}
+
+def normalize_blood_group(blood_group: str) -> str:
+    """Normalizes free-text input such as ' ab+ ' to the canonical 'AB+'."""
+    return blood_group.strip().upper().replace(" ", "")
+
+def validate_blood_group(blood_group: str) -> str:
+    """Pydantic validator: normalizes and rejects anything outside BLOOD_GROUPS."""
+    group = normalize_blood_group(blood_group)
+    if group not in BLOOD_GROUPS:
+        raise ValueError(f"Unknown blood group '{blood_group}', expected one of {', '.join(BLOOD_GROUPS)}")
+    return group
+
+def compat_mask(donor_group: str) -> int:
+    """Bitmask of the recipient groups a donor of `donor_group` can give to (0 if unknown)."""
+    group = normalize_blood_group(donor_group)
+    return sum(RECIPIENT_BITS[recipient] for recipient, donors in COMPATIBLE_DONORS.items() if group in donors)
+
+def compatible_donor_groups(recipient_group: str) -> list[str]:
+    """Returns the donor groups that can give to the given recipient group."""
+    group = normalize_blood_group(recipient_group)
+    return list(COMPATIBLE_DONORS.get(group, (group,)))
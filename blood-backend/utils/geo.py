@@ -0,0 +1,37 @@
+# blood-backend/utils/geo.py
+from typing import Optional
+
+EARTH_RADIUS_KM = 6371.0
+
+def to_geojson_point(location: Optional[dict]) -> Optional[dict]:
+    """
+    Normalizes a stored location into a GeoJSON Point.
+    Accepts GeoJSON as-is, or plain dicts with lat/lng style keys.
+    Returns None when no usable coordinates are present.
+    """
+    if not location:
+        return None
+
+    if location.get("type") == "Point" and len(location.get("coordinates") or []) >= 2:
+        lon, lat = location["coordinates"][:2]
+        return {"type": "Point", "coordinates": [float(lon), float(lat)]}
+
+    lat = location.get("lat", location.get("latitude"))
+    lon = location.get("lng", location.get("lon", location.get("longitude")))
+    if lat is None or lon is None:
+        return None
+    return {"type": "Point", "coordinates": [float(lon), float(lat)]}
+
+def haversine_km(lat: float, lon: float, lats, lons):
+    """
+    Great-circle distance in km from one point to arrays of points.
+    Vectorized with NumPy; accepts scalars or arrays for `lats`/`lons`.
+    """
+    import numpy as np
+
+    lat1 = np.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - np.radians(lon)
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
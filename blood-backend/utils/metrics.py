@@ -0,0 +1,349 @@
+# blood-backend/utils/metrics.py
+import time
+import threading
+from bisect import bisect_left
+from typing import Callable, Iterable
+from pymongo import monitoring
+
+# Latency buckets in seconds, upper bounds (Prometheus "le")
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value).replace(chr(34), "")}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class Histogram:
+    """
+    A fixed-bucket histogram. Observations are O(log buckets) and the
+    quantiles are interpolated from the bucket counts, so memory stays
+    constant no matter how many requests are recorded.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def merge(self, other: "Histogram"):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower  # beyond the last bound; report the bound
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+class LabeledHistogram:
+    """A family of histograms keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series: dict[tuple, Histogram] = {}
+        # pymongo listeners run on its monitoring threads as well as the loop
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            histogram = self.series.get(labels)
+            if histogram is None:
+                histogram = self.series[labels] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def combined(self) -> Histogram:
+        merged = Histogram(self.buckets)
+        with self._lock:
+            for histogram in self.series.values():
+                merged.merge(histogram)
+        return merged
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(labels, list(h.counts), h.total, h.count) for labels, h in self.series.items()]
+        for labels, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{_format_labels(self.label_names + ('le',), labels + (le,))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}"
+            yield f"{self.name}_count{_format_labels(self.label_names, labels)} {count}"
+
+        # Precomputed quantiles for dashboards that don't run histogram_quantile()
+        yield f"# HELP {self.name}_quantile {self.help_text} (interpolated quantiles)"
+        yield f"# TYPE {self.name}_quantile gauge"
+        with self._lock:
+            snapshot = sorted(self.series.items())
+            lines = [
+                f"{self.name}_quantile{_format_labels(self.label_names + ('quantile',), labels + (q,))} {h.quantile(q)}"
+                for labels, h in snapshot for q in QUANTILES
+            ]
+        yield from lines
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = sorted(self.values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+
+class Gauge:
+    """
+    A single value, set directly or read from a callback at scrape time.
+    Callback-backed counters owned by other modules (cache hits, ...) use
+    metric_type="counter".
+    """
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float] | None = None, metric_type: str = "gauge"):
+        self.name = name
+        self.help_text = help_text
+        self.metric_type = metric_type
+        self.value = 0.0
+        self._read = read
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} {self.metric_type}"
+        yield f"{self.name} {self._read() if self._read else self.value}"
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(LabeledHistogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+))
+http_responses = registry.register(Counter(
+    "http_responses_total", "HTTP responses by route and status code.", ("method", "route", "status")
+))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled."
+))
+mongo_command_duration = registry.register(LabeledHistogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection and operation.", ("collection", "command")
+))
+mongo_command_failures = registry.register(Counter(
+    "mongo_command_failures_total", "Failed MongoDB commands by collection and operation.", ("collection", "command")
+))
+bcrypt_duration = registry.register(LabeledHistogram(
+    "bcrypt_duration_seconds", "Time spent hashing or verifying passwords, including executor queueing.", ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+))
+
+# --- ASGI Middleware ---
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency, status codes and the
+    in-flight count. Routes are labelled by their template (scope["route"].path)
+    so /alerts/{alert_id} is one series, not one per id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else "unmatched")
+            http_request_duration.observe(labels, time.perf_counter() - started)
+            http_responses.inc(labels + (status_code,))
+
+# --- MongoDB Command Monitoring ---
+class CommandTimingListener(monitoring.CommandListener):
+    """Records the duration of every MongoDB command by collection and operation."""
+
+    def __init__(self):
+        self._pending: dict[tuple, tuple] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else event.command.get("collection", "")
+        self._pending[(event.request_id, event.connection_id)] = (collection or "-", event.command_name)
+
+    def _finish(self, event) -> tuple | None:
+        return self._pending.pop((event.request_id, event.connection_id), None)
+
+    def succeeded(self, event):
+        labels = self._finish(event)
+        if labels is not None:
+            mongo_command_duration.observe(labels, event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        labels = self._finish(event)
+        if labels is not None:
+            mongo_command_duration.observe(labels, event.duration_micros / 1_000_000)
+            mongo_command_failures.inc(labels)
+
+command_listener = CommandTimingListener()
+
+# --- MongoDB Connection Pool Monitoring ---
+mongo_pool_checkout_wait = registry.register(LabeledHistogram(
+    "mongo_pool_checkout_wait_seconds", "Time spent waiting to check a connection out of the pool.", ("address",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+))
+mongo_pool_checkout_failures = registry.register(Counter(
+    "mongo_pool_checkout_failures_total", "Failed pool checkouts by reason (timeout = pool exhausted).", ("address", "reason")
+))
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Tracks each server's pool: open connections, checked-out connections,
+    checkouts waiting and saturation (checked out / maxPoolSize). Waits go to
+    mongo_pool_checkout_wait_seconds; a saturation near 1 with growing waits
+    means the pool, not the server, is the bottleneck.
+    """
+
+    def __init__(self):
+        self._pools: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, event) -> dict:
+        address = f"{event.address[0]}:{event.address[1]}"
+        pool = self._pools.get(address)
+        if pool is None:
+            pool = self._pools[address] = {"address": address, "max_size": 100, "open": 0, "checked_out": 0, "waiting": 0}
+        return pool
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pool(event)["max_size"] = event.options.get("maxPoolSize", 100)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pool(event).update(open=0, checked_out=0, waiting=0)
+
+    def connection_created(self, event):
+        with self._lock:
+            self._pool(event)["open"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool["open"] = max(0, pool["open"] - 1)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._pool(event)["waiting"] += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool["waiting"] = max(0, pool["waiting"] - 1)
+        if event.duration is not None:
+            mongo_pool_checkout_wait.observe((pool["address"],), event.duration)
+        mongo_pool_checkout_failures.inc((pool["address"], event.reason))
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool["waiting"] = max(0, pool["waiting"] - 1)
+            pool["checked_out"] += 1
+        if event.duration is not None:
+            mongo_pool_checkout_wait.observe((pool["address"],), event.duration)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool["checked_out"] = max(0, pool["checked_out"] - 1)
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            pools = [dict(pool) for pool in self._pools.values()]
+        for pool in pools:
+            pool["saturation"] = round(pool["checked_out"] / pool["max_size"], 3) if pool["max_size"] else 0.0
+        return pools
+
+    def render(self) -> Iterable[str]:
+        pools = self.snapshot()
+        for name, key, help_text in (
+            ("mongo_pool_connections", "open", "Open connections per server pool."),
+            ("mongo_pool_checked_out", "checked_out", "Connections currently checked out per server pool."),
+            ("mongo_pool_waiting_checkouts", "waiting", "Operations waiting for a pooled connection."),
+            ("mongo_pool_saturation", "saturation", "Checked-out connections as a fraction of maxPoolSize."),
+        ):
+            yield f"# HELP {name} {help_text}"
+            yield f"# TYPE {name} gauge"
+            for pool in pools:
+                yield f"{name}{_format_labels(('address',), (pool['address'],))} {pool[key]}"
+
+pool_monitor = registry.register(PoolMonitor())
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
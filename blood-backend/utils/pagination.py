@@ -0,0 +1,99 @@
+# blood-backend/utils/pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Generic, List, Optional, TypeVar
+from bson import ObjectId
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Documents per NDJSON chunk written to the socket
+EXPORT_CHUNK_SIZE = 200
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    """A single page of a keyset-paginated listing."""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+def encode_cursor(doc: dict, sort_field: Optional[str] = None) -> str:
+    """Encodes the (sort_field, _id) position of the last document on a page."""
+    payload = {"id": str(doc["_id"])}
+    if sort_field:
+        payload["v"] = doc[sort_field].isoformat()
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        data["id"] = ObjectId(data["id"])
+        if "v" in data:
+            data["v"] = datetime.fromisoformat(data["v"])
+        return data
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def keyset_filter(cursor: Optional[str], sort_field: Optional[str] = None, descending: bool = False) -> dict:
+    """Builds the filter that resumes strictly after the cursor's position."""
+    if not cursor:
+        return {}
+    position = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    if sort_field is None:
+        return {"_id": {op: position["id"]}}
+    if "v" not in position:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return {
+        "$or": [
+            {sort_field: {op: position["v"]}},
+            {sort_field: position["v"], "_id": {op: position["id"]}},
+        ]
+    }
+
+async def fetch_page(
+    collection: Any,
+    query: dict,
+    cursor: Optional[str],
+    limit: int,
+    sort_field: Optional[str] = None,
+    descending: bool = False,
+    projection: Optional[dict] = None,
+) -> tuple[list, Optional[str]]:
+    """
+    Reads one page ordered by (sort_field, _id), or by _id alone.
+    Fetches limit + 1 documents to know whether another page exists.
+    """
+    resume = keyset_filter(cursor, sort_field, descending)
+    if query and resume:
+        page_filter = {"$and": [query, resume]}
+    else:
+        page_filter = query or resume
+
+    direction = -1 if descending else 1
+    sort = [(sort_field, direction), ("_id", direction)] if sort_field else [("_id", direction)]
+
+    docs = await collection.find(page_filter, projection).sort(sort).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort_field)
+    return docs, next_cursor
+
+def _public_document(doc: dict) -> dict:
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+async def stream_ndjson(cursor: Any, transform: Callable[[dict], dict] = _public_document) -> AsyncIterator[bytes]:
+    """Serializes a Motor cursor as NDJSON, one chunk per EXPORT_CHUNK_SIZE documents."""
+    lines = []
+    async for doc in cursor:
+        lines.append(json.dumps(transform(doc), default=str))
+        if len(lines) >= EXPORT_CHUNK_SIZE:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
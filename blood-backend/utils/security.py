@@ -1,5 +1,8 @@
 # blood-backend/utils/security.py
 import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Any
 from dotenv import load_dotenv
@@ -9,6 +12,8 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from bson import ObjectId
 from db.conn import get_database  # Import the async database dependency
+from utils.cache import TTLCache
+from utils.metrics import registry, Gauge, bcrypt_duration
 
 # Load environment variables
 load_dotenv()
@@ -16,11 +21,22 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "your_default_secret_key")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt releases the GIL, so a small thread pool hashes in parallel without blocking the event loop
+password_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Authenticated profiles keyed by (role, user_id), so protected routes skip the DB lookup
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_ENTRIES, ttl_seconds=USER_CACHE_TTL_SECONDS)
+registry.register(Gauge("user_cache_hits_total", "Authenticated-user cache hits.", lambda: user_cache.hits, "counter"))
+registry.register(Gauge("user_cache_misses_total", "Authenticated-user cache misses.", lambda: user_cache.misses, "counter"))
+registry.register(Gauge("user_cache_entries", "Profiles currently held in the user cache.", lambda: len(user_cache)))
+
 # --- Utility Functions ---
 
 def hash_password(password: str) -> str:
@@ -31,6 +47,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a plain password against a hashed password."""
     return pwd_context.verify(plain_password, hashed_password)
 
+def is_password_hash(value: str) -> bool:
+    """True if the value is already a hash this context understands (e.g. pre-hashed import rows)."""
+    return pwd_context.identify(value, required=False) is not None
+
+async def hash_password_async(password: str) -> str:
+    """Hashes a password on the bcrypt executor."""
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    try:
+        return await loop.run_in_executor(password_executor, hash_password, password)
+    finally:
+        bcrypt_duration.observe(("hash",), time.perf_counter() - started)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifies a password on the bcrypt executor."""
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    try:
+        return await loop.run_in_executor(password_executor, verify_password, plain_password, hashed_password)
+    finally:
+        bcrypt_duration.observe(("verify",), time.perf_counter() - started)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Creates a JWT access token."""
     to_encode = data.copy()
@@ -51,12 +89,16 @@ def decode_access_token(token: str):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def invalidate_cached_user(role: str, user_id: Any):
+    """Drops a cached profile; call this after any write to that user's document."""
+    user_cache.invalidate((role, str(user_id)))
+
 # --- Dependency Functions ---
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Any = Depends(get_database)):
     """
     Authenticates the current user based on a JWT token.
-    This function is now async to properly await the database call.
+    Profiles are served from `user_cache` when fresh, otherwise loaded from the database.
     """
     payload = decode_access_token(token)
     user_id = payload.get("user_id")
@@ -80,6 +122,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Any = Depend
     else:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid role in token")
 
+    cache_key = (role, user_id)
+    cached_user = user_cache.get(cache_key)
+    if cached_user is not None:
+        # Hand out a copy so callers can't mutate the cached entry
+        return dict(cached_user)
+
     # The key fix: use 'await' with the asynchronous database client
     user = await collection.find_one({"_id": object_id})
     if not user:
@@ -89,7 +137,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Any = Depend
     user["id"] = str(user["_id"])
     user.pop("_id", None)
     user.pop("password_hash", None)
-    return user
+    user.pop("password", None)
+    user_cache.set(cache_key, user)
+    return dict(user)
 
 def require_role(required_role: str):
     """Dependency to check if the current user has the required role."""
@@ -0,0 +1,40 @@
+# blood-backend/utils/serialization.py
+import json
+from datetime import date, datetime
+from typing import Any
+from bson import ObjectId
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder produces the same output, just slower
+    orjson = None
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Serializes raw BSON documents (ObjectId, datetime) straight to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(Response):
+    """
+    Response for trusted database output. It skips response_model validation,
+    so routes must project exactly the model's fields (see `projection_for`).
+    Keep `response_model` on the route for the OpenAPI schema.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def projection_for(model: type[BaseModel]) -> dict:
+    """A find() projection selecting the model's fields under their wire (alias) names."""
+    return {field.alias or name: 1 for name, field in model.model_fields.items()}
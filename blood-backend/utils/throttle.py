@@ -0,0 +1,12 @@
+# blood-backend/utils/throttle.py
+# Donor notification throttle settings, shared by the governor and the
+# donor_throttle TTL index (db/indexes.py can't import services without a cycle).
+import os
+
+# Token bucket per donor: up to BURST notifications, refilled one per REFILL_HOURS
+DONOR_NOTIFY_BURST = float(os.getenv("DONOR_NOTIFY_BURST", "3"))
+DONOR_NOTIFY_REFILL_HOURS = float(os.getenv("DONOR_NOTIFY_REFILL_HOURS", "8"))
+
+REFILL_SECONDS = DONOR_NOTIFY_REFILL_HOURS * 3600
+# After this long untouched, a bucket is full again and its stored state is meaningless
+FULL_REFILL_SECONDS = int(DONOR_NOTIFY_BURST * REFILL_SECONDS)
@@ -0,0 +1,70 @@
+# blood-backend/utils/versioning.py
+"""
+In-memory version counters that drive strong ETags for polled endpoints.
+
+Writes bump a counter per hospital ("hospital", id) or per collection
+("alerts", ...); a route's ETag is built from the counters it depends on,
+so a matching If-None-Match can be answered with 304 before any database
+work or serialization.
+
+Counters are read before the data, so a write racing a request can only
+make the ETag older than the body (the next poll re-fetches), never newer.
+They only see writes made through this process (and, with change streams,
+every worker's request/response writes), so ETags also roll over every
+ETAG_MAX_STALENESS_SECONDS to bound staleness from anything else, e.g.
+another worker's inventory change.
+"""
+import os
+import time
+import zlib
+import secrets
+from typing import Any, Optional
+from fastapi import HTTPException, Request, Response, status
+
+ETAG_MAX_STALENESS_SECONDS = float(os.getenv("ETAG_MAX_STALENESS_SECONDS", "30"))
+
+class VersionCounters:
+    def __init__(self):
+        # A restarted worker must never confirm an ETag issued before the restart
+        self.epoch = secrets.token_hex(4)
+        self._versions: dict[tuple, int] = {}
+
+    def bump(self, scope: str, key: Any = None):
+        counter = (scope, None if key is None else str(key))
+        self._versions[counter] = self._versions.get(counter, 0) + 1
+
+    def get(self, scope: str, key: Any = None) -> int:
+        return self._versions.get((scope, None if key is None else str(key)), 0)
+
+    def etag(self, *parts: Any) -> str:
+        window = int(time.time() // ETAG_MAX_STALENESS_SECONDS) if ETAG_MAX_STALENESS_SECONDS > 0 else 0
+        return f'"{self.epoch}-{window}-' + "-".join(str(part) for part in parts) + '"'
+
+versions = VersionCounters()
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so a W/ prefix is ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def query_fingerprint(request: Request) -> str:
+    """Short, quote-free stand-in for the query string, for ETags of parameterized routes."""
+    return f"{zlib.crc32(request.url.query.encode()):08x}"
+
+def etag_headers(etag: str) -> dict:
+    # no-cache: clients may store the body but must revalidate every poll
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def check_etag(request: Request, response: Response, etag: str) -> str:
+    """
+    Raises 304 Not Modified when the client's copy is current. Otherwise tags
+    `response` (routes returning their own Response pass etag_headers() instead).
+    """
+    headers = etag_headers(etag)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return etag
@@ -29,11 +29,10 @@ import { useRouter } from 'next/navigation';
 
 // Assuming these API functions are defined in '@/lib/api'
 import {
-  fetchHospitalRequests,
   createBloodRequest,
-  fetchHospitalStats,
-  fetchBloodInventory,
-  fetchDonorResponses
+  fetchHospitalDashboardSnapshot,
+  watchHospitalEvents,
+  HospitalEvent
 } from '@/lib/api';
 
 // Assuming this utility function exists in '@/lib/utils'
@@ -49,6 +48,8 @@ interface BloodRequest {
   requestedAt: string;
   donorResponses: number;
   hospitalResponses: number;
+  // Filled in by escalation once the search ring widens
+  backupHospitals?: { hospital_id: string; name: string; distance_km: number; unitsAvailable: number }[];
 }
 
 interface DonorResponse {
@@ -139,6 +140,16 @@ const sampleDonorResponses: DonorResponse[] = [
 ];
 
 
+// Inserts `doc` or merges it into the item with the same id
+const upsertById = <T,>(items: T[], doc: any): T[] => {
+  const docId = doc._id ?? doc.id;
+  const index = items.findIndex((item: any) => (item._id ?? item.id) === docId);
+  if (index === -1) return [...items, doc];
+  const next = [...items];
+  next[index] = { ...next[index], ...doc };
+  return next;
+};
+
 export default function HospitalDashboard() {
   const router = useRouter();
 
@@ -184,20 +195,15 @@ export default function HospitalDashboard() {
       return;
     }
 
-    const fetchData = async () => {
-      setLoading(true);
+    const fetchData = async (showLoading = true) => {
+      if (showLoading) setLoading(true);
       try {
-        const stats = await fetchHospitalStats();
-        setHospitalStats(stats);
-
-        const requests = await fetchHospitalRequests();
-        setActiveRequests(requests);
-
-        const inv = await fetchBloodInventory();
-        setInventory(inv);
-
-        const donorRes = await fetchDonorResponses();
-        setDonorResponses(donorRes);
+        // One round trip for the whole dashboard
+        const snapshot = await fetchHospitalDashboardSnapshot();
+        setHospitalStats(snapshot.stats);
+        setActiveRequests(snapshot.requests);
+        setInventory(snapshot.inventory);
+        setDonorResponses(snapshot.donorResponses);
       } catch (err: any) {
         setError("Failed to fetch dashboard data.");
         toast.error("Failed to load dashboard data.", {
@@ -210,6 +216,25 @@ export default function HospitalDashboard() {
     };
 
     fetchData();
+
+    // Apply pushed changes instead of polling the dashboard lists
+    const controller = new AbortController();
+    const handleEvent = (event: HospitalEvent) => {
+      if (event.type === 'blood_request') {
+        setActiveRequests(prev =>
+          event.data.status === 'Active'
+            ? upsertById(prev, event.data)
+            : prev.filter((item: any) => (item._id ?? item.id) !== event.data._id)
+        );
+      } else if (event.type === 'donor_response') {
+        setDonorResponses(prev => upsertById(prev, event.data));
+      }
+    };
+    // Refetch the snapshot on every (re)connect: events published before the
+    // stream opened, or while it was down, are not replayed
+    watchHospitalEvents(handleEvent, () => fetchData(false), controller.signal);
+
+    return () => controller.abort();
   }, [router]);
 
   // Helper function to handle new request
@@ -221,7 +246,8 @@ export default function HospitalDashboard() {
       }
       const newRequest = await createBloodRequest(newRequestData);
 
-      setActiveRequests(prevRequests => [...prevRequests, newRequest]);
+      // The SSE insert event may already have added it
+      setActiveRequests(prevRequests => upsertById(prevRequests, newRequest));
 
       toast.success('New blood request created!', {
         description: `Request for ${newRequest.unitsRequested} units of ${newRequest.bloodType} has been submitted.`,
@@ -503,6 +529,9 @@ export default function HospitalDashboard() {
                             <Hospital className="h-4 w-4 text-green-600" />
                             <span className="text-sm">
                               {request.hospitalResponses} hospital offers
+                              {request.backupHospitals?.length
+                                ? `, ${request.backupHospitals.length} nearby with stock`
+                                : ''}
                             </span>
                           </div>
                           <div className="flex items-center gap-2">
@@ -186,4 +186,132 @@ export async function fetchDonorResponses() {
   }
 
   return res.json();
-}
\ No newline at end of file
+}
+
+// NEW: Fetch stats, requests, inventory and donor responses in a single call
+export async function fetchHospitalDashboardSnapshot() {
+  const token = getAuthToken();
+  if (!token) {
+    throw new Error("Authentication token not found.");
+  }
+
+  const res = await fetch(`${API_BASE_URL}/hospitals/me/dashboard/snapshot`, {
+    method: "GET",
+    headers: {
+      "Authorization": `Bearer ${token}`,
+    },
+  });
+
+  if (!res.ok) {
+    const errorData = await res.json();
+    throw new Error(errorData.detail || "Failed to fetch dashboard data");
+  }
+
+  return res.json();
+}
+
+// NEW: Subscribe to pushed blood request / donor response changes (Server-Sent Events).
+// Uses fetch rather than EventSource so the bearer token can be sent as a header.
+export type HospitalEvent = {
+  type: "blood_request" | "donor_response";
+  operation: "insert" | "update" | "replace";
+  data: any;
+};
+
+export async function subscribeToHospitalEvents(
+  onEvent: (event: HospitalEvent) => void,
+  signal: AbortSignal,
+  onOpen?: () => void,
+  onRetry?: (ms: number) => void
+) {
+  const token = getAuthToken();
+  if (!token) {
+    throw new Error("Authentication token not found.");
+  }
+
+  const res = await fetch(`${API_BASE_URL}/hospitals/me/dashboard/events`, {
+    method: "GET",
+    headers: {
+      "Authorization": `Bearer ${token}`,
+      "Accept": "text/event-stream",
+    },
+    signal,
+  });
+
+  if (!res.ok || !res.body) {
+    throw new Error("Failed to subscribe to dashboard updates");
+  }
+  onOpen?.();
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const lines = rawEvent.split("\n");
+      const retry = lines.find(line => line.startsWith("retry: "));
+      if (retry && onRetry) {
+        onRetry(Number(retry.slice(7)));
+      }
+      const data = lines
+        .filter(line => line.startsWith("data: "))
+        .map(line => line.slice(6))
+        .join("\n");
+      if (data) {
+        onEvent(JSON.parse(data));
+      }
+    }
+  }
+}
+
+/**
+ * Keeps a dashboard event subscription open until `signal` aborts.
+ * A fetch-based reader doesn't reconnect on its own, so a dropped stream is
+ * reopened with exponential backoff (starting from the server's `retry:` hint).
+ * `onConnected` runs on every (re)connect: events published while the stream
+ * was down are not replayed, so callers refetch their snapshot there.
+ */
+export async function watchHospitalEvents(
+  onEvent: (event: HospitalEvent) => void,
+  onConnected: () => void,
+  signal: AbortSignal
+) {
+  const maxDelayMs = 30000;
+  let baseDelayMs = 1000;
+  let delayMs = baseDelayMs;
+
+  while (!signal.aborted) {
+    try {
+      await subscribeToHospitalEvents(
+        onEvent,
+        signal,
+        () => {
+          delayMs = baseDelayMs;
+          onConnected();
+        },
+        ms => {
+          if (ms > 0) baseDelayMs = delayMs = ms;
+        }
+      );
+    } catch (err: any) {
+      if (err.name === "AbortError" || signal.aborted) return;
+      console.error(err);
+    }
+    if (signal.aborted) return;
+
+    await new Promise<void>(resolve => {
+      const timer = setTimeout(resolve, delayMs);
+      signal.addEventListener("abort", () => { clearTimeout(timer); resolve(); }, { once: true });
+    });
+    delayMs = Math.min(delayMs * 2, maxDelayMs);
+  }
+}